@@ -2,4 +2,4 @@ __author__ = 'dstrohl'
 
 from AdvConfigMgr.advconfigmgr import ConfigManager, ConfigOption, ConfigSection
 from AdvConfigMgr.config_storage import *
-
+from AdvConfigMgr.config_shared import SharedConfigView
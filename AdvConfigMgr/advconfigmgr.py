@@ -128,9 +128,17 @@ from AdvConfigMgr.config_migrate import ConfigMigrationManager
 from AdvConfigMgr.utils.unset import _UNSET
 from AdvConfigMgr.config_transform import Xform
 from AdvConfigMgr.config_ro_dict import ConfigDict
+from AdvConfigMgr.config_shared import SharedConfigPublisher
+from AdvConfigMgr.config_stats import ConfigStats
+from AdvConfigMgr.config_transaction import ConfigTransaction
+from AdvConfigMgr.config_events import ConfigEventDispatcher
+from AdvConfigMgr.config_autosave import ConfigAutosave
 
 from AdvConfigMgr.utils import args_handler, convert_to_boolean, make_list, slugify, get_after, get_before
+from AdvConfigMgr.utils.rw_lock import ReadWriteLock, NullLock
 import copy
+import threading
+from contextlib import contextmanager
 from distutils.version import StrictVersion, LooseVersion, Version
 
 from collections import OrderedDict
@@ -149,7 +157,9 @@ class ConfigOption(object):
         :param object default_value: Default= _UNSET the default value for the item. If set to :py:class:`_UNSET` this
             is considered to not have a default.  (this allows None to be a valid default setting.
         :param str data_type: Default=None: This is the type of data that is stored in the option.  this accepts : None,
-            'str', 'int', 'float', 'list', 'dict' additional data types can be defined using the DataTypeBase class.
+            'str', 'int', 'float', 'list', 'dict', or a typed list or dict ('int_list', 'float_list', 'str_list',
+            'int_dict', 'str_dict', where the validations are run against each item, int and float lists are stored as
+            arrays) additional data types can be defined using the DataTypeBase class.
             If set to None and there is a default value set, this will take the datatype of the default value,
             otherwise it will be set to 'str'
         :param verbose_name: Default=None This is the long name for the option (that can show up in the options
@@ -175,11 +185,23 @@ class ConfigOption(object):
         """
         self._section = section
         self._manager = self._section._manager
+        self._lock = self._manager._lock
 
         junk, self._name = self._xf(name)
 
         self._value = _UNSET
 
+        # in layered mode, the values set by each storage manager (and at runtime) are kept in {layer: value}, and
+        # _value is the value of the highest priority layer (_top_layer).
+        if self._manager._layered:
+            self._layers = {}
+        else:
+            self._layers = None
+        self._top_layer = None
+
+        # the manager generation of the last change to this option, (see ConfigManager._stamp)
+        self._generation = 0
+
         #self._data = data_value
         #self._value = self._data._value
         #self.default_value = self._data._default_value
@@ -306,17 +328,27 @@ class ConfigOption(object):
     def clear(self):
         ip.debug('clear option [', self.path, ']').a()
 
-        if self.has_set_value:
-            if self.has_default_value:
+        with self._lock.write_lock:
+            if self.has_set_value:
+                self._manager._stamp([self])
 
-                self._value = self.default_value
-                ip.debug('setting to default value: ', self.default_value).s()
-            else:
+            if self._layers is not None:
+                self._layers.clear()
+                self._top_layer = None
                 self._value = _UNSET
-                ip.debug('setting to _UNSET').s()
+                ip.debug('all layers dropped').s()
+
+            elif self.has_set_value:
+                if self.has_default_value:
+
+                    self._value = self.default_value
+                    ip.debug('setting to default value: ', self.default_value).s()
+                else:
+                    self._value = _UNSET
+                    ip.debug('setting to _UNSET').s()
 
-        if not self.keep_if_empty and not self.has_default_value:
-            self._section.delete(self.name, force=True)
+            if not self.keep_if_empty and not self.has_default_value:
+                self._section.delete(self.name, force=True)
 
     def delete(self):
         return self._section.delete(self.name)
@@ -336,16 +368,17 @@ class ConfigOption(object):
 
         return tmp_value
 
-    def get(self, raw=False, as_string=False):
+    def get(self, raw=False, as_string=False, memo=None):
         """
         Gets the current value or default interpolated value.
 
         :param raw: if set to True will bypass the interpolater
+        :param dict memo: passed to the interpolater, see :py:meth:`ConfigManager.get_many`
         :return: the interpolated value or default value.
         """
         tmp_ret = self._get(as_string=as_string)
         if not raw:
-            tmp_ret = self._manager._interpolator.before_get(self._section.name, tmp_ret)
+            tmp_ret = self._manager._interpolator.before_get(self._section.name, tmp_ret, memo=memo)
         return tmp_ret
 
     def to_write(self, raw=False, as_string=False):
@@ -362,43 +395,171 @@ class ConfigOption(object):
             tmp_ret = self._manager._interpolator.before_write(self._section.name, tmp_ret)
         return tmp_ret
 
-    def _set(self, value, validate=True, force=False, from_string=False):
+    def _set(self, value, validate=True, force=False, from_string=False, layer=None):
         """
         internal use set, assumes that if interpolator is None, no interpolation (this is different from .get in that
         .get will set the default interpolater unless raw = True
 
+        :param value:
         :param validate:
         :param force: will skip lock checks
         :param from_string: will force conversion from string
+        :param layer: the layer to set in layered mode, (the runtime layer if None).
         :return:
         """
 
+        with self._lock.write_lock:
+            changed, value = self._stage(value, validate=validate, force=force, from_string=from_string, layer=layer)
+            if changed:
+                tmp_before = self._value
+                self._commit(value, layer=layer)
+                if self._layers is not None:
+                    # a layer below the top layer does not change the value.
+                    changed = self._value_changed(tmp_before)
+
+        if changed:
+            self._manager._changed([self])
+
+        return value
+
+    def _stage(self, value, validate=True, force=False, from_string=False, layer=None, staged=None):
+        """
+        converts and checks a value without setting it, (used by _set and by transactions so that all of the values
+        can be checked before any are set).
+
+        :param dict staged: the values already staged with this one, as {'SECTION.option': value}, (these are used in
+            place of the current values when checking the references)
+
+        :return: changed, value.  changed is False if the value is the same as the current value (or the current value
+            of the layer in layered mode) or the option is locked.  raises a ValidationError (or ForbiddenActionError)
+            if the value cannot be set.
+        """
         if self.autoconvert:
             value = self._datatype_manager.auto_convert(value)
         elif from_string:
             value = self._datatype_manager.from_string(value)
 
-        if value != self._value:
+        if self._layers is None:
+            tmp_current = self._value
+        else:
+            tmp_current = self._layers.get(layer or self._manager._runtime_layer, _UNSET)
 
-            if not self.do_not_change or force:
+        if value == tmp_current:
+            ip.debug('option [', self.path, '], already set to ', value)
+            return False, value
 
-                if self.has_default_value and value == self.default_value:
-                    self.clear()
-                    ip.debug('set option [', self.path, '], to default value [', value, ']')
+        if self.do_not_change and not force:
+            if self._manager._raise_error_on_locked_edit:
+                raise ForbiddenActionError('Change attempted on locked option [%s]' % self.name)
+            ip.debug('option [', self.path, '], is locked')
+            return False, value
 
-                if validate:
-                    self.validated(value)
+        if validate:
+            self.validated(value)
 
-                self._value = value
-                ip.debug('set option [', self.path, '], to ', value)
-            else:
-                if self._manager._raise_error_on_locked_edit:
-                    raise ForbiddenActionError('Change attempted on locked option [%s]' % self.name)
-                ip.debug('option [', self.path, '], is locked')
-        else:
-            ip.debug('option [', self.path, '], already set to ', value)
+        self._manager._interpolator.check_references(self._section.name, self.path, value, staged=staged)
 
-        return value
+        return True, value
+
+    def _commit(self, value, layer=None):
+        """
+        sets a value that has already been checked by _stage, this should be called with the write lock held.
+        """
+        if self._layers is not None:
+            self._set_layer(layer or self._manager._runtime_layer, value)
+            return
+
+        if self.has_default_value and value == self.default_value:
+            self.clear()
+            ip.debug('set option [', self.path, '], to default value [', value, ']')
+
+        self._value = value
+        ip.debug('set option [', self.path, '], to ', value)
+
+    # *******************************************************************************************************
+    # ****  OPTION : Layers
+    # *******************************************************************************************************
+
+    def _set_layer(self, layer, value):
+        """
+        sets the value of a layer, the top layer only changes if this layer has the same or a higher priority.
+        """
+        self._layers[layer] = value
+        if self._top_layer is None or self._top_layer == layer or \
+                self._manager._layer_rank(layer) >= self._manager._layer_rank(self._top_layer):
+            self._top_layer = layer
+            self._value = value
+        ip.debug('set option [', self.path, '] layer [', layer, '] to ', value, ', top layer is ', self._top_layer)
+
+    def _value_changed(self, before):
+        try:
+            return bool(self._value != before)
+        except (TypeError, ValueError):
+            return True
+
+    def _drop_layer(self, layer):
+        """
+        removes a layer without notifying the change listeners.
+
+        :return: True if the value of the option changed.
+        """
+        with self._lock.write_lock:
+            if not self._layers or layer not in self._layers:
+                return False
+
+            tmp_before = self._value
+            del self._layers[layer]
+
+            if layer == self._top_layer:
+                if self._layers:
+                    self._top_layer = max(self._layers, key=self._manager._layer_rank)
+                    self._value = self._layers[self._top_layer]
+                else:
+                    self._top_layer = None
+                    self._value = _UNSET
+            ip.debug('dropped layer [', layer, '] from option [', self.path, '], top layer is ', self._top_layer)
+
+            return self._value_changed(tmp_before)
+
+    def drop_layer(self, layer):
+        """
+        removes the value set by a layer, (the value then comes from the next highest layer, or the default value).
+
+        :param str layer: the layer name (the layer name of a storage manager or the runtime layer)
+        :return: True if the value of the option changed.
+        """
+        tmp_ret = self._drop_layer(layer)
+        if tmp_ret:
+            self._manager._changed([self])
+        return tmp_ret
+
+    @property
+    def generation(self):
+        """
+        the manager generation when this option last changed, (see :py:attr:`ConfigManager.generation`)
+        """
+        return self._generation
+
+    @property
+    def layer(self):
+        """
+        the layer that the current value came from, 'default' if the value is the default value, or None if there is
+        no value (or the manager is not layered and the value has been set).
+        """
+        if self._top_layer is not None:
+            return self._top_layer
+        if self.has_set_value or not self.has_default_value:
+            return None
+        return 'default'
+
+    @property
+    def layers(self):
+        """
+        a dictionary of {layer: value} for the layers that have set this option, (empty if the manager is not layered)
+        """
+        if self._layers is None:
+            return {}
+        return dict(self._layers)
 
     def set(self, value, raw=False, validate=True, force=False):
         """
@@ -417,7 +578,7 @@ class ConfigOption(object):
 
         return self._set(tmp_ret, validate=validate, force=force)
 
-    def from_read(self, value, raw=False, validate=True, from_string=False):
+    def from_read(self, value, raw=False, validate=True, from_string=False, layer=None):
         """
         adds data from a storage module to the system, this ignores the 'do_not_add' flag.
 
@@ -425,6 +586,7 @@ class ConfigOption(object):
         :param raw: if set to True will bypass the interpolater
         :param validate: if False will bypass the validation steps
         :param from_string: if True will convert from string
+        :param layer: the layer the value is set in if the manager is layered.
         :return: the interpolated value or default value.
         """
         if not raw:
@@ -432,7 +594,7 @@ class ConfigOption(object):
         else:
             tmp_ret = value
 
-        return self._set(tmp_ret, validate=validate, force=True, from_string=from_string)
+        return self._set(tmp_ret, validate=validate, force=True, from_string=from_string, layer=layer)
 
     # *******************************************************************************************************
     # ****  OPTION : Pass through methods
@@ -572,6 +734,7 @@ class ConfigSection(object):
         """
 
         self._manager = manager
+        self._lock = self._manager._lock
 
         # self._data_dict = data_dict
 
@@ -599,6 +762,7 @@ class ConfigSection(object):
         self.dict_type = {}
         self.last_failure_list = []
         self._cli_section_options = {}
+        self._generation = self._manager._stamp()
 
         if cli_section_desc is None:
             self._cli_section_options['description'] = description
@@ -738,6 +902,51 @@ class ConfigSection(object):
         else:
             return self._manager[section].get(option, fallback=fallback, raw=raw)
 
+    def get_many(self, options, fallback=_UNSET, raw=False):
+        """
+        gets the values of a number of options at once, any interpolation references that are shared between the
+        options are only looked up once.
+
+        :param options: a list of option names, (these can also be in dot notation to get options from other sections)
+        :param fallback: a value to return for any options that do not exist
+        :param raw: a flag to skip interpolation
+        :return: a dictionary of {option_name: value} using the names as passed.
+        :rtype: dict
+        """
+        tmp_ret = {}
+        tmp_other = []
+        tmp_memo = None if raw else {}
+
+        with self._lock.read_lock:
+            for name in options:
+                section, option = self._xf(name)
+                if self._xf_this_sec(section):
+                    tmp_ret[name] = self._get_one(option, fallback, raw, tmp_memo)
+                else:
+                    tmp_other.append(name)
+
+        if tmp_other:
+            tmp_ret.update(self._manager.get_many(tmp_other, fallback=fallback, raw=raw))
+
+        return tmp_ret
+
+    def _get_one(self, option, fallback, raw, memo):
+        """
+        gets an option value for get_many, the option name must already be transformed.
+        """
+        try:
+            tmp_opt = self._options[option]
+        except KeyError:
+            if fallback is _UNSET:
+                raise NoOptionError(option, self.name)
+            return fallback
+
+        tmp_value = tmp_opt.get(raw=raw, memo=memo)
+        if memo is not None and isinstance(tmp_value, str) and not self._manager._no_sections:
+            # saved under the same key the interpolater looks up, so other options in the batch can use it.
+            memo['{}.{}'.format(self.name, option)] = tmp_value
+        return tmp_value
+
     def set(self, option, value, raw=False, validate=True, force=False):
         """
         Sets an option value.
@@ -755,7 +964,7 @@ class ConfigSection(object):
         if self._xf_this_sec(section):
             if option not in self:
                 if self.allow_create_on_set:
-                    self.add(option, value)
+                    self.add([(option, value)])
                 else:
                     raise NoOptionError(option, self.name)
 
@@ -833,7 +1042,8 @@ class ConfigSection(object):
         :param bool raw: True if data should not be interpolated.
         
         """
-        tmp_items = list(self._options)
+        with self._lock.read_lock:
+            tmp_items = list(self._options)
         tmp_ret = []
         for i in tmp_items:
             tmp_ret.append((i, self.get(i, raw=raw)))
@@ -857,37 +1067,41 @@ class ConfigSection(object):
 
         options = make_list(options)
         ip.debug('delete options: ', options)
-        self.last_failure_list = []
-        tmp_ret = True
-        for o in options:
-
-            section, option = self._xf(o)
-            if self._xf_this_sec(section):
-                ip.debug('trying option: ', option)
-
-                try:
-                    opt = self._options[option]
-                    if opt.has_default_value and not force:
-                        ip.debug('section ', self._name, ' delete-clearing option ', option)
-                        opt.clear()
-                    elif not opt.do_not_delete or force:
-                        ip.debug('section ', self._name, ' deleteing option ', option)
-                        del self._options[option]
-                        #del self._data[option]
-                        #self._data_lock()
-                    else:
-                        ip.debug('option ', option, ' delete prohibited')
-                        self.last_failure_list.append(option)
-                        tmp_ret = False
-                except KeyError:
-                    ip.debug('option ', option, ' not found ')
-                    if forgiving:
-                        self.last_failure_list.append(option)
-                        tmp_ret = False
-                    else:
-                        raise NoOptionError(option=option, section=section)
-            else:
-                self._manager[section].delete(option, force=force, forgiving=forgiving)
+        with self._lock.write_lock:
+            self.last_failure_list = []
+            tmp_ret = True
+            for o in options:
+
+                section, option = self._xf(o)
+                if self._xf_this_sec(section):
+                    ip.debug('trying option: ', option)
+
+                    try:
+                        opt = self._options[option]
+                        if opt.has_default_value and not force:
+                            ip.debug('section ', self._name, ' delete-clearing option ', option)
+                            opt.clear()
+                        elif not opt.do_not_delete or force:
+                            ip.debug('section ', self._name, ' deleteing option ', option)
+                            del self._options[option]
+                            # the option is stamped so that interpolated values using it are resolved again.
+                            self._manager._stamp([opt])
+                            self._manager._interpolator.option_removed(self._name, opt.path, opt.value)
+                            #del self._data[option]
+                            #self._data_lock()
+                        else:
+                            ip.debug('option ', option, ' delete prohibited')
+                            self.last_failure_list.append(option)
+                            tmp_ret = False
+                    except KeyError:
+                        ip.debug('option ', option, ' not found ')
+                        if forgiving:
+                            self.last_failure_list.append(option)
+                            tmp_ret = False
+                        else:
+                            raise NoOptionError(option=option, section=section)
+                else:
+                    self._manager[section].delete(option, force=force, forgiving=forgiving)
         return tmp_ret
 
     def clear(self, options, forgiving=False):
@@ -933,7 +1147,6 @@ class ConfigSection(object):
     def _register_cli(self, option):
         ip.a().debug('Registering CLI Option on load: ', option.name)
         if self._manager._default_cli_name is not None:
-            self._manager.storage.get(self._manager._default_cli_name).reset_cache()
             tmp_args = option.cli_options
             tmp_dest = option.cli_options['dest']
             tmp_flags = make_list(tmp_args['flags'])
@@ -944,6 +1157,7 @@ class ConfigSection(object):
 
             self._cli_args[tmp_dest] = tmp_args
             self._manager._cli_args[tmp_dest] = option
+            self._manager.storage.get(self._manager._default_cli_name).add_cli_option(self, option)
         ip.s()
 
     def load(self, option, value, *args, **kwargs):
@@ -1089,18 +1303,56 @@ class ConfigSection(object):
         section, option = self._xf(name)
         if self._xf_this_sec(section):
             # tmp_data_rec = self._data.add(option, _UNSET)
-            self._options[option] = ConfigOption(self, option, *args, **with_defaults)
+            with self._lock.write_lock:
+                self._add_option(ConfigOption(self, option, *args, **with_defaults))
             # self._data_lock()
         else:
             if force:
                 kwargs['force_load'] = True
             self._manager[section]._add(option, *args, **kwargs)
 
+    def _make_option(self, name, *args, **kwargs):
+        """
+        creates an option for this section without adding it, (see :py:meth:`_add_option`)
+
+        :param str name: the option name, (already transformed)
+        :param kwargs: as per ConfigOption class (passed through)
+        :return: the new option
+        """
+        with_defaults = copy.copy(self.option_defaults)
+        with_defaults.update(kwargs)
+        return ConfigOption(self, name, *args, **with_defaults)
+
+    def _add_option(self, option, stamp=True):
+        """
+        adds an option object to the section.
+
+        :param ConfigOption option: the option, (created for this section)
+        :param bool stamp: if False the option is not stamped, (the caller is stamping it with the change)
+        """
+        with self._lock.write_lock:
+            self._options[option.name] = option
+            if stamp:
+                self._manager._stamp([option])
+        if self._manager._stats is not None:
+            self._manager._stats.instrument_option(option)
+
     @property
     def name(self):
         # The name of the section on a proxy is read-only.
         return self._name
 
+    @property
+    def generation(self):
+        """
+        the manager generation when any option in this section last changed, (or an option was added or deleted), see
+        :py:attr:`ConfigManager.generation`.
+
+        .. note:: interpolated values can depend on options in other sections, those changes do not change the
+            generation of this section.
+        """
+        return self._generation
+
     def __repr__(self):
         return 'ConfigSection {}, {} options defined'.format(self._name, len(self))
 
@@ -1133,7 +1385,9 @@ class ConfigSection(object):
         return len(self._options)
 
     def __iter__(self):
-        for key, opt in self._options.items():
+        with self._lock.read_lock:
+            tmp_options = list(self._options.values())
+        for opt in tmp_options:
             yield opt
 
 
@@ -1177,6 +1431,8 @@ class ConfigManager(object):
         plugins from different authors and you want to segment them.
     :param list version_make_migrations: this is a list of migrations that can be performed, (see :doc:`migration`\ )
     :param kwargs: if "no_sections" is set, all section options can be passed to the ConfigManager object.
+    :param bool layered: (class attribute) if True, each storage manager sets its values in its own layer, and the
+        value of an option is taken from the highest priority layer that has set it, (see :doc:`layers`\ )
     """
     _name = 'System Configuration'
 
@@ -1194,8 +1450,14 @@ class ConfigManager(object):
     _DEFAULT_DATA_TYPE_MANAGER = DataTypeGenerator
     _DEFAULT_DATA_TYPES = (DataTypeInt, DataTypeDict, DataTypeBoolean,
                            DataTypeFloat, DataTypeList, DataTypeStr, DataTypeLooseVersion,
-                           DataTypeStrictVersion)
+                           DataTypeStrictVersion, DataTypeIntList, DataTypeFloatList, DataTypeStrList,
+                           DataTypeIntDict, DataTypeStrDict)
     _DEFAULT_DICT_TYPE = OrderedDict
+    _DEFAULT_SHARED_PUBLISHER_CLASS = SharedConfigPublisher
+    _DEFAULT_STATS_CLASS = ConfigStats
+    _DEFAULT_TRANSACTION_CLASS = ConfigTransaction
+    _DEFAULT_EVENT_DISPATCHER_CLASS = ConfigEventDispatcher
+    _DEFAULT_AUTOSAVE_CLASS = ConfigAutosave
 
     # Storgae Options
     _default_cli_name = 'cli'
@@ -1222,6 +1484,15 @@ class ConfigManager(object):
     _enforce_versioning = False
     _disable_cross_section_copy = False
 
+    # Thread Safety
+    _thread_safe = False
+    _DEFAULT_LOCK_CLASS = ReadWriteLock
+
+    # Layered values
+    _layered = False
+    _runtime_layer = 'runtime'
+    _runtime_layer_priority = 1000
+
     # allow_no_value = False
     # empty_lines_in_values = True
 
@@ -1250,6 +1521,29 @@ class ConfigManager(object):
             self._cli_group_by_section = False
             self._disable_cross_section_copy = True
 
+        if self._thread_safe:
+            self._lock = self._DEFAULT_LOCK_CLASS()
+        else:
+            self._lock = NullLock()
+
+        self._stats = None
+
+        # a counter that is bumped for every change, the options and sections are stamped with the generation of their
+        # last change, (used by the storage managers to find what has changed since they were last read or written).
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+
+        # {layer name: priority}, the storage managers add their layers when they are registered.
+        self._layer_ranks = {self._runtime_layer: self._runtime_layer_priority}
+
+        self._change_listeners = []
+        # the batch depth and the held changes are kept per thread, so that a batch in one thread (a read or a
+        # transaction) does not hold the changes made in other threads.
+        self._batch_local = threading.local()
+        self.last_listener_error = None
+        self._events = None
+        self._autosave = None
+
         self._xform = self._DEFAULT_XFORM(self._section_option_sep)
         self._interpolator = self._DEFAULT_INTERPOLATION(self, self._xform, sep=self._section_option_sep)
 
@@ -1309,6 +1603,8 @@ class ConfigManager(object):
         else:
             self._migrations = migrations
 
+        self._shared_publisher = None
+
         if self._no_sections:
             self.add_section(self._no_section_section_name, force_add_default=True)
 
@@ -1347,6 +1643,8 @@ class ConfigManager(object):
         ip.debug('CLI Parser Args             : ', self._cli_parser_args)
 
         ip.debug('Raise Error on Locked Files : ', self._raise_error_on_locked_edit)
+        ip.debug('Thread Safe                 : ', self._thread_safe)
+        ip.debug('Stats Enabled               : ', self.stats_enabled)
 
         ip.debug('Last fail list              : ', self.last_fail_list)
 
@@ -1417,11 +1715,14 @@ class ConfigManager(object):
 
         kwargs['version_migrations'] = self.get_sec_migrations(section)
 
-        if section in self._sections:
-            raise DuplicateSectionError(section)
-        # tmp_data_rec = self._data.add(section)
-        self._sections[section] = ConfigSection(self, section, **kwargs)
+        with self._lock.write_lock:
+            if section in self._sections:
+                raise DuplicateSectionError(section)
+            # tmp_data_rec = self._data.add(section)
+            self._sections[section] = ConfigSection(self, section, **kwargs)
         # self._data_lock()
+        if self._stats is not None:
+            self._stats.instrument_section(self._sections[section])
 
     def add(self, *args, **kwargs):
         """
@@ -1512,9 +1813,10 @@ class ConfigManager(object):
     def storage(self):
         return self._storage
 
-    def write(self, sections=None, storage_names=None, override_tags=False, **kwargs):
+    def write(self, sections=None, storage_names=None, override_tags=False, force=False, **kwargs):
         """
-        runs the write to storage process for the selected or configured managers
+        runs the write to storage process for the selected or configured managers.  storage managers with
+        write_if_changed set are skipped if nothing in the sections has changed since they were last read or written.
 
         :param storage_names: If None, will write to all starnard storage managers, if a string or list, will write to the
             selected ones following the configured tag settings.
@@ -1522,9 +1824,11 @@ class ConfigManager(object):
             following the configured tag settings.
         :param override_tags: if True, this will override the configured storage tag settings allowing things like
             exporting the full config etc.
+        :param force: if True, the storage managers are written to even if nothing has changed.
         :return: if ONLY one storage_tag is passed, this will return the data from that manager if present.
         """
-        return self.storage.write(sections=sections, storage_names=storage_names, override_tags=override_tags, **kwargs)
+        return self.storage.write(sections=sections, storage_names=storage_names, override_tags=override_tags,
+                                  force=force, **kwargs)
 
     def read(self, sections=None, storage_names=None, override_tags=False, data=None, **kwargs):
         """
@@ -1539,8 +1843,428 @@ class ConfigManager(object):
         :param data: if a single storage tag is passed, then data can be passed to that storage manager for saving.
             this will raise an AssignmentError if data is not None and more than one storage tag is passed.
         """
-        self.storage.read(sections=sections, storage_names=storage_names, override_tags=override_tags, data=data,
-                          **kwargs)
+        with self._batch_changes():
+            self.storage.read(sections=sections, storage_names=storage_names, override_tags=override_tags, data=data,
+                              **kwargs)
+
+    def share(self, name=None, size=None):
+        """
+        Publishes the resolved configuration into a shared memory block so that other processes can use it through a
+        read only :py:class:`AdvConfigMgr.config_shared.SharedConfigView` without having to read and parse the
+        configuration themselves.
+
+        Once shared, the configuration is re-published after every change, (once for each set, and once for all of the
+        changes made by a read, transaction or set_many), calling this again will also re-publish it.
+
+        .. note:: adding or deleting option definitions is not a change to their values, so these are published with
+            the next change (or call to share).
+
+        :param str name: the name of the shared memory block, (only used the first time this is called).
+        :param int size: the size of the shared memory block, (only used the first time this is called).
+        :return: the publisher, the name of the block is in publisher.name, and the current version in
+            publisher.version
+        :rtype: SharedConfigPublisher
+        """
+        if self._shared_publisher is None:
+            self._shared_publisher = self._DEFAULT_SHARED_PUBLISHER_CLASS(self, name=name, size=size)
+            self._change_listeners.append(self._shared_publisher._on_change)
+        self._shared_publisher.publish()
+        return self._shared_publisher
+
+    def unshare(self, unlink=True):
+        """
+        Stops publishing the configuration and closes the shared memory block.
+
+        :param bool unlink: if True, the shared memory block is also removed.
+        """
+        if self._shared_publisher is not None:
+            self._change_listeners.remove(self._shared_publisher._on_change)
+            self._shared_publisher.close(unlink=unlink)
+            self._shared_publisher = None
+
+    def transaction(self):
+        """
+        Starts a transaction, changes made through the transaction are staged, and when it is committed all of the
+        values are checked before any of them are set, so either all of the changes are made or none are::
+
+            with config.transaction() as t:
+                t['section1.option1'] = 'new value'
+                t['section2.option3'] = 12
+
+        The change listeners are called once for the whole transaction.
+
+        :rtype: ConfigTransaction
+        """
+        return self._DEFAULT_TRANSACTION_CLASS(self)
+
+    def set_many(self, values, raw=False, validate=True, force=False):
+        """
+        Sets a number of options at once in a single transaction, (see :py:meth:`transaction`)
+
+        :param dict values: a dictionary of {'section.option': value}
+        :param raw: if set to True will bypass the interpolater
+        :param validate: if False will bypass the validation steps
+        :param force: if True will bypass the lock checks
+        :return: the number of options that were changed or created.
+        """
+        tmp_trans = self.transaction()
+        for key, value in values.items():
+            tmp_trans.set(key, value, raw=raw, validate=validate, force=force)
+        return tmp_trans.commit()
+
+    def subscribe(self, callback=None, key=None, queue=None):
+        """
+        Subscribes to changes in the configuration::
+
+            config.subscribe(my_callback)                       # any change
+            config.subscribe(my_callback, 'section1')           # any option in section1
+            config.subscribe(my_callback, 'section*')           # any option in sections matching the glob
+            config.subscribe(my_callback, 'section1.option1')   # a single option, (the option can also be a glob)
+            config.subscribe(queue=my_queue)                    # events are put on the queue instead
+
+        The callback is called (or the queue is sent) a :py:class:`AdvConfigMgr.config_events.ConfigChangeEvent` after
+        the change is made.  Changes made in a single transaction, set_many, or read are sent as one event.
+
+        :param callback: a callable that is passed the event, called in the thread that made the change.
+        :param str key: the section, or section.option to watch, glob patterns can be used, if None, all changes are
+            sent.
+        :param queue: an object with a put method, (for example a queue.Queue) that events are put into.
+        :return: the subscription, call subscription.cancel() to stop it.
+        :rtype: ConfigSubscription
+        """
+        if self._events is None:
+            self._events = self._DEFAULT_EVENT_DISPATCHER_CLASS(self)
+        return self._events.subscribe(callback=callback, key=key, queue=queue)
+
+    def unsubscribe(self, subscription):
+        """
+        stops a subscription returned by :py:meth:`subscribe`
+        """
+        if self._events is not None:
+            self._events.unsubscribe(subscription)
+
+    def enable_autosave(self, delay=1.0, max_delay=None, storage_names=None, sections=None):
+        """
+        Starts writing the configuration in a background thread after it changes, (see
+        :py:class:`AdvConfigMgr.config_autosave.ConfigAutosave`).  Changes made within the delay are written together.
+
+        :param float delay: the number of seconds without changes to wait before writing.
+        :param float max_delay: the longest a change will wait to be written if changes keep being made, (defaults to
+            10 times the delay)
+        :param storage_names: the storage managers to write to, (None for the default managers)
+        :param sections: the sections to write, (None for all sections)
+        :return: the autosave, (use autosave.flush() to write any unsaved changes, and autosave.stats() for the counts
+            and timings)
+        :rtype: ConfigAutosave
+        """
+        self.disable_autosave()
+        ip.debug('enabling autosave, delay: ', delay)
+        self._autosave = self._DEFAULT_AUTOSAVE_CLASS(self, delay=delay, max_delay=max_delay,
+                                                      storage_names=storage_names, sections=sections)
+        return self._autosave
+
+    def disable_autosave(self, flush=True):
+        """
+        Stops the autosave.
+
+        :param bool flush: if True, any unsaved changes are written first.
+        """
+        if self._autosave is not None:
+            ip.debug('disabling autosave')
+            self._autosave.stop(flush=flush)
+            self._autosave = None
+
+    @property
+    def autosave(self):
+        """
+        the autosave if it is enabled, or None.
+        """
+        return self._autosave
+
+    @property
+    def _change_batch_depth(self):
+        return getattr(self._batch_local, 'depth', 0)
+
+    @_change_batch_depth.setter
+    def _change_batch_depth(self, value):
+        self._batch_local.depth = value
+
+    @property
+    def _pending_changes(self):
+        try:
+            return self._batch_local.pending
+        except AttributeError:
+            self._batch_local.pending = []
+            return self._batch_local.pending
+
+    @_pending_changes.setter
+    def _pending_changes(self, value):
+        self._batch_local.pending = value
+
+    def _changed(self, options):
+        """
+        called with a list of options that have changed, if changes are being batched these are held until the end of
+        the batch, otherwise the change listeners are called.
+        """
+        self._stamp(options)
+
+        if self._change_batch_depth:
+            self._pending_changes.extend(options)
+            return
+
+        self._notify(options)
+
+    def _notify(self, options):
+        """
+        calls the change listeners with a list of options that have changed, (already stamped).  The change has already
+        been made, so an error in a listener is logged (and kept in last_listener_error) and the other listeners are
+        still called.
+        """
+        for listener in list(self._change_listeners):
+            try:
+                listener(options)
+            except Exception as err:
+                self.last_listener_error = err
+                ip.error('change listener ', listener, ' failed: ', err)
+
+    def _stamp(self, options=None, section=None):
+        """
+        bumps the generation, and stamps the options (and their sections) and the section with it.
+
+        :return: the new generation.
+        """
+        with self._generation_lock:
+            self._generation += 1
+            tmp_gen = self._generation
+            if options:
+                for option in options:
+                    option._generation = tmp_gen
+                    option._section._generation = tmp_gen
+            if section is not None:
+                section._generation = tmp_gen
+        return tmp_gen
+
+    @property
+    def generation(self):
+        """
+        a number that is increased every time anything in the configuration changes, (an option is set, cleared, added
+        or deleted, or changed by a read).  Caches built from the configuration can keep the generation they were built
+        at, and only rebuild if it is different::
+
+            if self._gen != config.generation:
+                self._gen = config.generation
+                self._rebuild()
+
+        see also :py:attr:`ConfigSection.generation` and :py:attr:`ConfigOption.generation`
+        """
+        return self._generation
+
+    @contextmanager
+    def _batch_changes(self):
+        """
+        holds any change notifications until the end of the block, then calls the change listeners once with all of
+        the options that changed.  (only the changes made in the current thread are held)
+        """
+        self._change_batch_depth += 1
+        try:
+            yield
+        finally:
+            self._change_batch_depth -= 1
+            if not self._change_batch_depth and self._pending_changes:
+                tmp_changes = self._pending_changes
+                self._pending_changes = []
+                self._notify(tmp_changes)
+
+    def get_many(self, keys, fallback=_UNSET, raw=False):
+        """
+        Gets the values of a number of options at once::
+
+            config.get_many(['section1.option1', 'section1.option2', 'section2.option1'])
+
+        The keys are all transformed first and grouped by section, and then each section is read once (holding the
+        read lock for the whole batch in thread safe mode), any interpolation references that are shared between the
+        options are only looked up once.
+
+        :param keys: a list of keys in dot notation ('section.option')
+        :param fallback: a value to return for any options (or sections) that do not exist, if not passed a
+            NoSectionError or NoOptionError will be raised.
+        :param raw: a flag to skip interpolation
+        :return: a dictionary of {key: value} using the keys as passed.
+        :rtype: dict
+        """
+        if self._no_sections:
+            return self._sections[self._no_section_section_name].get_many(keys, fallback=fallback, raw=raw)
+
+        tmp_groups = self._DEFAULT_DICT_TYPE()
+        for key in keys:
+            section, option = self._xf(key)
+            tmp_groups.setdefault(section, []).append((key, option))
+
+        tmp_ret = {}
+        tmp_memo = None if raw else {}
+
+        with self._lock.read_lock:
+            for section, tmp_keys in tmp_groups.items():
+                try:
+                    tmp_section = self._sections[section]
+                except KeyError:
+                    if fallback is _UNSET:
+                        raise NoSectionError(section=section)
+                    for key, option in tmp_keys:
+                        tmp_ret[key] = fallback
+                    continue
+
+                for key, option in tmp_keys:
+                    if option is _UNSET:
+                        tmp_ret[key] = tmp_section
+                    else:
+                        tmp_ret[key] = tmp_section._get_one(option, fallback, raw, tmp_memo)
+
+        return tmp_ret
+
+    # ****************************************************************************************************************
+    # **     ConfigManager Layers
+    # ****************************************************************************************************************
+
+    def _layer_rank(self, layer):
+        return self._layer_ranks.get(layer, 0)
+
+    def _iter_options(self, sections=None):
+        if sections is None:
+            tmp_sections = self._sections.values()
+        else:
+            tmp_sections = [self[s] for s in make_list(sections)]
+        for section in tmp_sections:
+            for option in section:
+                yield option
+
+    def drop_layer(self, layer, sections=None):
+        """
+        removes the values set by one layer from all of the options, (the options then take their values from the next
+        highest layer or their default values), the other layers are not re-read.
+
+        :param str layer: the name of the layer, (the layer of a storage manager, or the runtime layer)
+        :param sections: if None, will drop the layer from all sections, if a string or list, only from those sections.
+        :return: the number of options that changed value.
+        """
+        if not self._layered:
+            raise ForbiddenActionError('layers can only be dropped from a layered configuration')
+
+        tmp_changes = [o for o in self._iter_options(sections) if o._drop_layer(layer)]
+        ip.debug('dropped layer [', layer, '], ', len(tmp_changes), ' options changed')
+
+        if tmp_changes:
+            self._changed(tmp_changes)
+        return len(tmp_changes)
+
+    def reload_layer(self, storage_name, sections=None, data=None):
+        """
+        re-reads one storage manager, replacing its layer.  The other layers are not changed or re-read, and the change
+        listeners are only called for options where the resulting value changed.
+
+        :param str storage_name: the storage manager to read from.
+        :param sections: if None, reloads all sections, if a string or list, only those sections.
+        :param data: data passed to the storage manager, (see :py:meth:`read`)
+        :return: the number of options that changed value.
+        """
+        if not self._layered:
+            raise ForbiddenActionError('layers can only be reloaded in a layered configuration')
+
+        tmp_layer = self.storage[storage_name].layer_name
+
+        with self._batch_changes():
+            tmp_before = []
+            for option in self._iter_options(sections):
+                if option._layers and tmp_layer in option._layers:
+                    tmp_before.append((option, option._value))
+                    option._drop_layer(tmp_layer)
+            tmp_dropped = set(o for o, v in tmp_before)
+
+            tmp_mark = len(self._pending_changes)
+            self.storage.read(sections=sections, storage_names=storage_name, data=data)
+            tmp_read = self._pending_changes[tmp_mark:]
+            del self._pending_changes[tmp_mark:]
+
+            tmp_changes = [o for o in tmp_read if o not in tmp_dropped]
+            tmp_reverted = [o for o, v in tmp_before if o._value_changed(v)]
+            if tmp_reverted:
+                self._stamp(tmp_reverted)
+            tmp_changes.extend(tmp_reverted)
+            self._pending_changes.extend(tmp_changes)
+
+        return len(tmp_changes)
+
+    def value_source(self, key):
+        """
+        returns the layer that the value of an option came from.
+
+        :param str key: the option in dot notation ('section.option')
+        :return: the layer name, 'default' if the option is using its default value, or None if the option has no value
+            (or the manager is not layered and the value has been set).
+        """
+        if self._no_sections:
+            return self._sections[self._no_section_section_name].item(key).layer
+
+        section, option = self._xf(key)
+        try:
+            tmp_section = self._sections[section]
+        except KeyError:
+            raise NoSectionError(section=section)
+        return tmp_section.item(option).layer
+
+    # ****************************************************************************************************************
+    # **     ConfigManager Stats
+    # ****************************************************************************************************************
+
+    def enable_stats(self, hook=None):
+        """
+        Starts collecting call counts, timings and cache hit ratios for the main operations, (option get/set,
+        interpolation, option / section lookups, validation, migration and storage read/write).
+
+        The methods are only wrapped while stats are enabled, so there is no cost when they are not being used.
+
+        :param hook: an optional callable that is called after each timed call as hook(key, elapsed_seconds)
+        :return: the stats collector
+        :rtype: ConfigStats
+        """
+        if self._stats is None:
+            ip.debug('enabling stats')
+            self._stats = self._DEFAULT_STATS_CLASS(hook=hook)
+            self._stats.instrument_manager(self)
+        elif hook is not None:
+            self._stats.hook = hook
+        return self._stats
+
+    def disable_stats(self):
+        """
+        Stops collecting stats and removes the instrumentation.
+        """
+        if self._stats is not None:
+            ip.debug('disabling stats')
+            self._stats.uninstrument_manager(self)
+            self._stats = None
+
+    @property
+    def stats_enabled(self):
+        return self._stats is not None
+
+    def stats(self, reset=False):
+        """
+        Returns the stats collected since they were enabled (or last reset)::
+
+            {'calls': {'option.get': {'count': 10, 'time': 0.001, 'avg': 0.0001}, ...},
+             'caches': {'xform.option': {'hits': 9, 'misses': 1, 'ratio': 0.9}, ...}}
+
+        :param bool reset: if True, the counters are cleared after the report is made.
+        :return: the stats dictionary, (empty if stats are not enabled).
+        :rtype: dict
+        """
+        if self._stats is None:
+            return {}
+        tmp_ret = self._stats.report()
+        if reset:
+            self._stats.reset()
+        return tmp_ret
 
     # ****************************************************************************************************************
     # **     ConfigManager Magic Methods
@@ -1609,7 +2333,9 @@ class ConfigManager(object):
             for o in self._sections[self._no_section_section_name]:
                 yield o
         else:
-            for k, s in self._sections.items():
+            with self._lock.read_lock:
+                tmp_sections = list(self._sections.values())
+            for s in tmp_sections:
                 yield s
 
     '''
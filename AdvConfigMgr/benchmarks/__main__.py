@@ -0,0 +1,5 @@
+__author__ = 'dstrohl'
+
+from AdvConfigMgr.benchmarks.bench_lifecycle import main
+
+main()
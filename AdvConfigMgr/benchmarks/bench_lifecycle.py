@@ -0,0 +1,375 @@
+__author__ = 'dstrohl'
+
+"""
+Benchmarks for the full life of a configuration, using a synthetic configuration.
+
+The configuration is generated from the number of sections, the number of options in each section, the depth of the
+interpolation chain in each section, and the datatypes of the options.  Each stage is timed separately:
+
+=============== ==========================================================================================
+Stage           What is timed
+=============== ==========================================================================================
+add             creating the manager and registering the sections and options (``ConfigSection.add``)
+ini_parse       reading the configuration from a list of ini lines (the string storage manager)
+file_read       reading the configuration from an ini file
+get             getting every option
+get_many        getting every option in one ``ConfigManager.get_many`` call
+set             setting every option
+interpolation   getting the last option of each interpolation chain
+migration       reading stored data from an older version through the section migrations
+write           writing the configuration to a list of ini lines
+file_write      writing the configuration to an ini file
+=============== ==========================================================================================
+
+The results are returned (and printed) as json so that runs can be saved and compared between releases::
+
+    python -m AdvConfigMgr.benchmarks.bench_lifecycle --sections 20 --options 50 --output new.json
+    python -m AdvConfigMgr.benchmarks.bench_lifecycle --compare old.json new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+from AdvConfigMgr.advconfigmgr import ConfigManager
+from AdvConfigMgr.config_storage import ConfigStringStorage, ConfigFileStorage, ConfigSimpleDictStorage
+from AdvConfigMgr.config_exceptions import ip
+
+__all__ = ['generate_config', 'generate_ini', 'run_lifecycle', 'compare_results', 'main']
+
+DEFAULT_DATATYPES = ('str', 'int', 'float', 'bool')
+
+STAGES = ('add', 'ini_parse', 'file_read', 'get', 'get_many', 'set', 'interpolation', 'migration', 'write', 'file_write')
+
+
+class BenchConfigManager(ConfigManager):
+    _DEFAULT_STORAGE_PLUGINS = (ConfigStringStorage, ConfigFileStorage, ConfigSimpleDictStorage)
+
+
+# ****************************************************************************************************************
+# **     Synthetic config generator
+# ****************************************************************************************************************
+
+def _option_value(datatype, section_num, option_num):
+    if datatype == 'int':
+        return section_num * 1000 + option_num
+    if datatype == 'float':
+        return section_num + option_num / 1000.0
+    if datatype == 'bool':
+        return option_num % 2 == 0
+    if datatype == 'list':
+        return ['item{}'.format(section_num), 'item{}'.format(option_num)]
+    return 'value_{}_{}'.format(section_num, option_num)
+
+
+def generate_config(sections=10, options=20, depth=3, datatypes=DEFAULT_DATATYPES):
+    """
+    generates a list of section definition dictionaries that can be passed to :py:meth:`ConfigManager.add`.
+
+    each section has the number of options passed, cycling through the datatypes, plus an interpolation chain of
+    'depth' options where each one interpolates the one before it (interp0 <- interp1 <- ... <- interp[depth]).
+
+    :param int sections: the number of sections.
+    :param int options: the number of options in each section (not counting the interpolation chain).
+    :param int depth: the depth of the interpolation chain in each section, 0 for no chain.
+    :param tuple datatypes: the datatype names to cycle through.
+    :return: a list of section dictionaries.
+    """
+    tmp_ret = []
+    for s in range(sections):
+        tmp_options = []
+        for o in range(options):
+            datatype = datatypes[o % len(datatypes)]
+            tmp_options.append({'name': 'option{}'.format(o),
+                                'datatype': datatype,
+                                'default_value': _option_value(datatype, s, o)})
+        if depth:
+            tmp_options.append({'name': 'interp0', 'datatype': 'str', 'default_value': 'base{}'.format(s)})
+            for i in range(1, depth + 1):
+                tmp_options.append({'name': 'interp{}'.format(i),
+                                    'datatype': 'str',
+                                    'default_value': 'i{}-%(interp{})'.format(i, i - 1)})
+
+        tmp_ret.append({'name': 'section{}'.format(s), 'options': tmp_options})
+    return tmp_ret
+
+
+def generate_ini(config, version_option_name=None, stored_version=None):
+    """
+    generates the ini lines for a generated config, with every option set to a value that is different from the default.
+
+    :param list config: the config from :py:func:`generate_config`
+    :param str version_option_name: if passed (with stored_version), a version option is added to each section.
+    :param str stored_version: the version to store.
+    :return: a list of strings
+    """
+    tmp_ret = []
+    for sec in config:
+        tmp_ret.append('[{}]'.format(sec['name'].upper()))
+        if version_option_name is not None and stored_version is not None:
+            tmp_ret.append('{} = {}'.format(version_option_name.format(section=sec['name'].upper()), stored_version))
+        for opt in sec['options']:
+            if opt['name'].startswith('interp'):
+                continue
+            tmp_value = opt['default_value']
+            if opt['datatype'] == 'bool':
+                tmp_value = not tmp_value
+            elif opt['datatype'] == 'str':
+                tmp_value = 'stored_' + tmp_value
+            else:
+                tmp_value = tmp_value * 2
+            tmp_ret.append('{} = {}'.format(opt['name'], tmp_value))
+    return tmp_ret
+
+
+def generate_migrations(config, stored_version='1.0', live_version='2.0'):
+    """
+    generates a migration for each section of a generated config, (renaming option0 from 'old_option0', removing
+    'removed_option' and passing the rest).
+    """
+    tmp_ret = []
+    for sec in config:
+        tmp_ret.append({'section_name': sec['name'],
+                        'stored_version': stored_version,
+                        'live_version': live_version,
+                        'actions': [('rename', 'old_option0', 'option0'),
+                                    ('remove', 'removed_option'),
+                                    ('pass', '*')]})
+    return tmp_ret
+
+
+def _migration_data(config, version_option_name, stored_version):
+    tmp_ret = {}
+    for sec in config:
+        tmp_sec_name = sec['name'].upper()
+        tmp_sec = {version_option_name.format(section=tmp_sec_name): stored_version,
+                   'old_option0': 'renamed',
+                   'removed_option': 'removed'}
+        for opt in sec['options'][1:]:
+            if not opt['name'].startswith('interp'):
+                tmp_sec[opt['name']] = opt['default_value']
+        tmp_ret[tmp_sec_name] = tmp_sec
+    return tmp_ret
+
+
+# ****************************************************************************************************************
+# **     Benchmark runner
+# ****************************************************************************************************************
+
+def _copy_options(section):
+    # the option dictionaries are changed when they are added, so each manager gets its own copy.
+    return [dict(o) for o in section['options']]
+
+
+def _make_manager(config, **kwargs):
+    c = BenchConfigManager(**kwargs)
+    for sec in config:
+        c.add_section(sec['name'])
+        c[sec['name']].add(*_copy_options(sec))
+    return c
+
+
+def _option_keys(config, interp=False):
+    tmp_ret = []
+    for sec in config:
+        for opt in sec['options']:
+            if opt['name'].startswith('interp') == interp:
+                tmp_ret.append('{}.{}'.format(sec['name'], opt['name']))
+    return tmp_ret
+
+
+def _time_stage(func, setup=None, repeat=5, ops=1):
+    """
+    runs func 'repeat' times (calling setup before each run, outside of the timing) and returns the timings.
+    """
+    tmp_times = []
+    for i in range(repeat):
+        tmp_arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(tmp_arg)
+        tmp_times.append(time.perf_counter() - start)
+
+    tmp_best = min(tmp_times)
+    return {'best': tmp_best,
+            'mean': sum(tmp_times) / len(tmp_times),
+            'ops': ops,
+            'ops_per_sec': ops / tmp_best if tmp_best else 0.0}
+
+
+def run_lifecycle(sections=10, options=20, depth=3, datatypes=DEFAULT_DATATYPES, repeat=5, stages=STAGES):
+    """
+    runs the lifecycle benchmark and returns a dictionary of results.
+
+    :param int sections: the number of sections in the generated config.
+    :param int options: the number of options in each section.
+    :param int depth: the depth of the interpolation chain in each section.
+    :param tuple datatypes: the datatypes to cycle through.
+    :param int repeat: the number of times to run each stage, the best and mean times are reported.
+    :param tuple stages: the stages to run.
+    :return: a dictionary with the parameters, environment and the results for each stage.
+    """
+    ip.si(True)
+    config = generate_config(sections=sections, options=options, depth=depth, datatypes=datatypes)
+    ini_lines = generate_ini(config)
+    value_keys = _option_keys(config)
+    interp_keys = ['{}.interp{}'.format(sec['name'], depth) for sec in config] if depth else []
+    num_options = len(value_keys)
+
+    tmp_dir = tempfile.mkdtemp(prefix='acm_bench_')
+    tmp_file = os.path.join(tmp_dir, 'bench.ini')
+    with open(tmp_file, 'w') as f:
+        f.write('\n'.join(ini_lines))
+    tmp_file_config = {'file': {'filename': tmp_file}}
+
+    tmp_results = {}
+
+    def loaded():
+        return _make_manager(config)
+
+    def get_all(c):
+        for k in value_keys:
+            c[k]
+
+    def get_interp(c):
+        for k in interp_keys:
+            c[k]
+
+    try:
+        if 'add' in stages:
+            tmp_results['add'] = _time_stage(lambda c: _make_manager(config), repeat=repeat, ops=num_options)
+
+        if 'ini_parse' in stages:
+            tmp_results['ini_parse'] = _time_stage(lambda c: c.read(data=ini_lines, storage_names='string'),
+                                                   setup=loaded, repeat=repeat, ops=num_options)
+
+        if 'file_read' in stages:
+            tmp_results['file_read'] = _time_stage(lambda c: c.read(storage_names='file'),
+                                                   setup=lambda: _make_manager(config, storage_config=tmp_file_config),
+                                                   repeat=repeat, ops=num_options)
+
+        if 'get' in stages:
+            tmp_c = loaded()
+            tmp_results['get'] = _time_stage(lambda c: get_all(tmp_c), repeat=repeat, ops=num_options)
+
+        if 'get_many' in stages:
+            tmp_c = loaded()
+            tmp_results['get_many'] = _time_stage(lambda c: tmp_c.get_many(value_keys), repeat=repeat,
+                                                  ops=num_options)
+
+        if 'set' in stages:
+            tmp_values = {}
+            tmp_c = loaded()
+            tmp_c.read(data=ini_lines, storage_names='string')
+            for k in value_keys:
+                tmp_values[k] = tmp_c[k]
+
+            def set_all(c):
+                for k in value_keys:
+                    c[k] = tmp_values[k]
+
+            # a new manager (with default values) is used for each run so that every set is a change.
+            tmp_results['set'] = _time_stage(set_all, setup=loaded, repeat=repeat, ops=num_options)
+
+        if 'interpolation' in stages and interp_keys:
+            tmp_c = loaded()
+            tmp_results['interpolation'] = _time_stage(lambda c: get_interp(tmp_c), repeat=repeat,
+                                                       ops=len(interp_keys))
+            tmp_results['interpolation']['depth'] = depth
+
+        if 'migration' in stages:
+            tmp_migrations = generate_migrations(config)
+            tmp_version_name = ConfigManager._version_option_name
+            tmp_data = _migration_data(config, tmp_version_name, '1.0')
+
+            def migrate_setup():
+                c = BenchConfigManager(migrations=tmp_migrations)
+                for sec in config:
+                    c.add_section(sec['name'], version='2.0', options=_copy_options(sec))
+                return c
+
+            tmp_results['migration'] = _time_stage(lambda c: c.read(data=tmp_data, storage_names='dict'),
+                                                   setup=migrate_setup, repeat=repeat, ops=num_options)
+
+        def read_manager(**kwargs):
+            c = _make_manager(config, **kwargs)
+            c.read(data=ini_lines, storage_names='string')
+            return c
+
+        if 'write' in stages:
+            tmp_results['write'] = _time_stage(lambda c: c.write(storage_names='string'), setup=read_manager,
+                                               repeat=repeat, ops=num_options)
+
+        if 'file_write' in stages:
+            tmp_results['file_write'] = _time_stage(lambda c: c.write(storage_names='file'),
+                                                    setup=lambda: read_manager(storage_config=tmp_file_config),
+                                                    repeat=repeat, ops=num_options)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {'params': {'sections': sections,
+                       'options': options,
+                       'depth': depth,
+                       'datatypes': list(datatypes),
+                       'repeat': repeat},
+            'environment': {'python': platform.python_version(),
+                            'implementation': platform.python_implementation(),
+                            'platform': platform.platform()},
+            'results': tmp_results}
+
+
+def compare_results(old, new):
+    """
+    compares two result dictionaries from :py:func:`run_lifecycle` and returns the ratio of the new best time to the
+    old best time for each stage that is in both (so > 1.0 is slower).
+
+    :return: a dictionary of {stage: ratio}
+    """
+    tmp_ret = {}
+    for stage, tmp_new in new['results'].items():
+        tmp_old = old['results'].get(stage, None)
+        if tmp_old is not None and tmp_old['best']:
+            tmp_ret[stage] = tmp_new['best'] / tmp_old['best']
+    return tmp_ret
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bench_lifecycle', description='Config lifecycle benchmarks')
+    parser.add_argument('--sections', type=int, default=10)
+    parser.add_argument('--options', type=int, default=20)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--datatypes', default=','.join(DEFAULT_DATATYPES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--output', default=None, help='write the json results to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), default=None,
+                        help='compare two saved result files instead of running the benchmarks')
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        with open(args.compare[0]) as f:
+            tmp_old = json.load(f)
+        with open(args.compare[1]) as f:
+            tmp_new = json.load(f)
+        tmp_ret = compare_results(tmp_old, tmp_new)
+    else:
+        tmp_ret = run_lifecycle(sections=args.sections,
+                                options=args.options,
+                                depth=args.depth,
+                                datatypes=tuple(args.datatypes.split(',')),
+                                repeat=args.repeat,
+                                stages=tuple(args.stages.split(',')))
+
+    tmp_json = json.dumps(tmp_ret, indent=2, sort_keys=True)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            f.write(tmp_json)
+    print(tmp_json)
+    return tmp_ret
+
+
+if __name__ == '__main__':
+    main()
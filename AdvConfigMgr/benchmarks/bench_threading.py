@@ -0,0 +1,130 @@
+__author__ = 'dstrohl'
+
+"""
+Multi-threaded stress benchmark for the configuration manager.
+
+A number of reader threads hammer ``ConfigManager['section.option']`` lookups while writer threads set values and add
+options, every value read is checked to make sure it came from the option that was asked for.
+
+run with::
+
+    python -m AdvConfigMgr.benchmarks.bench_threading [threads] [seconds]
+"""
+
+import sys
+import json
+import threading
+import time
+
+from AdvConfigMgr.advconfigmgr import ConfigManager
+from AdvConfigMgr.config_exceptions import ip
+
+
+class ThreadSafeConfigManager(ConfigManager):
+    """A config manager with the thread safe locks enabled, (also used by the tests)."""
+    _thread_safe = True
+
+
+def make_manager(thread_safe=True, sections=10, options=20):
+    if thread_safe:
+        c = ThreadSafeConfigManager()
+    else:
+        c = ConfigManager()
+
+    for s in range(sections):
+        sec_name = 'section{}'.format(s)
+        c.add_section(sec_name)
+        for o in range(options):
+            c[sec_name].add({'name': 'option{}'.format(o), 'default_value': '{}.{}'.format(s, o)})
+    return c
+
+
+def run_stress(thread_safe=True, threads=8, seconds=2.0, sections=10, options=20):
+    """
+    runs the stress test and returns a dictionary of results.
+
+    :param bool thread_safe: if True, the manager is run in thread safe mode.
+    :param int threads: the number of reader threads, (one writer thread is also started for every four readers)
+    :param float seconds: how long to run the test for.
+    :return: a dict with the counts of reads, writes and errors.
+    """
+    ip.si(True)
+    c = make_manager(thread_safe=thread_safe, sections=sections, options=options)
+
+    stop = threading.Event()
+    results = {'reads': 0, 'writes': 0, 'wrong_values': 0, 'exceptions': 0}
+    results_lock = threading.Lock()
+
+    def reader(offset):
+        tmp_reads = 0
+        tmp_wrong = 0
+        tmp_exc = 0
+        i = offset
+        while not stop.is_set():
+            s = i % sections
+            o = (i // sections) % options
+            i += 1
+            try:
+                tmp_val = c['section{}.option{}'.format(s, o)]
+                if not tmp_val.startswith('{}.{}'.format(s, o)):
+                    tmp_wrong += 1
+            except Exception:
+                tmp_exc += 1
+            tmp_reads += 1
+        with results_lock:
+            results['reads'] += tmp_reads
+            results['wrong_values'] += tmp_wrong
+            results['exceptions'] += tmp_exc
+
+    def writer(offset):
+        tmp_writes = 0
+        tmp_exc = 0
+        i = offset
+        while not stop.is_set():
+            s = i % sections
+            o = (i // sections) % options
+            i += 1
+            try:
+                c['section{}'.format(s)]['option{}'.format(o)] = '{}.{}-{}'.format(s, o, i)
+                c['section{}'.format(s)].add('extra_{}_{}'.format(offset, i))
+            except Exception:
+                tmp_exc += 1
+            tmp_writes += 1
+        with results_lock:
+            results['writes'] += tmp_writes
+            results['exceptions'] += tmp_exc
+
+    tmp_threads = [threading.Thread(target=reader, args=(t,)) for t in range(threads)]
+    tmp_threads.extend(threading.Thread(target=writer, args=(t,)) for t in range(max(1, threads // 4)))
+
+    start = time.perf_counter()
+    for t in tmp_threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in tmp_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    results['thread_safe'] = thread_safe
+    results['threads'] = len(tmp_threads)
+    results['seconds'] = elapsed
+    results['reads_per_sec'] = results['reads'] / elapsed
+    results['writes_per_sec'] = results['writes'] / elapsed
+    return results
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    threads = int(argv[0]) if argv else 8
+    seconds = float(argv[1]) if len(argv) > 1 else 2.0
+
+    tmp_ret = [run_stress(thread_safe=False, threads=threads, seconds=seconds),
+               run_stress(thread_safe=True, threads=threads, seconds=seconds)]
+    print(json.dumps(tmp_ret, indent=2))
+    return tmp_ret
+
+
+if __name__ == '__main__':
+    main()
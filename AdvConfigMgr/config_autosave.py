@@ -0,0 +1,194 @@
+__author__ = 'dstrohl'
+
+"""
+Background saving of the configuration.
+
+Instead of calling :py:meth:`ConfigManager.write` after every change, the autosave writes the configuration on a
+worker thread a short time after it changes::
+
+    config.enable_autosave(delay=2.0)
+
+    config['web.port'] = 8080       # returns immediately
+    config['web.host'] = 'example'  # written with the port change, about 2 seconds later
+
+Changes are coalesced: the write is done once no changes have been made for ``delay`` seconds, (or ``max_delay`` seconds
+after the first unsaved change if changes keep coming).  Any unsaved changes are written when the autosave is stopped,
+when :py:meth:`ConfigAutosave.flush` is called, or when the interpreter exits.
+
+.. note:: the writes are done in another thread, so the manager should be thread safe (see :doc:`threading`\ ) if
+    options are changed while it is being written.
+"""
+
+import atexit
+import threading
+import time
+
+from AdvConfigMgr.config_exceptions import ip
+
+__all__ = ['ConfigAutosave']
+
+
+class ConfigAutosave(object):
+    """
+    Writes the configuration on a worker thread after it changes.
+
+    :param ConfigManager manager: the manager to save.
+    :param float delay: the number of seconds without changes to wait before writing.
+    :param float max_delay: the longest (in seconds) a change will wait to be written if changes keep being made,
+        (defaults to 10 times the delay).
+    :param storage_names: the storage managers to write to, (None for the default managers)
+    :param sections: the sections to write, (None for all sections)
+    """
+
+    def __init__(self, manager, delay=1.0, max_delay=None, storage_names=None, sections=None, timer=time.monotonic):
+        self.manager = manager
+        self.delay = delay
+        if max_delay is None:
+            max_delay = delay * 10
+        self.max_delay = max_delay
+        self.storage_names = storage_names
+        self.sections = sections
+        self._timer = timer
+
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._pending = False
+        self._first_change = None
+        self._last_change = None
+        self._closed = False
+
+        self._changes = 0
+        self._writes = 0
+        self._errors = 0
+        self.last_error = None
+        self._write_time = 0.0
+        self._max_write_time = 0.0
+        self._latency = 0.0
+        self._max_latency = 0.0
+
+        self._subscription = manager.subscribe(self._on_change)
+        self._thread = threading.Thread(target=self._run, name='config-autosave', daemon=True)
+        self._thread.start()
+        atexit.register(self._atexit)
+
+    def _on_change(self, event):
+        with self._cond:
+            tmp_now = self._timer()
+            if not self._pending:
+                self._pending = True
+                self._first_change = tmp_now
+            self._last_change = tmp_now
+            self._changes += len(event.keys)
+            self._cond.notify()
+
+    def _take_pending(self):
+        """
+        called with the condition held, clears the pending flag and returns the time of the first unsaved change.
+        """
+        tmp_first = self._first_change
+        self._pending = False
+        self._first_change = None
+        return tmp_first
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+
+                # wait for the changes to stop, (or for max_delay)
+                while self._pending and not self._closed:
+                    tmp_wait = min(self._last_change + self.delay, self._first_change + self.max_delay) - self._timer()
+                    if tmp_wait <= 0:
+                        break
+                    self._cond.wait(tmp_wait)
+
+                if not self._pending or self._closed:
+                    continue
+                tmp_first = self._take_pending()
+
+            self._write(tmp_first)
+
+    def _write(self, first_change):
+        with self._write_lock:
+            tmp_start = self._timer()
+            try:
+                self.manager.write(sections=self.sections, storage_names=self.storage_names)
+            except Exception as err:
+                self._errors += 1
+                self.last_error = err
+                ip.error('autosave failed: ', err)
+            else:
+                self._writes += 1
+
+            tmp_end = self._timer()
+            tmp_write_time = tmp_end - tmp_start
+            tmp_latency = tmp_end - first_change
+            self._write_time += tmp_write_time
+            self._max_write_time = max(self._max_write_time, tmp_write_time)
+            self._latency += tmp_latency
+            self._max_latency = max(self._max_latency, tmp_latency)
+
+        ip.debug('autosave written in ', tmp_write_time, ' seconds, ', tmp_latency, ' seconds after the change')
+
+    @property
+    def pending(self):
+        """
+        True if there are changes that have not been written.
+        """
+        return self._pending
+
+    def flush(self):
+        """
+        writes any unsaved changes now, (in the calling thread).
+
+        :return: True if there were changes to write.
+        """
+        with self._cond:
+            if not self._pending:
+                return False
+            tmp_first = self._take_pending()
+        self._write(tmp_first)
+        return True
+
+    def stop(self, flush=True):
+        """
+        stops the autosave.
+
+        :param bool flush: if True, any unsaved changes are written.
+        """
+        if self._closed:
+            return
+        self.manager.unsubscribe(self._subscription)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+        atexit.unregister(self._atexit)
+        if flush:
+            self.flush()
+
+    def _atexit(self):
+        self.stop(flush=True)
+
+    def stats(self):
+        """
+        :return: a dictionary with the number of changes, writes and errors, and the write times and latencies (the
+            time from the first unsaved change to the end of the write) in seconds.
+        """
+        tmp_count = self._writes + self._errors
+        return {'changes': self._changes,
+                'writes': self._writes,
+                'errors': self._errors,
+                'pending': self._pending,
+                'write_time': {'total': self._write_time,
+                               'avg': self._write_time / tmp_count if tmp_count else 0.0,
+                               'max': self._max_write_time},
+                'latency': {'avg': self._latency / tmp_count if tmp_count else 0.0,
+                            'max': self._max_latency}}
+
+    def __repr__(self):
+        return 'ConfigAutosave [delay: {}, writes: {}, pending: {}]'.format(self.delay, self._writes, self._pending)
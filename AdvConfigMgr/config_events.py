@@ -0,0 +1,207 @@
+__author__ = 'dstrohl'
+
+"""
+Change notifications for the configuration manager.
+
+Components can subscribe to changes instead of polling option values::
+
+    def on_change(event):
+        for key in event.keys:
+            print(key, 'changed to', event[key])
+
+    config.subscribe(on_change, 'database.*')        # any option in the DATABASE section
+    config.subscribe(on_change, 'db_*')              # any option in any section starting with 'DB_'
+    config.subscribe(on_change, 'database.host')     # a single option
+    config.subscribe(on_change)                      # any change at all
+
+    # or to handle them in another thread:
+    q = queue.Queue()
+    config.subscribe(queue=q)
+
+Changes are coalesced, a transaction, set_many or read sends a single event to each subscriber with all of the options
+(that the subscriber is interested in) that changed.
+"""
+
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+
+from AdvConfigMgr.config_exceptions import ip
+from AdvConfigMgr.utils.unset import _UNSET
+
+__all__ = ['ConfigChangeEvent', 'ConfigSubscription', 'ConfigEventDispatcher']
+
+
+class ConfigChangeEvent(object):
+    """
+    The options that changed in a single set, transaction or read.
+
+    :param ConfigManager manager: the manager that changed.
+    :param list keys: the keys ('SECTION.option') of the options that changed.
+    :param list sections: the names of the sections that had changes.
+    """
+
+    def __init__(self, manager, keys, sections):
+        self.manager = manager
+        self.keys = keys
+        self.sections = sections
+
+    def values(self):
+        """
+        :return: a dictionary of the current values of the changed options.
+        """
+        return self.manager.get_many(self.keys, fallback=None)
+
+    def __getitem__(self, key):
+        return self.manager[key]
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __repr__(self):
+        return 'ConfigChangeEvent {}'.format(self.keys)
+
+
+class ConfigSubscription(object):
+    """
+    A subscription to changes in a manager, returned by :py:meth:`ConfigManager.subscribe`
+
+    :param ConfigEventDispatcher dispatcher: the dispatcher this is registered with.
+    :param callback: a callable that is passed a :py:class:`ConfigChangeEvent`
+    :param str section_glob: a glob pattern matching section names (transformed), None matches all sections.
+    :param str option_glob: a glob pattern matching option names (transformed), None matches all options.
+    :param queue: an object with a put method (such as a queue.Queue) that events are put into.
+    """
+
+    def __init__(self, dispatcher, callback=None, section_glob=None, option_glob=None, queue=None):
+        if callback is None and queue is None:
+            raise AttributeError('subscriptions need either a callback or a queue')
+        self._dispatcher = dispatcher
+        self.callback = callback
+        self.queue = queue
+        self.section_glob = section_glob
+        self.option_glob = option_glob
+        self.errors = 0
+        self.last_error = None
+
+    def matches(self, section_name, option_name):
+        if self.section_glob is not None and not fnmatchcase(section_name, self.section_glob):
+            return False
+        if self.option_glob is not None and not fnmatchcase(option_name, self.option_glob):
+            return False
+        return True
+
+    def deliver(self, event):
+        if self.queue is not None:
+            self.queue.put(event)
+        else:
+            self.callback(event)
+
+    def cancel(self):
+        """
+        stops the subscription.
+        """
+        self._dispatcher.unsubscribe(self)
+
+    def __repr__(self):
+        return 'ConfigSubscription [{}.{}]'.format(self.section_glob or '*', self.option_glob or '*')
+
+
+class ConfigEventDispatcher(object):
+    """
+    Keeps the subscriptions for a manager, and sends the events to them.  This is registered as a change listener on the
+    manager when the first subscription is made, so there is no cost if nothing is subscribed.
+
+    :param ConfigManager manager: the manager to watch.
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self._subscriptions = []
+        self._registered = False
+
+    def subscribe(self, callback=None, key=None, queue=None):
+        """
+        see :py:meth:`ConfigManager.subscribe`
+        """
+        section_glob, option_glob = self._parse_key(key)
+        tmp_sub = ConfigSubscription(self, callback=callback, section_glob=section_glob, option_glob=option_glob,
+                                     queue=queue)
+        self._subscriptions.append(tmp_sub)
+
+        if not self._registered:
+            self.manager._change_listeners.append(self.dispatch)
+            self._registered = True
+
+        ip.debug('subscribed: ', tmp_sub)
+        return tmp_sub
+
+    def unsubscribe(self, subscription):
+        try:
+            self._subscriptions.remove(subscription)
+        except ValueError:
+            pass
+
+        if not self._subscriptions and self._registered:
+            self.manager._change_listeners.remove(self.dispatch)
+            self._registered = False
+
+    def _parse_key(self, key):
+        """
+        :return: section_glob, option_glob
+        """
+        if key is None:
+            return None, None
+
+        manager = self.manager
+        tmp_xf = manager._xform
+
+        if manager._no_sections:
+            return None, tmp_xf.option_x_form(key, glob=True)
+
+        section, option = tmp_xf.both(key, option_or_section='section', glob=True)
+        if option is _UNSET:
+            option = None
+        return section, option
+
+    def dispatch(self, options):
+        """
+        called with the list of options that changed, sends one event to each matching subscription.
+        """
+        tmp_changed = OrderedDict()
+        for option in options:
+            tmp_changed[(option._section.name, option.name)] = None
+
+        for sub in list(self._subscriptions):
+            tmp_keys = []
+            tmp_sections = []
+            for section_name, option_name in tmp_changed:
+                if sub.matches(section_name, option_name):
+                    tmp_keys.append(self._key(section_name, option_name))
+                    if section_name not in tmp_sections:
+                        tmp_sections.append(section_name)
+            if tmp_keys:
+                # the change has already been made, so a failing callback is logged (and kept on the subscription)
+                # instead of stopping the other subscriptions.
+                try:
+                    sub.deliver(ConfigChangeEvent(self.manager, tmp_keys, tmp_sections))
+                except Exception as err:
+                    sub.errors += 1
+                    sub.last_error = err
+                    ip.error('subscription ', sub, ' failed: ', err)
+
+    def _key(self, section_name, option_name):
+        if self.manager._no_sections:
+            return option_name
+        return '{}.{}'.format(section_name, option_name)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def __repr__(self):
+        return 'ConfigEventDispatcher [{} subscriptions]'.format(len(self._subscriptions))
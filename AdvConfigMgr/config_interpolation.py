@@ -3,8 +3,12 @@ __author__ = 'dstrohl'
 from AdvConfigMgr.utils import Error, get_between, get_after
 from AdvConfigMgr.config_transform import Xform
 from AdvConfigMgr.config_exceptions import NoSectionError, NoOptionError
+from AdvConfigMgr.utils.unset import _UNSET
 __all__ = ['Interpolation', 'NoInterpolation']
 
+# the most strings kept parsed by each interpolator.
+_MAX_PARSED = 4096
+
 
 # ************************************************************************************
 # *********  Errors
@@ -38,6 +42,15 @@ class InterpolationDepthError(InterpolationError):
         InterpolationError.__init__(self, msg)
         self.args = (instr, max_depth, rawval)
 
+
+class InterpolationCycleError(InterpolationError):
+    """Raised when options refer to each other in a loop."""
+
+    def __init__(self, path):
+        msg = "Circular interpolation reference: {}".format(' -> '.join(path))
+        InterpolationError.__init__(self, msg)
+        self.path = path
+
 # ************************************************************************************
 # *********  Interpolation Classes
 # ************************************************************************************
@@ -69,7 +82,7 @@ class BaseInterpolation:
     def interpolatorable(self, value):
         return False
 
-    def before_get(self, section_name, value):
+    def before_get(self, section_name, value, memo=None):
         """
         run on value returned from the config_root before returning it to the calling system.
 
@@ -77,6 +90,8 @@ class BaseInterpolation:
 
         :param section_name: the name of the current section
         :param value: the value from the config root
+        :param dict memo: an optional dictionary of keys that have already been looked up, used when getting a number
+            of options at once so that shared references are only looked up once.
         :return: the value to be returned
         """
         return value
@@ -117,6 +132,27 @@ class BaseInterpolation:
         """
         return value
 
+    def check_references(self, section_name, key, value, staged=None):
+        """
+        run on values before they are set (or read), raises an error if the value cannot be used.
+
+        :param section_name: the name of the current section
+        :param key: the 'SECTION.option' key of the option being set
+        :param value: the value to be set
+        :param dict staged: other values being set with this one, as {'SECTION.option': value}
+        """
+        pass
+
+    def option_removed(self, section_name, key, value):
+        """
+        run when an option is deleted.
+
+        :param section_name: the name of the section
+        :param key: the 'SECTION.option' key of the option
+        :param value: the last value of the option
+        """
+        pass
+
 
 class NoInterpolation(BaseInterpolation):
     pass
@@ -139,10 +175,23 @@ class Interpolation(BaseInterpolation):
 
     can also handle taking section option
 
+    When used with a :py:class:`ConfigManager`, the references in each string are parsed once, and the interpolated
+    values of the options that are referred to are kept in a resolved value store along with the options they depend
+    on, (the dependency graph).  An option is resolved after everything it refers to (so a chain is only walked once),
+    and a stored value is used until the generation of one of the options it depends on changes.  A loop of references
+    raises an InterpolationCycleError naming the options in the loop, when the value making the loop is set (or read),
+    or when it is resolved.
+
     """
 
-    def before_get(self, section_name, value):
-        return self.interpolate(value, section_name)
+    def __init__(self, *args, **kwargs):
+        super(Interpolation, self).__init__(*args, **kwargs)
+        self._parsed = {}
+        self._resolved = {}
+        self._use_store = hasattr(type(self.base_config), '_stamp')
+
+    def before_get(self, section_name, value, memo=None):
+        return self.interpolate(value, section_name, memo=memo)
 
     def before_set(self, section_name, value):
         return self.validate_interpolation_str(value)
@@ -174,7 +223,8 @@ class Interpolation(BaseInterpolation):
         while rest:
             key_pos = rest.find(self.key)
             if key_pos < 0:
-                return
+                accum.append(rest)
+                break
 
             if key_pos >= 0:
                 accum.append(rest[:key_pos])
@@ -228,7 +278,217 @@ class Interpolation(BaseInterpolation):
     key_end = enc[1]
     '''
 
-    def interpolate(self, in_string, section, depth=0):
+    def _parse(self, in_string, section):
+        """
+        splits a string into literal strings and references, (cached by section and string)
+
+        :return: a tuple of strings and (key, section) tuples for the references.
+        """
+        tmp_cache_key = (section, in_string)
+        try:
+            return self._parsed[tmp_cache_key]
+        except KeyError:
+            pass
+
+        tmp_parts = []
+        tmp_literal = []
+        rest = in_string
+
+        while rest:
+            key_pos = rest.find(self.key)
+            if key_pos < 0:
+                tmp_literal.append(rest)
+                break
+
+            tmp_literal.append(rest[:key_pos])
+            rest = rest[key_pos:]
+
+            c = rest[1:2]
+
+            if c == self.key:
+                tmp_literal.append(self.key)
+                rest = rest[2:]
+
+            elif c == self.key_start:
+
+                if self.key_end not in rest:
+                    raise InterpolationSyntaxError("bad interpolation variable reference %r" % rest)
+
+                dot_n, key_section, key_option = self.xform.both_check(get_between(rest, self.key_start, self.key_end),
+                                                                       section=section)
+                if key_section is None or key_section is _UNSET:
+                    matched = key_option
+                else:
+                    matched = '{}.{}'.format(key_section, key_option)
+                if dot_n:
+                    new_section = key_section
+                else:
+                    new_section = section
+
+                if tmp_literal:
+                    tmp_parts.append(''.join(tmp_literal))
+                    tmp_literal = []
+                tmp_parts.append((matched, new_section))
+
+                rest = get_after(rest, self.key_end)
+
+            else:
+                raise InterpolationSyntaxError(
+                    "'{0}' must be followed by '{0}' or '{2}', found: {1}".format(self.key, rest, self.key_start))
+
+        if tmp_literal:
+            tmp_parts.append(''.join(tmp_literal))
+
+        tmp_parts = tuple(tmp_parts)
+        if len(self._parsed) >= _MAX_PARSED:
+            self._parsed.clear()
+        self._parsed[tmp_cache_key] = tmp_parts
+        return tmp_parts
+
+    def _option(self, key):
+        """
+        :param key: 'SECTION.option'
+        :return: the option object.
+        """
+        section_name, sep, option_name = key.rpartition('.')
+        if not sep:
+            section_name = self.base_config._no_section_section_name
+        try:
+            tmp_section = self.base_config._sections[section_name]
+        except KeyError:
+            raise NoSectionError(section=section_name)
+        try:
+            return tmp_section._options[option_name]
+        except KeyError:
+            raise NoOptionError(option_name, section_name)
+
+    def _stored(self, key):
+        """
+        :return: the (generation, options, value) entry from the resolved store for the key, or None if there is no
+            entry or one of the options it depends on has changed.
+        """
+        tmp_entry = self._resolved.get(key)
+        if tmp_entry is not None:
+            tmp_gen = tmp_entry[0]
+            if tmp_gen == self.base_config._generation or all(o._generation <= tmp_gen for o in tmp_entry[1]):
+                return tmp_entry
+        return None
+
+    def _resolve_key(self, key, section, path):
+        """
+        returns the interpolated value of an option, from the resolved store if none of the options it depends on
+        have changed.
+
+        :param key: the 'SECTION.option' key of the option.
+        :param section: the section name to use for references in the option without a section.
+        :param list path: the keys being resolved that lead to this one, (used to find loops)
+        :return: value, options (the options the value depends on, including this one), cacheable
+        """
+        tmp_entry = self._stored(key)
+        if tmp_entry is not None:
+            return tmp_entry[2], tmp_entry[1], True
+
+        if key in path:
+            raise InterpolationCycleError(path[path.index(key):] + [key])
+        if len(path) > self.max_depth:
+            raise InterpolationDepthError(path[0], self.max_depth, key)
+
+        tmp_gen = self.base_config._generation
+        try:
+            tmp_option = self._option(key)
+        except self.lookup_errors:
+            if self.raise_on_lookup_error:
+                raise
+            # not stored, the option may be added later.
+            return self.replace_on_lookup_error, (), False
+
+        tmp_value = tmp_option.value
+        tmp_options = [tmp_option]
+        tmp_cacheable = True
+
+        if isinstance(tmp_value, str) and self.key in tmp_value:
+            path.append(key)
+            accum = []
+            for part in self._parse(tmp_value, section):
+                if part.__class__ is str:
+                    accum.append(part)
+                else:
+                    ref_value, ref_options, ref_cacheable = self._resolve_key(part[0], part[1], path)
+                    accum.append(ref_value if isinstance(ref_value, str) else str(ref_value))
+                    tmp_options.extend(ref_options)
+                    tmp_cacheable = tmp_cacheable and ref_cacheable
+            path.pop()
+            tmp_value = ''.join(accum)
+            tmp_options = tuple(set(tmp_options))
+        else:
+            tmp_options = tuple(tmp_options)
+
+        if tmp_cacheable:
+            self._resolved[key] = (tmp_gen, tmp_options, tmp_value)
+        return tmp_value, tmp_options, tmp_cacheable
+
+    def resolve_section(self, section_name):
+        """
+        resolves all of the options in a section into the resolved value store, (each option is resolved after the
+        options it refers to, and each only once).
+
+        :param str section_name: the section name.
+        :return: a dictionary of {option name: interpolated value}
+        """
+        tmp_section = self.base_config[section_name]
+        tmp_ret = {}
+        for option in tmp_section:
+            tmp_ret[option.name] = self._resolve_key(option.path, tmp_section.name, [])[0]
+        return tmp_ret
+
+    def check_references(self, section_name, key, value, staged=None):
+        """
+        raises an InterpolationCycleError if setting the option to the value would make a loop of references.
+        (references to options that do not exist yet are not checked)
+
+        :param dict staged: other values being set with this one (in a transaction), as {'SECTION.option': value},
+            these are used in place of the current values of those options.
+        """
+        if not self._use_store or not self.interpolatorable(value):
+            return
+        self._check_cycle(value, section_name, [key], staged or {})
+
+    def option_removed(self, section_name, key, value):
+        """
+        removes a deleted option (and the values that depended on it) from the resolved store, and its value from the
+        parsed strings.
+        """
+        if not self._use_store:
+            return
+        self._resolved.pop(key, None)
+        for tmp_key, (tmp_gen, tmp_options, tmp_value) in list(self._resolved.items()):
+            if any(o.path == key for o in tmp_options):
+                self._resolved.pop(tmp_key, None)
+        if isinstance(value, str):
+            self._parsed.pop((section_name, value), None)
+
+    def _check_cycle(self, value, section_name, path, staged):
+        for part in self._parse(value, section_name):
+            if part.__class__ is str:
+                continue
+            ref_key, ref_section = part
+            if ref_key == path[0]:
+                raise InterpolationCycleError(path + [ref_key])
+            if ref_key in path:
+                continue
+            if ref_key in staged:
+                ref_value = staged[ref_key]
+            else:
+                try:
+                    ref_value = self._option(ref_key).value
+                except self.lookup_errors:
+                    continue
+            if self.interpolatorable(ref_value):
+                path.append(ref_key)
+                self._check_cycle(ref_value, ref_section, path, staged)
+                path.pop()
+
+    def interpolate(self, in_string, section, depth=0, memo=None):
         """
         Interpolator Engine:
 
@@ -240,18 +500,46 @@ class Interpolation(BaseInterpolation):
         :param in_string: the initial string to parse, if this is not a string, we will return it as it is with no
             processing.
         :param section: the string name of the section being processed.
+        :param dict memo: if passed, looked up keys are saved in this and re-used by later calls using the same memo.
         :return:  the final interpolated string.
         """
-        # int_field_map = MultiLevelDictManager(field_map, current_path, key_sep)
-
-        int_field_map = self.base_config
-        
         if not isinstance(in_string, str):
             return in_string
 
         if self.key not in in_string:
             return in_string
 
+        if not self._use_store:
+            return self._interpolate_nested(in_string, section, depth=depth, memo=memo)
+
+        accum = []
+        for part in self._parse(in_string, section):
+            if part.__class__ is str:
+                accum.append(part)
+                continue
+
+            matched, new_section = part
+            if memo is not None and matched in memo:
+                key_value = memo[matched]
+            else:
+                key_value = self._resolve_key(matched, new_section, [])[0]
+                if not isinstance(key_value, str):
+                    key_value = str(key_value)
+                if memo is not None:
+                    memo[matched] = key_value
+            accum.append(key_value)
+
+        return ''.join(accum)
+
+    def _interpolate_nested(self, in_string, section, depth=0, memo=None):
+        """
+        interpolates by looking up each reference in the base config, (used when the base config is not a
+        ConfigManager).
+        """
+        # int_field_map = MultiLevelDictManager(field_map, current_path, key_sep)
+
+        int_field_map = self.base_config
+
         rest = in_string
         accum = []
 
@@ -261,7 +549,8 @@ class Interpolation(BaseInterpolation):
         while rest:
             key_pos = rest.find(self.key)
             if key_pos < 0:
-                return
+                accum.append(rest)
+                break
 
             if key_pos >= 0:
                 accum.append(rest[:key_pos])
@@ -278,26 +567,37 @@ class Interpolation(BaseInterpolation):
                 if self.key_end not in rest:
                     raise InterpolationSyntaxError("bad interpolation variable reference %r" % rest)
 
-                dot_n, matched = self.xform.full_check(get_between(rest, self.key_start, self.key_end), section=section)
+                dot_n, key_section, key_option = self.xform.both_check(get_between(rest, self.key_start, self.key_end),
+                                                                       section=section)
+                if key_section is None or key_section is _UNSET:
+                    matched = key_option
+                else:
+                    matched = '{}.{}'.format(key_section, key_option)
                 if dot_n:
-                    new_section = self.xform.section()
+                    new_section = key_section
                 else:
                     new_section = section
 
-                if self.raise_on_lookup_error:
-                    key_value = int_field_map[matched]
+                if memo is not None and matched in memo:
+                    key_value = memo[matched]
                 else:
-                    try:
+                    if self.raise_on_lookup_error:
                         key_value = int_field_map[matched]
-                    except self.lookup_errors:
-                        key_value = self.replace_on_lookup_error
+                    else:
+                        try:
+                            key_value = int_field_map[matched]
+                        except self.lookup_errors:
+                            key_value = self.replace_on_lookup_error
+
+                    if self.key in key_value:
+                        depth += 1
+                        if depth > self.max_depth:
+                            raise InterpolationDepthError(in_string, self.max_depth, rest)
 
-                if self.key in key_value:
-                    depth += 1
-                    if depth > self.max_depth:
-                        raise InterpolationDepthError(in_string, self.max_depth, rest)
+                        key_value = self._interpolate_nested(key_value, section=new_section, depth=depth, memo=memo)
 
-                    key_value = self.interpolate(key_value, section=new_section, depth=depth)
+                    if memo is not None:
+                        memo[matched] = key_value
 
                 accum.append(key_value)
 
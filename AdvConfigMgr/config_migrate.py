@@ -3,7 +3,9 @@ __author__ = 'dstrohl'
 from AdvConfigMgr.config_exceptions import Error
 from AdvConfigMgr.utils import VersionRange, slugify, _UNSET, UnSet
 import copy
-from fnmatch import fnmatchcase
+import re
+from collections import deque
+from fnmatch import translate
 
 
 class ConfigMigrationError(Error):
@@ -13,6 +15,151 @@ class ConfigMigrationError(Error):
         super(ConfigMigrationError, self).__init__(msg)
 
 
+class MigrationPlan(object):
+    """
+    A compiled lookup of the actions in a migration.
+
+    Actions for exact option names are kept in a dictionary, and all of the glob actions are compiled into a single
+    regex, so looking up the action for an option does not depend on the number of actions.  If more than one action
+    matches an option, the one declared first is used.
+
+    :param actions: an ordered dictionary of {option_name_or_glob: action_dict}
+    """
+    _GLOB_CHARS = re.compile(r'[*?\[]')
+    # fnmatch.translate adds its own named groups (g0, g1, ...) for patterns with more than one '*' on python < 3.11.
+    _GROUP_PREFIX = '_acm_glob'
+
+    def __init__(self, actions):
+        self._exact = {}
+        self._globs = []
+        self._first_glob_index = None
+        self._glob_re = None
+
+        for index, (option_name, action) in enumerate(actions.items()):
+            if self._GLOB_CHARS.search(option_name):
+                if self._first_glob_index is None:
+                    self._first_glob_index = index
+                self._globs.append((index, action))
+            else:
+                self._exact[option_name] = (index, action)
+
+        if self._globs:
+            tmp_patterns = ['(?P<{}{}>{})'.format(self._GROUP_PREFIX, i, translate(action['option_name']))
+                            for i, (index, action) in enumerate(self._globs)]
+            self._glob_re = re.compile('|'.join(tmp_patterns))
+
+    def lookup(self, option_name):
+        """
+        :return: the action dictionary for the option, or None if no action matches.
+        """
+        tmp_exact = self._exact.get(option_name, None)
+
+        if self._glob_re is None or (tmp_exact is not None and tmp_exact[0] < self._first_glob_index):
+            return tmp_exact[1] if tmp_exact is not None else None
+
+        tmp_match = self._glob_re.match(option_name)
+        if tmp_match is None:
+            return tmp_exact[1] if tmp_exact is not None else None
+
+        # the outer group of the glob that matched closes last, so it is the last group.
+        tmp_index, tmp_action = self._globs[int(tmp_match.lastgroup[len(self._GROUP_PREFIX):])]
+        if tmp_exact is not None and tmp_exact[0] < tmp_index:
+            return tmp_exact[1]
+        return tmp_action
+
+    def __len__(self):
+        return len(self._exact) + len(self._globs)
+
+
+class MigrationChain(object):
+    """
+    The migrations in a chain composed into a single lookup of the actions to run on each option.
+
+    The first time an option name is seen, the plan of each migration is checked in turn (following renames) and the
+    actions that match are kept, so the next time the same option is migrated only the actions that apply to it are
+    run, instead of looking it up in every migration in the chain.
+
+    The built in actions always return the same option name, so the lookups can follow them.  After an action that
+    can return any name, (an action from a custom action class), the rest of the chain is looked up again using the
+    name it returns.
+
+    :param migration_manager: the :py:class:`ConfigMigrationManager` that the actions are run for.
+    :param migrations: the list of parsed migrations in the chain.
+    """
+    _SAME_NAME_ACTIONS = ('_pass', '_copy', '_interpolate')
+
+    def __init__(self, migration_manager, migrations):
+        self.migrations = migrations
+        self._hops = []
+        for m in migrations:
+            actions = m['action_class']
+            if actions is None:
+                actions = BaseMigrationActions
+            self._hops.append((m['plan'], actions(migration_manager), m['keep_only']))
+
+        # {(option name, hop index): (steps, keep, end index)}
+        self._steps = {}
+
+    @staticmethod
+    def _next_name(actions, option_name, option_args):
+        """
+        :return: the name of the option after the action is run, None if the action removes it, or _UNSET if it is
+            only known after the action is run.
+        """
+        tmp_action_name = option_args['action_name']
+        if getattr(type(actions), tmp_action_name) is not getattr(BaseMigrationActions, tmp_action_name, None):
+            return _UNSET
+
+        if tmp_action_name in MigrationChain._SAME_NAME_ACTIONS:
+            return option_name
+        if tmp_action_name == '_rename':
+            if isinstance(option_args['args'], dict):
+                return option_args['args']['new_option_name']
+            return option_args['args'][0]
+        if tmp_action_name == '_remove':
+            return None
+        return _UNSET
+
+    def steps(self, option_name, index=0):
+        """
+        :param str option_name: the name of the option when it reaches the migration at index.
+        :param int index: the index of the first migration to check.
+        :return: (steps, keep, end_index), steps is a list of (next index, action class, action args) for the actions
+            to run, keep is False if a keep_only migration drops the option after them, and end_index is where the
+            lookups stopped (before the end of the chain if the last action can return any name).
+        """
+        tmp_key = (option_name, index)
+        try:
+            return self._steps[tmp_key]
+        except KeyError:
+            pass
+
+        tmp_steps = []
+        tmp_keep = True
+        while index < len(self._hops):
+            plan, actions, keep_only = self._hops[index]
+            index += 1
+
+            option_args = plan.lookup(option_name)
+            if option_args is None:
+                if keep_only:
+                    tmp_keep = False
+                    break
+                continue
+
+            tmp_steps.append((index, actions, option_args))
+            option_name = self._next_name(actions, option_name, option_args)
+            if option_name is None or option_name is _UNSET:
+                break
+
+        tmp_ret = (tmp_steps, tmp_keep, index)
+        self._steps[tmp_key] = tmp_ret
+        return tmp_ret
+
+    def __len__(self):
+        return len(self._hops)
+
+
 class ConfigMigrationManager(object):
     def __init__(self, section, *migration_dictionaries):
         self.section = section
@@ -26,6 +173,20 @@ class ConfigMigrationManager(object):
         self.stored_version = _UNSET
         self.current_migration = None
 
+        # the selected migration for each (stored version, live version), and the migrations that apply to the live
+        # version, so that the version ranges are only checked the first time a stored version is seen.
+        self._migration_cache = {}
+        self._live_candidates = None
+        self._live_candidates_version = _UNSET
+        self.current_chain = None
+        self._current_plan = None
+
+        # the migrations that can follow each migration, (keyed by the id of the migration dict)
+        self._next_hops_cache = {}
+
+        # if set to a list, each action run is recorded in it as (action name, option name)
+        self.action_log = None
+
         for md in migration_dictionaries:
             if not isinstance(md, (list, tuple)):
                 md = [md]
@@ -41,63 +202,138 @@ class ConfigMigrationManager(object):
         """
         Will set the version manager to use based on the database version.  returns True if a version migration is
         found, False if no migration is found.
+
+        If no single migration goes from the stored version to the live version, the shortest chain of migrations that
+        does is used, (each migration's live_version is used as the stored version for the next one).
         """
         self.stored_version = version
-        self.current_migration = None
-        for m in self.migrations:
-            if self.stored_version is None:
-                if m['blank_stored_version'] and self.live_version in m['live_version_range']:
-                    self.current_migration = m
-                    return True
-            else:
-                if version in m['stored_version_range'] and self.live_version in m['live_version_range']:
-                    self.current_migration = m
-                    return True
-        return False
+
+        tmp_key = (None if version is None else str(version), str(self.live_version))
+        try:
+            self._current_plan = self._migration_cache[tmp_key]
+        except KeyError:
+            tmp_chain = self._find_chain(version)
+            if tmp_chain is not None:
+                tmp_chain = MigrationChain(self, tmp_chain)
+            self._current_plan = self._migration_cache[tmp_key] = tmp_chain
+
+        if self._current_plan is None:
+            self.current_chain = None
+            self.current_migration = None
+            return False
+
+        self.current_chain = self._current_plan.migrations
+        self.current_migration = self.current_chain[0]
+        return True
+
+    @staticmethod
+    def _stored_match(migration, version):
+        if version is None:
+            return migration['blank_stored_version']
+        return version in migration['stored_version_range']
+
+    def _find_chain(self, version):
+        """
+        returns the shortest list of migrations that go from the stored version to the live version, or None.
+        """
+        tmp_live = set(id(m) for m in self._migrations_for_live_version())
+        tmp_starts = [m for m in self.migrations if self._stored_match(m, version)]
+
+        # a single migration that matches both versions is always used first (in the order declared).
+        for m in tmp_starts:
+            if id(m) in tmp_live:
+                return [m]
+
+        tmp_seen = set(id(m) for m in tmp_starts)
+        tmp_queue = deque([m] for m in tmp_starts)
+        while tmp_queue:
+            tmp_path = tmp_queue.popleft()
+            for m in self._next_hops(tmp_path[-1]):
+                if id(m) in tmp_seen:
+                    continue
+                if id(m) in tmp_live:
+                    return tmp_path + [m]
+                tmp_seen.add(id(m))
+                tmp_queue.append(tmp_path + [m])
+        return None
+
+    def _next_hops(self, migration):
+        try:
+            return self._next_hops_cache[id(migration)]
+        except KeyError:
+            pass
+
+        tmp_target = migration['target_version']
+        if tmp_target is None:
+            tmp_ret = []
+        else:
+            tmp_ret = [m for m in self.migrations if m is not migration and tmp_target in m['stored_version_range']]
+        self._next_hops_cache[id(migration)] = tmp_ret
+        return tmp_ret
+
+    def _migrations_for_live_version(self):
+        if self._live_candidates_version != self.live_version:
+            self._live_candidates = [m for m in self.migrations if self.live_version in m['live_version_range']]
+            self._live_candidates_version = self.live_version
+        return self._live_candidates
 
     @property
     def options_to_remove(self):
-        tmp_ret = copy.copy(self._options_to_remove)
-        self._options_to_remove = None
+        tmp_ret = self._options_to_remove
+        self._options_to_remove = []
         return tmp_ret
 
     def migrate_section(self, version, section_dict):
+        """
+        migrates the options read from storage to the live version.
+
+        Each option is passed through the whole chain before the next option is processed, using the actions composed
+        for it by :py:class:`MigrationChain`, so a multi-hop migration still only makes one pass over the section.
+        """
         if not self.set_migration(version):
             return section_dict
 
-        option_list = self.current_migration['actions']
-        actions = self.current_migration['action_class']
-        keep_only = self.current_migration['keep_only']
-
-        if actions is None:
-            actions = BaseMigrationActions
-        actions = actions(self)
-
         tmp_dict = {}
+        tmp_added = {}
         for option, value in section_dict.items():
-            new_option = None
-            new_value = None
-            match = False
-            for option_name, option_args in option_list.items():
-                if fnmatchcase(option_name, option):
-                    match = True
-                    action = getattr(actions, option_args['action_name'])
-                    if isinstance(option_args['args'], dict):
-                        new_option, new_value = action(value, option_name, **option_args['args'])
-                    elif isinstance(option_args['args'], (list, tuple)):
-                        new_option, new_value = action(value, option_name, *option_args['args'])
-                    break
+            self._migrate_option(0, option, value, tmp_dict, tmp_added)
 
-            if not keep_only and not match:
-                new_option = option
-                new_value = value
+        # options added by actions (copies) replace any options with the same name.
+        tmp_dict.update(tmp_added)
+        self._options_to_add = {}
 
-            if new_option is not None:
-                tmp_dict[new_option] = new_value
+        return tmp_dict
 
-        tmp_dict.update(self._options_to_add)
+    def _migrate_option(self, index, option, value, tmp_dict, tmp_added):
+        """
+        runs a single option through the migrations in the chain starting at index, any options added by an action are
+        run through the rest of the chain as well.
+        """
+        chain = self._current_plan
+        while index < len(chain):
+            steps, keep, end_index = chain.steps(option, index)
 
-        return tmp_dict
+            for index, actions, option_args in steps:
+                self._options_to_add = {}
+                action = getattr(actions, option_args['action_name'])
+                if self.action_log is not None:
+                    self.action_log.append((option_args['action_name'][1:], option))
+                if isinstance(option_args['args'], dict):
+                    option, value = action(value, option, **option_args['args'])
+                else:
+                    option, value = action(value, option, *option_args['args'])
+
+                for new_option, new_value in self._options_to_add.items():
+                    self._migrate_option(index, new_option, new_value, tmp_added, tmp_added)
+
+                if option is None:
+                    return
+
+            if not keep:
+                return
+            index = end_index
+
+        tmp_dict[option] = value
 
     def _xf(self, option_name):
         return self.section._xf(option_name, glob=True)
@@ -126,6 +362,10 @@ class ConfigMigrationManager(object):
                                                      max_ver=migration_dict.get('live_version_max', None)),
                   'action_class': migration_dict.get('action_class', BaseMigrationActions),
                   'blank_stored_version': blank_stored_version,
+                  'target_version': migration_dict.get('live_version',
+                                                       migration_dict.get('live_version_max',
+                                                                          migration_dict.get('live_version_min',
+                                                                                             None))),
                   'actions': {},
                   'keep_only': migration_dict.get('keep_only', False)}
 
@@ -156,6 +396,8 @@ class ConfigMigrationManager(object):
 
             tmp_md['actions'][tmp_action['option_name']] = tmp_action
 
+        tmp_md['plan'] = MigrationPlan(tmp_md['actions'])
+
         return tmp_md
 
 
@@ -201,7 +443,7 @@ class BaseMigrationActions(object):
         """
         new_value = copy.copy(value)
         if interpolation_str is not None:
-            new_option_name, new_value = self._interpolate(new_option_name, new_value, interpolation_str)
+            new_option_name, new_value = self._interpolate(new_value, new_option_name, interpolation_str)
 
         self._new(new_value, new_option_name)
         return option_name, value
@@ -213,7 +455,7 @@ class BaseMigrationActions(object):
         """
         self._remove(value, option_name)
         if interpolation_str is not None:
-            return self._interpolate(new_option_name, value, interpolation_str)
+            return self._interpolate(value, new_option_name, interpolation_str)
         else:
             return new_option_name, value
 
@@ -223,7 +465,7 @@ class BaseMigrationActions(object):
         :return: The existing option, value
         """
         if interpolation_str is not None:
-            return self._interpolate(option_name, value, interpolation_str)
+            return self._interpolate(value, option_name, interpolation_str)
         else:
             return option_name, value
 
@@ -0,0 +1,253 @@
+__author__ = 'dstrohl'
+
+"""
+Offline migration of a tree of ini files to the live version.
+
+Services normally migrate their stored configuration when it is read at startup, this tool does the same migration
+ahead of time (for example at deploy time) for a whole directory tree of files, so the services start with files that
+are already at the live version.
+
+The live configuration comes from a factory, a callable that takes no arguments and returns a :py:class:`ConfigManager`
+with the live sections, versions and migrations defined (the same setup the service uses)::
+
+    # myapp/config.py
+    def make_config():
+        config = ConfigManager(migrations=MIGRATIONS, storage_managers=ConfigFileStorage)
+        config.add_section('database', version='2.0', options=DATABASE_OPTIONS)
+        return config
+
+    adv-config-migrate myapp.config:make_config /etc/myapp --workers 8
+    python -m AdvConfigMgr.config_migrate_tool myapp.config:make_config /etc/myapp --dry-run
+
+The files are migrated in parallel in a process pool, each file gets a new manager from the factory.  Each migrated file
+is written to a temporary file in the same directory and then moved over the original, so a file is either completely
+migrated or left as it was.  Files that are already at the live version are not re-written.
+
+.. note:: files are written by the file storage manager, so comments and options that are only set to their default
+    values are not kept.  Files with sections that the factory does not define are not migrated unless
+    ``--drop-unknown`` is passed.
+"""
+
+import argparse
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from functools import partial
+
+from AdvConfigMgr.config_storage import ConfigFileStorage
+
+__all__ = ['MigrationResult', 'load_factory', 'find_config_files', 'migrate_file', 'migrate_files', 'main']
+
+_TEMP_SUFFIX = '.migrating'
+
+_factory_cache = {}
+
+
+class MigrationResult(object):
+    """
+    The outcome of migrating one file.
+
+    :param str filename: the file migrated.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.status = 'current'  #: 'migrated', 'current' (nothing to do) or 'error'
+        self.versions = {}  #: {section: (stored version, live version)} for the sections migrated
+        self.actions = Counter()  #: the number of times each action (rename, remove, copy, etc) was run
+        self.error = None
+
+    def __repr__(self):
+        return 'MigrationResult [{}: {}]'.format(self.filename, self.status)
+
+
+def load_factory(factory):
+    """
+    :param str factory: 'module:callable', the callable must return a configured ConfigManager.
+    :return: the callable.
+    """
+    try:
+        return _factory_cache[factory]
+    except KeyError:
+        pass
+
+    module_name, sep, attr_name = factory.partition(':')
+    if not sep or not module_name or not attr_name:
+        raise AttributeError('factory must be in the form "module:callable", not "{}"'.format(factory))
+
+    tmp_ret = importlib.import_module(module_name)
+    for attr in attr_name.split('.'):
+        tmp_ret = getattr(tmp_ret, attr)
+
+    _factory_cache[factory] = tmp_ret
+    return tmp_ret
+
+
+def find_config_files(paths, pattern='*.ini'):
+    """
+    :param list paths: files and directories, directories are searched recursively.
+    :param str pattern: the filename pattern to match in the directories.
+    :return: a sorted list of the files found.
+    """
+    tmp_ret = []
+    for path in paths:
+        if os.path.isfile(path):
+            tmp_ret.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if fnmatch(name, pattern) and not name.endswith(_TEMP_SUFFIX):
+                    tmp_ret.append(os.path.join(root, name))
+    return tmp_ret
+
+
+def _write_atomic(manager, filename, encoding):
+    tmp_dir, tmp_name = os.path.split(filename)
+    tmp_fd, tmp_filename = tempfile.mkstemp(dir=tmp_dir or '.', prefix='.' + tmp_name, suffix=_TEMP_SUFFIX)
+    try:
+        with os.fdopen(tmp_fd, 'w', encoding=encoding) as f:
+            manager.write(storage_names='file', file=f)
+        shutil.copymode(filename, tmp_filename)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+
+def migrate_file(factory, filename, dry_run=False, drop_unknown=False, encoding=None):
+    """
+    migrates a single file, errors are returned in the result instead of being raised.
+
+    :param str factory: 'module:callable' for the ConfigManager factory.
+    :param str filename: the file to migrate.
+    :param bool dry_run: if True, the file is not written.
+    :param bool drop_unknown: if True, sections that are not defined in the manager are dropped from the file, if
+        False the file is not migrated.
+    :param str encoding: the file encoding.
+    :rtype: MigrationResult
+    """
+    tmp_result = MigrationResult(filename)
+    try:
+        manager = load_factory(factory)()
+        if 'file' not in manager.storage:
+            manager.storage.register_storage(ConfigFileStorage)
+        storage = manager.storage['file']
+
+        with open(filename, encoding=encoding) as f:
+            tmp_lines = f.read().splitlines()
+
+        if not manager._no_sections and not drop_unknown:
+            tmp_sections = manager.sections
+            tmp_unknown = [s for s in storage._parse_list(tmp_lines, filename)
+                           if manager._xf(s)[0] not in tmp_sections]
+            if tmp_unknown:
+                raise AttributeError('sections not defined in the live configuration: {}'.format(tmp_unknown))
+
+        tmp_migrations = []
+        for section in manager:
+            if section._migrations is not None:
+                section._migrations.action_log = []
+                tmp_migrations.append(section)
+
+        manager.read(storage_names='file', data=tmp_lines)
+
+        for section in tmp_migrations:
+            if section._migrations.current_chain is None:
+                continue
+            tmp_result.versions[section.name] = (str(section._migrations.stored_version), str(section.version))
+            tmp_result.actions.update(a for a, o in section._migrations.action_log)
+            # the stored version was not read (the version option can't be changed), so it is set to the live version
+            # here to make sure it is written.
+            section.item(section.version_option_name).from_read(str(section.version))
+
+        if tmp_result.versions:
+            tmp_result.status = 'migrated'
+            if not dry_run:
+                _write_atomic(manager, filename, encoding)
+
+    except Exception as err:
+        tmp_result.status = 'error'
+        tmp_result.error = '{}: {}'.format(err.__class__.__name__, err)
+
+    return tmp_result
+
+
+def migrate_files(factory, filenames, workers=None, chunksize=16, **kwargs):
+    """
+    migrates the files in a process pool.
+
+    :param str factory: 'module:callable' for the ConfigManager factory.
+    :param list filenames: the files to migrate.
+    :param int workers: the number of processes, None uses the number of cpus, 1 migrates the files in this process.
+    :param int chunksize: the number of files sent to a worker at a time.
+    :param kwargs: passed to :py:func:`migrate_file`
+    :return: an iterator of :py:class:`MigrationResult` in the same order as the files.
+    """
+    tmp_func = partial(migrate_file, factory, **kwargs)
+    if workers == 1:
+        for filename in filenames:
+            yield tmp_func(filename)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for tmp_result in executor.map(tmp_func, filenames, chunksize=chunksize):
+            yield tmp_result
+
+
+def _format_result(result):
+    tmp_line = '{:<9} {}'.format(result.status, result.filename)
+    if result.error is not None:
+        return tmp_line + '  ' + result.error
+    if result.versions:
+        tmp_line += '  ' + ', '.join('{} {} -> {}'.format(s, *v) for s, v in sorted(result.versions.items()))
+    if result.actions:
+        tmp_line += '  (' + ', '.join('{}: {}'.format(a, c) for a, c in sorted(result.actions.items())) + ')'
+    return tmp_line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='adv-config-migrate',
+                                     description='Migrate a tree of ini files to the live configuration version')
+    parser.add_argument('factory', help='"module:callable" returning the live ConfigManager')
+    parser.add_argument('paths', nargs='+', help='files or directories to migrate')
+    parser.add_argument('--pattern', default='*.ini', help='filename pattern to match in directories')
+    parser.add_argument('--workers', type=int, default=None, help='number of processes (default: number of cpus)')
+    parser.add_argument('--encoding', default=None)
+    parser.add_argument('--dry-run', action='store_true', help='report what would be migrated without writing')
+    parser.add_argument('--drop-unknown', action='store_true',
+                        help='drop sections not defined by the factory instead of skipping the file')
+    parser.add_argument('--quiet', action='store_true', help='only print files that were migrated or failed')
+    args = parser.parse_args(argv)
+
+    # the factory module is usually in the current directory when run from the console script.
+    if '' not in sys.path and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    tmp_files = find_config_files(args.paths, pattern=args.pattern)
+    tmp_totals = Counter()
+    tmp_actions = Counter()
+
+    for tmp_result in migrate_files(args.factory, tmp_files, workers=args.workers, dry_run=args.dry_run,
+                                    drop_unknown=args.drop_unknown, encoding=args.encoding):
+        tmp_totals[tmp_result.status] += 1
+        tmp_actions.update(tmp_result.actions)
+        if not args.quiet or tmp_result.status != 'current':
+            print(_format_result(tmp_result))
+
+    print('{} files: {} migrated, {} current, {} errors{}'.format(
+        len(tmp_files), tmp_totals['migrated'], tmp_totals['current'], tmp_totals['error'],
+        ' (dry run)' if args.dry_run else ''))
+    if tmp_actions:
+        print('actions: ' + ', '.join('{}: {}'.format(a, c) for a, c in sorted(tmp_actions.items())))
+
+    return 1 if tmp_totals['error'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,452 @@
+__author__ = 'dstrohl'
+
+"""
+Shares the resolved configuration of a :py:class:`ConfigManager` between processes using a shared memory block.
+
+The parent process creates the block and publishes into it, child processes attach a read only view::
+
+    # parent
+    config.read()
+    publisher = config.share('my_app_config')
+
+    # child (a forked or spawned worker of the parent)
+    config = SharedConfigView('my_app_config')
+    config['section.option']
+
+The block has a small header with a version counter, an index of the options, and each value encoded separately.  The
+views only decode the index when the counter changes, and each value when it is first looked up, so the workers do not
+each keep a copy of the whole configuration.  Any later publish (the manager re-publishes after every change) is picked
+up on the next lookup.  The publisher keeps the encoded values and only encodes the options that have changed again.
+"""
+
+import pickle
+import struct
+
+from AdvConfigMgr.config_exceptions import Error, NoSectionError, NoOptionError, ForbiddenActionError, ip
+from AdvConfigMgr.config_transform import Xform
+from AdvConfigMgr.utils.unset import _UNSET
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    shared_memory = None
+
+__all__ = ['SharedConfigPublisher', 'SharedConfigView', 'SharedConfigError']
+
+
+# magic string, sequence number (odd while writing), payload length
+_HEADER = struct.Struct('<8sQQ')
+_MAGIC = b'ACMSHM02'
+# the payload starts with the length of the index, then the index, then the values.
+_INDEX_LEN = struct.Struct('<Q')
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+_MIN_SIZE = 64 * 1024
+
+
+class SharedConfigError(Error):
+    """Raised when the shared configuration block cannot be created, written or read."""
+
+
+def _check_shared_memory():
+    if shared_memory is None:
+        raise SharedConfigError('multiprocessing.shared_memory is not available (requires python 3.8 or later)')
+
+
+class SharedConfigPublisher(object):
+    """
+    Writes the resolved (interpolated) values of a config manager into a shared memory block.
+
+    :param ConfigManager manager: the manager to publish.
+    :param str name: the name of the shared memory block, if None a name will be generated, (use
+        :py:attr:`SharedConfigPublisher.name` to get it).
+    :param int size: the size of the block in bytes, if None this will be twice the size of the first publish (with a
+        minimum of 64k).  The block cannot grow, so set this if the config will get much larger after the first publish.
+    """
+
+    def __init__(self, manager, name=None, size=None):
+        _check_shared_memory()
+        self.manager = manager
+        self._name = name
+        self._size = size
+        self._shm = None
+        self._seq = 0
+        # {(section name, option name): (option generation, interpolated, value, encoded value)}
+        self._encoded = {}
+        self.last_error = None
+
+    @property
+    def name(self):
+        if self._shm is None:
+            return self._name
+        return self._shm.name
+
+    @property
+    def version(self):
+        return self._seq // 2
+
+    def _encode(self, section, option):
+        """
+        :return: the encoded value of the option, (re-used from the last publish if the option has not changed)
+        """
+        tmp_key = (section.name, option.name)
+        tmp_entry = self._encoded.get(tmp_key)
+        if tmp_entry is not None and tmp_entry[0] == option._generation and not tmp_entry[1]:
+            return tmp_key, tmp_entry
+
+        tmp_raw = option.value
+        tmp_value = option.get()
+        # interpolated values can change when other options change, so these are always checked.
+        tmp_interpolated = isinstance(tmp_raw, str) and tmp_value != tmp_raw
+
+        if tmp_entry is not None and type(tmp_entry[2]) is type(tmp_value) and tmp_entry[2] == tmp_value:
+            tmp_data = tmp_entry[3]
+        else:
+            tmp_data = pickle.dumps(tmp_value, protocol=_PICKLE_PROTOCOL)
+        return tmp_key, (option._generation, tmp_interpolated, tmp_value, tmp_data)
+
+    def _snapshot(self):
+        """
+        :return: the payload, (the index length, the index and the encoded values)
+        """
+        tmp_encoded = {}
+        tmp_sections = {}
+        tmp_values = []
+        tmp_offset = 0
+        for section in self.manager:
+            tmp_options = {}
+            for option in section:
+                if not option.is_empty:
+                    tmp_key, tmp_entry = self._encode(section, option)
+                    tmp_encoded[tmp_key] = tmp_entry
+                    tmp_data = tmp_entry[3]
+                    tmp_options[option.name] = (tmp_offset, len(tmp_data))
+                    tmp_values.append(tmp_data)
+                    tmp_offset += len(tmp_data)
+            tmp_sections[section.name] = tmp_options
+        self._encoded = tmp_encoded
+
+        tmp_index = pickle.dumps({'sep': self.manager._section_option_sep,
+                                  'no_sections': self.manager._no_sections,
+                                  'no_section_name': self.manager._no_section_section_name,
+                                  'sections': tmp_sections}, protocol=_PICKLE_PROTOCOL)
+
+        return b''.join([_INDEX_LEN.pack(len(tmp_index)), tmp_index] + tmp_values)
+
+    def _on_change(self, options):
+        """
+        the change listener registered by :py:meth:`ConfigManager.share`, called once for each set of changes.  The
+        change has already been made, so errors are logged (and kept in last_error) instead of raised.
+        """
+        if self._shm is None:
+            return
+        try:
+            self.publish()
+        except Exception as err:
+            self.last_error = err
+            ip.error('publishing shared config [', self.name, '] failed: ', err)
+
+    def _create(self, payload_size):
+        if self._size is None:
+            self._size = max(_MIN_SIZE, (payload_size + _HEADER.size) * 2)
+        ip.debug('creating shared config block [', self._name, '] size: ', self._size)
+        self._shm = shared_memory.SharedMemory(name=self._name, create=True, size=self._size)
+        _HEADER.pack_into(self._shm.buf, 0, _MAGIC, 0, 0)
+
+    def publish(self):
+        """
+        Serializes the current resolved state of the manager into the block and increments the version counter.
+
+        :return: the new version number.
+        """
+        payload = self._snapshot()
+
+        if self._shm is None:
+            self._create(len(payload))
+
+        if len(payload) + _HEADER.size > self._shm.size:
+            msg = 'Config needs {} bytes but shared block [{}] is only {} bytes'.format(len(payload) + _HEADER.size,
+                                                                                         self.name, self._shm.size)
+            raise SharedConfigError(msg)
+
+        buf = self._shm.buf
+        # an odd sequence number tells the readers that a write is in progress.
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, _MAGIC, self._seq, len(payload))
+        buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, _MAGIC, self._seq, len(payload))
+
+        ip.debug('published shared config [', self.name, '] version: ', self.version)
+        return self.version
+
+    def close(self, unlink=True):
+        """
+        closes the block, if unlink is True the block is also removed from the system (views that are already attached
+        will keep working with the last version).
+        """
+        if self._shm is not None:
+            self._shm.close()
+            if unlink:
+                self._shm.unlink()
+            self._shm = None
+
+    def __repr__(self):
+        return 'SharedConfigPublisher [{}] version: {}'.format(self.name, self.version)
+
+
+class SharedConfigView(object):
+    """
+    A read only view of a configuration published by :py:class:`SharedConfigPublisher`.
+
+    This supports the same lookups as the :py:class:`ConfigManager`, (``view['section.option']``,
+    ``view['section']['option']``, ``in``, ``len``, and iterating over the sections) but any attempt to change the
+    configuration will raise a :py:class:`ForbiddenActionError`.
+
+    :param str name: the name of the shared memory block.
+    :param int max_retries: the number of times to retry a read if the publisher is writing at the same time.
+    """
+    _DEFAULT_XFORM = Xform
+
+    def __init__(self, name, max_retries=100):
+        _check_shared_memory()
+        self._name = name
+        self._max_retries = max_retries
+        self._shm = self._attach(name)
+        self._version = -1
+        self._seq = 0
+        # {section: {option: (offset, length)}} the location of each value in the block.
+        self._sections = {}
+        self._values_start = 0
+        # the values decoded from the current version, {(section, option): value}
+        self._values = {}
+        self._no_sections = False
+        self._no_section_name = None
+        self._xform = None
+        self.refresh()
+
+    @staticmethod
+    def _attach(name):
+        try:
+            return shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before python 3.13 the block is always registered with the resource tracker, child processes share the
+            # tracker of the parent so this is safe for forked or spawned workers.
+            return shared_memory.SharedMemory(name=name)
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def version(self):
+        return self._version
+
+    def refresh(self):
+        """
+        Checks the version counter in the block and reloads the data if it has changed.
+
+        :return: True if new data was loaded.
+        """
+        buf = self._shm.buf
+        for i in range(self._max_retries):
+            magic, seq, length = _HEADER.unpack_from(buf, 0)
+            if magic != _MAGIC:
+                raise SharedConfigError('Shared block [%s] is not a shared config block' % self._name)
+            if seq & 1:
+                continue
+            if seq // 2 == self._version:
+                return False
+            if seq == 0:
+                raise SharedConfigError('Shared block [%s] has not been published to yet' % self._name)
+
+            tmp_index_len = _INDEX_LEN.unpack_from(buf, _HEADER.size)[0]
+            tmp_index_start = _HEADER.size + _INDEX_LEN.size
+            tmp_index = bytes(buf[tmp_index_start:tmp_index_start + tmp_index_len])
+
+            if _HEADER.unpack_from(buf, 0)[1] != seq:
+                continue
+
+            self._load(pickle.loads(tmp_index), seq, tmp_index_start + tmp_index_len)
+            return True
+
+        raise SharedConfigError('Could not get a consistent read of shared block [%s]' % self._name)
+
+    def _load(self, data, seq, values_start):
+        if self._xform is None:
+            self._xform = self._DEFAULT_XFORM(data['sep'])
+        self._sections = data['sections']
+        self._no_sections = data['no_sections']
+        self._no_section_name = data['no_section_name']
+        self._values_start = values_start
+        self._values = {}
+        self._seq = seq
+        self._version = seq // 2
+        ip.debug('loaded shared config [', self._name, '] version: ', self._version)
+
+    def _value(self, section, option):
+        """
+        decodes the value of an option from the block, (raises a KeyError if the option is not there)
+        """
+        buf = self._shm.buf
+        for i in range(self._max_retries):
+            self.refresh()
+            tmp_key = (section, option)
+            try:
+                return self._values[tmp_key]
+            except KeyError:
+                pass
+
+            tmp_offset, tmp_length = self._sections[section][option]
+            tmp_start = self._values_start + tmp_offset
+            tmp_data = bytes(buf[tmp_start:tmp_start + tmp_length])
+
+            if _HEADER.unpack_from(buf, 0)[1] != self._seq:
+                continue
+
+            tmp_value = pickle.loads(tmp_data)
+            self._values[tmp_key] = tmp_value
+            return tmp_value
+
+        raise SharedConfigError('Could not get a consistent read of shared block [%s]' % self._name)
+
+    def _xf(self, key):
+        return self._xform.both(key, option_or_section='section')
+
+    def get(self, key, fallback=_UNSET):
+        """
+        gets the value of an option using dot notation, ('section.option').
+
+        :param str key: the option to get.
+        :param fallback: a value to return if the option is not found.
+        """
+        try:
+            return self[key]
+        except (NoSectionError, NoOptionError):
+            if fallback is _UNSET:
+                raise
+            return fallback
+
+    @property
+    def sections(self):
+        self.refresh()
+        return list(self._sections)
+
+    def close(self):
+        self._shm.close()
+
+    def __getitem__(self, key):
+        self.refresh()
+
+        if self._no_sections:
+            return SharedSectionView(self, self._no_section_name)[key]
+
+        section, option = self._xf(key)
+
+        if section not in self._sections:
+            raise NoSectionError(section=section)
+
+        if option is _UNSET:
+            return SharedSectionView(self, section)
+        return SharedSectionView(self, section)[option]
+
+    def __contains__(self, key):
+        self.refresh()
+
+        if self._no_sections:
+            return key in SharedSectionView(self, self._no_section_name)
+
+        section, option = self._xf(key)
+        if option is _UNSET:
+            return section in self._sections
+        try:
+            return option in self._sections[section]
+        except KeyError:
+            raise NoSectionError(section=section)
+
+    def __setitem__(self, key, value):
+        raise ForbiddenActionError('shared configuration views are read-only, cannot set [%s]' % key)
+
+    def __delitem__(self, key):
+        raise ForbiddenActionError('shared configuration views are read-only, cannot delete [%s]' % key)
+
+    def __len__(self):
+        self.refresh()
+        if self._no_sections:
+            return len(self._sections[self._no_section_name])
+        return len(self._sections)
+
+    def __iter__(self):
+        self.refresh()
+        if self._no_sections:
+            for o in self._sections[self._no_section_name]:
+                yield o
+        else:
+            for s in self._sections:
+                yield SharedSectionView(self, s)
+
+    def __repr__(self):
+        return 'SharedConfigView [{}] version: {}'.format(self._name, self._version)
+
+
+class SharedSectionView(object):
+    """
+    A read only section within a :py:class:`SharedConfigView`.
+    """
+
+    def __init__(self, view, name):
+        self._view = view
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def _options(self):
+        return self._view._sections[self._name]
+
+    def _xf(self, option):
+        return self._view._xform.both(option, option_or_section='option', section=self._name)
+
+    def get(self, option, fallback=_UNSET):
+        section, option = self._xf(option)
+
+        if section is not _UNSET and section != self._name:
+            return self._view.get('{}.{}'.format(section, option), fallback=fallback)
+
+        try:
+            return self._view._value(self._name, option)
+        except KeyError:
+            if fallback is _UNSET:
+                raise NoOptionError(option, self._name)
+            return fallback
+
+    def items(self):
+        self._view.refresh()
+        return [(o, self._view._value(self._name, o)) for o in list(self._options)]
+
+    @property
+    def options_list(self):
+        return list(self._options)
+
+    def __getitem__(self, option):
+        return self.get(option)
+
+    def __setitem__(self, option, value):
+        raise ForbiddenActionError('shared configuration views are read-only, cannot set [%s]' % option)
+
+    def __contains__(self, option):
+        section, option = self._xf(option)
+        if section is not _UNSET and section != self._name:
+            return '{}.{}'.format(section, option) in self._view
+        return option in self._options
+
+    def __len__(self):
+        return len(self._options)
+
+    def __iter__(self):
+        for o in self._options:
+            yield o
+
+    def __repr__(self):
+        return 'SharedSectionView {}, {} options'.format(self._name, len(self))
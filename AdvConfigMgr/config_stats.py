@@ -0,0 +1,250 @@
+__author__ = 'dstrohl'
+
+"""
+Optional instrumentation for the configuration manager.
+
+When stats are enabled on a :py:class:`ConfigManager` (using :py:meth:`ConfigManager.enable_stats`) the methods that
+are timed are wrapped on each instance, so nothing is wrapped, counted or timed while the stats are disabled.
+"""
+
+import time
+
+from AdvConfigMgr.config_types import _from_string_cache
+from AdvConfigMgr.utils.clicker_counter import Clicker
+
+__all__ = ['ConfigStats']
+
+
+class ConfigStats(object):
+    """
+    Collects call counts, cumulative time and cache hit ratios.
+
+    :param hook: an optional callable that is called after each timed call with the key of the call (for example
+        'option.get') and the elapsed time in seconds.
+    :param timer: the timer function used, defaults to :py:func:`time.perf_counter`
+    """
+
+    # (key, method name) of the methods to be timed on each type of object.  option._set is timed instead of
+    # option.set so that values loaded from storage are counted as well.
+    _OPTION_METHODS = (('option.get', 'get'), ('option.set', '_set'))
+    _DATATYPE_METHODS = (('datatype.validated', 'validated'), )
+    _INTERPOLATION_METHODS = (('interpolation.interpolate', 'interpolate'), )
+    _XFORM_METHODS = (('xform.lookup', 'both_check'), )
+    _MIGRATION_METHODS = (('migration.migrate_section', 'migrate_section'), )
+    _STORAGE_METHODS = (('storage.{}.read', 'read'), ('storage.{}.write', 'write'))
+
+    def __init__(self, hook=None, timer=time.perf_counter):
+        self.hook = hook
+        self._timer = timer
+        self._counts = Clicker()
+        self._times = {}
+        self._caches = {}
+
+    # *******************************************************************************************************
+    # ****  Recording
+    # *******************************************************************************************************
+
+    def record(self, key, elapsed):
+        """
+        records a single timed call.
+
+        :param str key: the name of the call.
+        :param float elapsed: the time the call took in seconds.
+        """
+        self._counts(key)
+        self._times[key] = self._times.get(key, 0.0) + elapsed
+        if self.hook is not None:
+            self.hook(key, elapsed)
+
+    def cache_hit(self, name):
+        self._caches.setdefault(name, [0, 0])[0] += 1
+
+    def cache_miss(self, name):
+        self._caches.setdefault(name, [0, 0])[1] += 1
+
+    def reset(self):
+        self._counts = Clicker()
+        self._times = {}
+        self._caches = {}
+
+    def report(self):
+        """
+        :return: a dictionary of the stats collected::
+
+            {'calls': {'option.get': {'count': 10, 'time': 0.001, 'avg': 0.0001}, ...},
+             'caches': {'xform.option': {'hits': 9, 'misses': 1, 'ratio': 0.9}, ...}}
+        """
+        tmp_calls = {}
+        for key, total in self._times.items():
+            tmp_count = self._counts[key].get
+            tmp_calls[key] = {'count': tmp_count, 'time': total, 'avg': total / tmp_count if tmp_count else 0.0}
+
+        tmp_caches = {}
+        for name, (hits, misses) in self._caches.items():
+            tmp_total = hits + misses
+            tmp_caches[name] = {'hits': hits, 'misses': misses, 'ratio': hits / tmp_total if tmp_total else 0.0}
+
+        return {'calls': tmp_calls, 'caches': tmp_caches}
+
+    # *******************************************************************************************************
+    # ****  Instrumenting objects
+    # *******************************************************************************************************
+
+    def instrument(self, obj, method_name, key):
+        """
+        replaces the method on the object instance (not the class) with one that times the calls.
+        """
+        method = getattr(obj, method_name)
+        if getattr(method, '_stats_wrapped', False):
+            return
+
+        timer = self._timer
+        record = self.record
+
+        def timed(*args, **kwargs):
+            start = timer()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(key, timer() - start)
+
+        timed._stats_wrapped = True
+        setattr(obj, method_name, timed)
+
+    def instrument_cache(self, obj, method_name, name, cache_lookup):
+        """
+        replaces the method on the object instance with one that counts cache hits and misses.
+
+        :param cache_lookup: a callable that is passed the args and kwargs of the call, and returns True if the call
+            will be answered from the cache.
+        """
+        method = getattr(obj, method_name)
+        if getattr(method, '_stats_wrapped', False):
+            return
+
+        hit = self.cache_hit
+        miss = self.cache_miss
+
+        def counted(*args, **kwargs):
+            if cache_lookup(args, kwargs):
+                hit(name)
+            else:
+                miss(name)
+            return method(*args, **kwargs)
+
+        counted._stats_wrapped = True
+        setattr(obj, method_name, counted)
+
+    @staticmethod
+    def uninstrument(obj, method_name):
+        method = obj.__dict__.get(method_name, None)
+        if method is not None and getattr(method, '_stats_wrapped', False):
+            delattr(obj, method_name)
+
+    def _instrument_all(self, obj, methods, key_arg=None):
+        for key, method_name in methods:
+            if key_arg is not None:
+                key = key.format(key_arg)
+            self.instrument(obj, method_name, key)
+
+    def _uninstrument_all(self, obj, methods):
+        for key, method_name in methods:
+            self.uninstrument(obj, method_name)
+
+    def instrument_datatype(self, datatype):
+        self._instrument_all(datatype, self._DATATYPE_METHODS)
+
+        if datatype._cache_from_string:
+            def from_string_cached(args, kwargs):
+                try:
+                    return (datatype.__class__, args[0]) in _from_string_cache
+                except TypeError:
+                    return False
+
+            self.instrument_cache(datatype, 'from_string', 'datatype.from_string', from_string_cached)
+
+    def instrument_option(self, option):
+        self._instrument_all(option, self._OPTION_METHODS)
+        self.instrument_datatype(option._datatype_manager)
+
+    def instrument_migrations(self, migrations):
+        self._instrument_all(migrations, self._MIGRATION_METHODS)
+
+        def chain_cached(args, kwargs):
+            tmp_version = args[0] if args else kwargs.get('version')
+            tmp_key = (None if tmp_version is None else str(tmp_version), str(migrations.live_version))
+            return tmp_key in migrations._migration_cache
+
+        self.instrument_cache(migrations, 'set_migration', 'migration.chain', chain_cached)
+
+    def instrument_section(self, section):
+        if section._migrations is not None:
+            self.instrument_migrations(section._migrations)
+        for option in section:
+            self.instrument_option(option)
+
+    def instrument_interpolator(self, interpolator):
+        self._instrument_all(interpolator, self._INTERPOLATION_METHODS)
+
+        if getattr(interpolator, '_use_store', False):
+            def parsed(args, kwargs):
+                return (args[1], args[0]) in interpolator._parsed
+
+            def resolved(args, kwargs):
+                return interpolator._stored(args[0]) is not None
+
+            self.instrument_cache(interpolator, '_parse', 'interpolation.parsed', parsed)
+            self.instrument_cache(interpolator, '_resolve_key', 'interpolation.resolved', resolved)
+
+    def instrument_storage(self, storage):
+        self._instrument_all(storage, self._STORAGE_METHODS, storage.storage_name)
+
+    def instrument_xform(self, xform):
+        self._instrument_all(xform, self._XFORM_METHODS)
+
+        def option_cached(args, kwargs):
+            if kwargs.get('glob', False):
+                return args[0] in xform._option_glob_cache
+            return args[0] in xform._option_cache
+
+        def section_cached(args, kwargs):
+            if kwargs.get('glob', False):
+                return args[0] in xform._section_glob_cache
+            return args[0] in xform._section_cache
+
+        self.instrument_cache(xform, 'option_x_form', 'xform.option', option_cached)
+        self.instrument_cache(xform, 'section_x_form', 'xform.section', section_cached)
+
+    def instrument_manager(self, manager):
+        """
+        instruments the manager, and all of the sections, options, and storage managers it has.
+        """
+        self.instrument_xform(manager._xform)
+        self.instrument_interpolator(manager._interpolator)
+        for storage in manager.storage.storage_managers.values():
+            self.instrument_storage(storage)
+        for section in manager._sections.values():
+            self.instrument_section(section)
+
+    def uninstrument_manager(self, manager):
+        """
+        removes all of the instrumentation from the manager.
+        """
+        for method_name in ('both_check', 'option_x_form', 'section_x_form'):
+            self.uninstrument(manager._xform, method_name)
+        self._uninstrument_all(manager._interpolator, self._INTERPOLATION_METHODS)
+        for method_name in ('_parse', '_resolve_key'):
+            self.uninstrument(manager._interpolator, method_name)
+        for storage in manager.storage.storage_managers.values():
+            self._uninstrument_all(storage, self._STORAGE_METHODS)
+        for section in manager._sections.values():
+            if section._migrations is not None:
+                self._uninstrument_all(section._migrations, self._MIGRATION_METHODS)
+                self.uninstrument(section._migrations, 'set_migration')
+            for option in section:
+                self._uninstrument_all(option, self._OPTION_METHODS)
+                self._uninstrument_all(option._datatype_manager, self._DATATYPE_METHODS)
+                self.uninstrument(option._datatype_manager, 'from_string')
+
+    def __repr__(self):
+        return 'ConfigStats [{} calls tracked]'.format(len(self._times))
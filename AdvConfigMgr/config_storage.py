@@ -2,17 +2,18 @@ __author__ = 'dstrohl'
 
 from AdvConfigMgr.config_exceptions import *
 from AdvConfigMgr.utils import make_list, merge_dictionaries
-from AdvConfigMgr.utils.filehandler import PathHandler
-from argparse import ArgumentParser
+from AdvConfigMgr.utils.filehandler import PathHandler, FileHandler
+from argparse import ArgumentParser, SUPPRESS
 import copy
+import os
 import re
 import sys
 import shutil
 from pathlib import Path
 from datetime import datetime
 
-__all__ = ['BaseConfigStorageManager', 'StorageManagerManager', 'ConfigCLIStorage', 'ConfigSimpleDictStorage',
-           'ConfigFileStorage', 'ConfigStringStorage', 'BaseConfigRecordBasedStorageManager']
+__all__ = ['BaseConfigStorageManager', 'StorageManagerManager', 'ConfigCLIStorage', 'ConfigEnvStorage',
+           'ConfigSimpleDictStorage', 'ConfigFileStorage', 'ConfigStringStorage', 'BaseConfigRecordBasedStorageManager']
 
 
 class BaseConfigStorageManager(object):
@@ -61,6 +62,18 @@ class BaseConfigStorageManager(object):
     """:param int priority: the priority of this manager, with smallest being run earlier than larger."""
     priority = 100
 
+    """:param str layer: the layer this manager sets values in if the manager is layered, (defaults to the
+        storage_name)"""
+    layer = None
+
+    """:param int layer_priority: the precedence of the layer, values in layers with larger priorities are used over
+        values in layers with smaller ones."""
+    layer_priority = 100
+
+    """:param bool write_if_changed: True if writes are skipped when nothing has changed since this manager was last
+        read or written."""
+    write_if_changed = True
+
     def __init__(self):
         """
 
@@ -76,6 +89,10 @@ class BaseConfigStorageManager(object):
 
         self.data = None
 
+        # {section name: generation} the section generation when the section was last read or written.
+        self._synced_generations = {}
+        self.processed_sections = []  # the sections loaded by the last read
+
         ip.info('Loading storage manager: ', self.storage_name)
 
     def config(self, config_dict):
@@ -93,6 +110,9 @@ class BaseConfigStorageManager(object):
         self.force = config_dict.get('force', self.force)
         self.overwrite = config_dict.get('overwrite', self.overwrite)
         self.lock_after_read = config_dict.get('lock_after_read', self.lock_after_read)
+        self.layer = config_dict.get('layer', self.layer)
+        self.layer_priority = config_dict.get('layer_priority', self.layer_priority)
+        self.write_if_changed = config_dict.get('write_if_changed', self.write_if_changed)
 
     def read(self, section_name=None, storage_name=storage_name, **kwargs):
         """
@@ -203,7 +223,49 @@ class BaseConfigStorageManager(object):
         ip.a().debug('NO: fell through checks.').s()
         return False
 
-    def _get_dict(self, section_name=None, storage_name=storage_name):
+    def _selected_sections(self, section_name=None):
+        if section_name is None:
+            return list(self.manager)
+        tmp_names = make_list(section_name)
+        return [s for s in self.manager if s.name in tmp_names]
+
+    def _dirty_sections(self, section_name=None):
+        """
+        :param section_name: a section name or list of names, or None for all sections.
+        :return: the names of the sections that have changed since they were last read from or written to this manager.
+        """
+        tmp_synced = self._synced_generations
+        return [s.name for s in self._selected_sections(section_name) if s._generation > tmp_synced.get(s.name, 0)]
+
+    def _clean_sections(self, section_name=None):
+        tmp_synced = self._synced_generations
+        return [s.name for s in self._selected_sections(section_name) if s._generation <= tmp_synced.get(s.name, 0)]
+
+    def _mark_synced(self, section_name=None):
+        """
+        records that the sections are the same in this manager as in the configuration.
+        """
+        for section in self._selected_sections(section_name):
+            self._synced_generations[section.name] = section._generation
+
+    def _mark_read(self, section_name, generation):
+        """
+        records the sections loaded by a read as the same in this manager as in the configuration, unless they have
+        options with values set before the read (since they were last synced) that the read did not replace.
+
+        :param section_name: the names of the sections loaded by the read.
+        :param int generation: the manager generation before the read.
+        """
+        for section in self._selected_sections(section_name):
+            tmp_synced = self._synced_generations.get(section.name, 0)
+            for option in section:
+                if option.has_set_value and tmp_synced < option._generation <= generation:
+                    ip.debug('section [', section.name, '] has unsaved changes in option [', option.name, ']')
+                    break
+            else:
+                self._synced_generations[section.name] = section._generation
+
+    def _get_dict(self, section_name=None, storage_name=storage_name, changed_only=False):
         """
         Returns a dictionary of options.
 
@@ -215,6 +277,8 @@ class BaseConfigStorageManager(object):
             storage_name.
         :type section_name: str or list or None
         :param str storage_name: allows overriding the storage name
+        :param bool changed_only: if True, only the options that have changed since the section was last read from or
+            written to this manager are returned, (for managers that can update records individually)
         :return: A dictionary of the options matching the sections and storage names passed.
         :rtype: dict
         """
@@ -253,9 +317,14 @@ class BaseConfigStorageManager(object):
                 ip.debug('storage [', self.storage_name, '] getting section ', section.name)
 
                 tmp_sec = {}
+                tmp_synced = self._synced_generations.get(section.name, 0)
+                if changed_only and section._generation <= tmp_synced:
+                    continue
 
                 self.last_section_count += 1
                 for option in section:
+                    if changed_only and option._generation <= tmp_synced:
+                        continue
                     opt_success, opt_value = self._get_option(section, option)
                     if opt_success:
                         self.last_option_count += 1
@@ -321,7 +390,7 @@ class BaseConfigStorageManager(object):
         self.processed_sections = []  # used by the record type storage manager.
 
         if self.manager._no_sections:
-            section_name = self.manager._DEFAULT_SECT_NAME
+            section_name = self.manager._no_section_section_name
 
         if isinstance(section_name, str):
             dict_in = {section_name: dict_in}
@@ -346,12 +415,24 @@ class BaseConfigStorageManager(object):
                         if sav_suc:
                             self.last_option_count += 1
 
+    @property
+    def layer_name(self):
+        """
+        the name of the layer this manager sets values in if the manager is layered.
+        """
+        if self.layer is None:
+            return self.storage_name
+        return self.layer
+
     def _set_option(self, section_name, option_name, value):
         """
         Assumes that the section is already checked for the tag.
 
         .. note:: if the storage method only stores strings, and this has to create an option, that option will be
             created as a string.
+
+        .. note:: in a layered manager each storage manager has its own layer, so overwrite and lock_after_read are
+            not used.
         """
         saved = False
         ip.debug('reading option [', option_name, '] from storage ', self.storage_name).a()
@@ -370,7 +451,8 @@ class BaseConfigStorageManager(object):
             saved = True
         else:
             option_rec = section.item(option_name)
-            if option_rec.has_set_value and not self.overwrite:
+            layered = self.manager._layered
+            if option_rec.has_set_value and not self.overwrite and not layered:
                 ip.warning('option [', option_name, '] has a value and overwrite is False')
                 save_option = False
             elif option_rec.do_not_change and not self.force:
@@ -378,8 +460,9 @@ class BaseConfigStorageManager(object):
                 save_option = False
 
             if save_option:
-                option_rec.from_read(value, from_string=self.force_strings)
-                option_rec.do_not_change = self.lock_after_read
+                option_rec.from_read(value, from_string=self.force_strings, layer=self.layer_name)
+                if not layered:
+                    option_rec.do_not_change = self.lock_after_read
                 saved = True
                 ip.debug('option [', option_rec.path, '] updated with: ', option_rec)
 
@@ -394,6 +477,9 @@ class BaseConfigRecordBasedStorageManager(BaseConfigStorageManager):
     """
     This base method is intended to be used for record based storage managers, when saving options to the system,
     this will also poll the deleted records list and remove them from the database.
+
+    Since records can be updated individually, the write method only passes the options that have changed since the
+    last read or write to :py:meth:`write_record`.
     """
 
     def _save_dict(self, dict_in, section_name=None, storage_name=None):
@@ -408,6 +494,33 @@ class BaseConfigRecordBasedStorageManager(BaseConfigStorageManager):
             for del_rec in deleted_records:
                 self.delete_record(section, del_rec)
 
+    def write(self, section_name=None, storage_name=None, **kwargs):
+        """
+        writes the options that have changed since the last read or write using :py:meth:`write_record`.
+
+        :return: the number of sections / options written
+        """
+        tmp_dict = self._get_dict(section_name, storage_name, changed_only=True)
+        if self._flat_dict:
+            if self.manager._no_sections:
+                tmp_dict = {self.manager._no_section_section_name: tmp_dict}
+            else:
+                tmp_dict = {self.manager._xf(section_name)[0]: tmp_dict}
+
+        for section, options in tmp_dict.items():
+            for option, value in options.items():
+                self.write_record(section, option, value)
+
+        return self.last_section_count, self.last_option_count
+
+    def write_record(self, section, option, value):
+        """
+        This must be implemented for records based storage managers,
+
+        This method takes a section, option and value, and saves (inserts or updates) that record in the database.
+        """
+        raise NotImplementedError
+
     def delete_record(self, section, option):
         """
         This must be implemented for records based storage managers,
@@ -420,6 +533,10 @@ class BaseConfigRecordBasedStorageManager(BaseConfigStorageManager):
 class ConfigCLIStorage(BaseConfigStorageManager):
     """
     Read configuration from the CLI
+
+    :param bool only_passed_args: if True, only the arguments that were passed on the command line are set (and locked
+        if lock_after_read is set), the options that were not passed keep their current values.  if False (the
+        default) every cli option is set, using its default value if it was not passed.
     """
     storage_type_name = 'CLI Manager'
     storage_name = 'cli'
@@ -429,12 +546,28 @@ class ConfigCLIStorage(BaseConfigStorageManager):
     overwrite = True  #: True if this will overwrite options that have existing values
     lock_after_read = True  #: True if this will lock the option after reading
     priority = 1
+    layer_priority = 300  #: the cli layer is used over the file (and environment) layers
+
+    _only_passed_args = False
 
     def __init__(self):
-        self._reset_config_cache = True
+        self._reset_config_cache = False
         self._cli_parser = None
+        self._cli_groups = {}
+        self._cli_dests = {}
         super(ConfigCLIStorage, self).__init__()
 
+    def config(self, config_dict):
+        """
+        :param dict config_dict: a dictionary with storage specific configuration options., This is called after the
+            storage manager is loaded.
+        """
+        super(ConfigCLIStorage, self).config(config_dict=config_dict)
+        tmp_only_passed = config_dict.get('only_passed_args', self._only_passed_args)
+        if tmp_only_passed != self._only_passed_args:
+            self._only_passed_args = tmp_only_passed
+            self.reset_cache()
+
     def read(self, section_name=None, storage_name=storage_name, **kwargs):
         """
         will take a dictionary and save it to the system
@@ -462,25 +595,50 @@ class ConfigCLIStorage(BaseConfigStorageManager):
         """
         self._reset_config_cache = True
 
+    def add_cli_option(self, section, option):
+        """
+        called when an option with cli settings is registered.  the parser is only built when it is first used, if it
+        has already been built, the argument is added to it (instead of building a new parser).
+
+        :param ConfigSection section: the section of the option.
+        :param ConfigOption option: the option, (with the cli settings in option.cli_options)
+        """
+        if self._cli_parser is not None and not self._reset_config_cache:
+            self._add_argument(section, option.cli_options, option)
+
+    def _add_argument(self, section, cli_args, option):
+        if self.manager._cli_group_by_section:
+            try:
+                cli_sect = self._cli_groups[section.name]
+            except KeyError:
+                ip.debug('creating CLI section: ', section._cli_section_options['title'])
+                cli_sect = self._cli_parser.add_argument_group(**section._cli_section_options)
+                self._cli_groups[section.name] = cli_sect
+        else:
+            cli_sect = self._cli_parser
+
+        tmp_args = copy.copy(cli_args)
+        tmp_flags = tmp_args.pop('flags')
+        if self._only_passed_args:
+            # the dest is left out of the parsed args if the argument is not passed.
+            tmp_args['default'] = SUPPRESS
+        ip.debug('creating CLI argument "', tmp_flags, '" with options ', tmp_args)
+        cli_sect.add_argument(*tmp_flags, **tmp_args)
+        self._cli_dests[tmp_args['dest']] = option
+
     @property
     def cli_parser(self):
         if self._cli_parser is None or self._reset_config_cache:
             ip.debug('Creating CLI Parser').a()
             self._cli_parser = ArgumentParser(**self.manager._cli_parser_args)
-            cli_sect = self._cli_parser
+            self._cli_groups = {}
+            self._cli_dests = {}
+            self._reset_config_cache = False
 
             for s in self.manager:
                 ip.debug('checking for cli options in sections: ', s.name)
-                if self.manager._cli_group_by_section and s._cli_args:
-                    ip.debug('creating CLI section: ', s._cli_section_options['title'])
-                    cli_sect = self._cli_parser.add_argument_group(**s._cli_section_options)
-
                 for d, o in s._cli_args.items():
-                    tmp_args = copy.copy(o)
-                    tmp_flags = tmp_args.pop('flags')
-                    ip.debug('creating CLI argument "', tmp_flags, '" with options ', tmp_args)
-                    cli_sect.add_argument(*tmp_flags, **tmp_args)
-            self._reset_config_cache = False
+                    self._add_argument(s, o, self.manager._cli_args[d])
         else:
             ip.debug('CLI PARSER FOUND')
         ip.s()
@@ -494,10 +652,146 @@ class ConfigCLIStorage(BaseConfigStorageManager):
         """
         ip.debug('Parsing CLI arguments: ', args)
         tmp_args = vars(self.cli_parser.parse_args(args))
+        tmp_dests = self._cli_dests
+        tmp_layer = self.layer_name
+        tmp_lock = self._only_passed_args and self.lock_after_read and not self.manager._layered
+        self.last_option_count = 0
 
         for dest, value in tmp_args.items():
             self.last_option_count += 1
-            self.manager._cli_args[dest].from_read(value, from_string=True)
+            option = tmp_dests[dest]
+            option.from_read(value, from_string=True, layer=tmp_layer)
+            if tmp_lock:
+                option.do_not_change = True
+
+
+class ConfigEnvStorage(BaseConfigStorageManager):
+    """
+    Read configuration from environment variables named PREFIX_SECTION__OPTION, (or PREFIX_OPTION if the manager
+    has no sections).  The section and option names are transformed the same way as the names from any other storage,
+    so MYAPP_DB_MAIN__HOST sets the "host" option in the "DB_MAIN" section.
+
+    The environment is scanned once (and only the variables starting with the prefix are kept) into an index of
+    {section: {option: value}}, which is re-used for later reads until reset_cache is called.  The values are converted
+    using the datatype of the option they are set in.
+
+    :param str prefix: the prefix for the variable names, (an "_" is added if it does not end with one)
+    :param str separator: the separator between the section and option names.
+    :param environ: a mapping to read instead of os.environ.
+    :param bool cache: if False, the environment is scanned for each read.
+    """
+    storage_type_name = 'Environment Variables'
+    storage_name = 'env'
+    standard = True  #: True if this should be used for read_all/write_all ops
+    force_strings = False  #: the strings are converted by _set_option, (before they get to the option)
+    allow_create = False  #: True if this can create options in the system, even if they are not pre-configured.
+    priority = 150  #: read after the file manager, so environment values replace file values
+    layer_priority = 200  #: the environment layer is used over the file layer, but not over the cli layer
+
+    _prefix = ''
+    _separator = '__'
+    _environ = None
+    _cache = True
+
+    def __init__(self):
+        self._index = None
+        super(ConfigEnvStorage, self).__init__()
+
+    def config(self, config_dict):
+        """
+        :param dict config_dict: a dictionary with storage specific configuration options., This is called after the
+            storage manager is loaded.
+        """
+        super(ConfigEnvStorage, self).config(config_dict=config_dict)
+
+        self._prefix = config_dict.get('prefix', self._prefix)
+        if self._prefix and not self._prefix.endswith('_'):
+            self._prefix += '_'
+        self._separator = config_dict.get('separator', self._separator)
+        self._environ = config_dict.get('environ', self._environ)
+        self._cache = config_dict.get('cache', self._cache)
+        self._index = None
+
+    def reset_cache(self):
+        """
+        clears the index, so the environment is scanned again on the next read.
+        """
+        self._index = None
+
+    def _make_index(self, environ):
+        """
+        :param environ: the mapping of variable names to values.
+        :return: {section: {option: value}} for the variables starting with the prefix, ({option: value} if the manager
+            has no sections)
+        """
+        tmp_prefix = self._prefix
+        tmp_prefix_len = len(tmp_prefix)
+        tmp_sep = self._separator
+        no_sections = self.manager._no_sections
+        tmp_ret = {}
+
+        for name, value in environ.items():
+            if not name.startswith(tmp_prefix):
+                continue
+            name = name[tmp_prefix_len:]
+
+            if no_sections:
+                tmp_ret[name] = value
+                continue
+
+            section, sep, option = name.partition(tmp_sep)
+            if not sep or not section or not option:
+                continue
+            try:
+                tmp_ret[section][option] = value
+            except KeyError:
+                tmp_ret[section] = {option: value}
+
+        ip.debug('environment index: ', len(tmp_ret), ' entries for prefix "', tmp_prefix, '"')
+        return tmp_ret
+
+    @property
+    def index(self):
+        if self._index is None or not self._cache:
+            if self._environ is None:
+                tmp_environ = os.environ
+            else:
+                tmp_environ = self._environ
+            self._index = self._make_index(tmp_environ)
+        return self._index
+
+    def read(self, section_name=None, storage_name=storage_name, **kwargs):
+        """
+        reads the environment variables into the system, if data is passed (a mapping of variable names to values), it
+        is used instead of the environment.
+        """
+        if self.data is not None:
+            tmp_index = self._make_index(self.data)
+            self.data = None
+        else:
+            tmp_index = self.index
+
+        self._save_dict(tmp_index, section_name, storage_name)
+        return self.last_section_count, self.last_option_count
+
+    def write(self, section_name=None, storage_name=storage_name, **kwargs):
+        """
+        environment variables are not written -- disabled
+        """
+        self.last_section_count = 0
+        self.last_option_count = 0
+        return self.last_section_count, self.last_option_count
+
+    def _set_option(self, section_name, option_name, value):
+        section = self.manager[section_name]
+        if option_name not in section:
+            if not self.allow_create:
+                ip.debug('option [', option_name, '] in section [', section_name, '] does not exist, skipping')
+                return False
+        else:
+            # converted here with the option's datatype (the conversions are cached by datatype and string).
+            value = section.item(option_name)._datatype_manager.from_string(value)
+        return super(ConfigEnvStorage, self)._set_option(section_name, option_name, value)
 
 
 class ConfigSimpleDictStorage(BaseConfigStorageManager):
@@ -509,6 +803,7 @@ class ConfigSimpleDictStorage(BaseConfigStorageManager):
     storage_type_name = 'Simple Dictionary Storage'
     storage_name = 'dict'
     standard = False  #: True if this should be used for read_all/write_all ops
+    write_if_changed = False  #: the data is returned from each write, so writes are never skipped
 
     def read(self, section_name=None, storage_name=storage_name, **kwargs):
         """
@@ -554,6 +849,7 @@ class ConfigStringStorage(BaseConfigStorageManager):
     storage_type_name = 'INI String'
     storage_name = 'string'  #: the internal name of the storage manager, must be unique
     force_strings = True  #: True if the storage only accepts strings
+    write_if_changed = False  #: the data is returned from each write, so writes are never skipped
 
     # Regular expressions for parsing section headers and options
     _SECT_TMPL = r"""
@@ -866,7 +1162,10 @@ class ConfigFileStorage(ConfigStringStorage):
     :type write_filename: str or None
     :param bool leave_open: if True, the file objects will be left open while the config manager is loaded.  this can
         speed up file access, but it also uses up file handles, buffers, memory, and has the possibility of
-        corrupted files.
+        corrupted files.  The files are kept in a pool of (at most) max_open_files handles, which are
+        reused (after checking the file has not been replaced) for each read and write.  call close_files to close
+        them.
+    :param int max_open_files: the most files to leave open if leave_open is True.
     :param bool create_files: if False, will not create any files it does not find.
     :param bool fail_if_no_file: if False, will fail and raise an error if the specified filename is not found.
     :param bool make_backup_before_writing: if True, the system will make a backup file before writing the configuration.
@@ -884,6 +1183,7 @@ class ConfigFileStorage(ConfigStringStorage):
 
     storage_type_name = 'INI File'
     storage_name = 'file'  #: the internal name of the storage manager, must be unique
+    write_if_changed = True  #: the file is not re-written if nothing has changed
 
     _create_files = True
     _fail_if_no_file = False
@@ -892,6 +1192,9 @@ class ConfigFileStorage(ConfigStringStorage):
     _backup_path = None
     _max_backup_number = 999
     _encoding = None
+    _leave_open = False
+    _max_open_files = 32
+    _file_pool = None
 
     # you should have EITHER a single filename
     _filename = None
@@ -917,6 +1220,13 @@ class ConfigFileStorage(ConfigStringStorage):
         self._backup_path = config_dict.get('backup_path', self._backup_path)
         self._max_backup_number = config_dict.get('max_backup_number', self._max_backup_number)
         self._encoding = config_dict.get('encoding', self._encoding)
+        self._leave_open = config_dict.get('leave_open', self._leave_open)
+        self._max_open_files = config_dict.get('max_open_files', self._max_open_files)
+
+        if self._leave_open:
+            self._file_pool = FileHandler(max_open=self._max_open_files, default_encoding=self._encoding)
+        else:
+            self._file_pool = None
 
         self._read_path_order = config_dict.get('read_path_order', self._read_path_order)
         self._read_path_order_dir = config_dict.get('read_path_order_dir', self._read_path_order_dir)
@@ -974,7 +1284,8 @@ class ConfigFileStorage(ConfigStringStorage):
                                     return_type='handle',
                                     verify='call',
                                     on_does_not_exist=on_does_not_exist,
-                                    default_open_encoding=encoding)
+                                    default_open_encoding=encoding,
+                                    file_pool=self._file_pool)
 
             for file in path_list.readable:
                 with file:
@@ -1055,8 +1366,14 @@ class ConfigFileStorage(ConfigStringStorage):
             # noinspection PyUnboundLocalVariable
             self._make_backup(filename.name)
 
-        if file is None:
-            file = filename.open(mode='w', encoding=encoding)
+        if encoding is None:
+            encoding = self._encoding
+
+        if file is None or isinstance(file, str):
+            if self._file_pool is not None:
+                file = self._file_pool.open(filename, mode='w', encoding=encoding)
+            else:
+                file = filename.open(mode='w', encoding=encoding)
 
         for l in self.data:
             file.write(l)
@@ -1065,6 +1382,13 @@ class ConfigFileStorage(ConfigStringStorage):
 
         return self.last_section_count, self.last_option_count
 
+    def close_files(self):
+        """
+        closes any files left open (if leave_open is set).
+        """
+        if self._file_pool is not None:
+            self._file_pool.close_all()
+
     def _handle_error(self, exc, fpname, lineno, line):
         if not exc:
             exc = ParsingError(fpname)
@@ -1126,6 +1450,10 @@ class StorageManagerManager(object):
         storage_manager.config(tmp_storage_config)
 
         self.storage_managers[storage_manager.storage_name] = storage_manager
+        self.config_manager._layer_ranks[storage_manager.layer_name] = storage_manager.layer_priority
+
+        if self.config_manager._stats is not None:
+            self.config_manager._stats.instrument_storage(storage_manager)
 
         # storage_manager.config(self._storage_config[storage_manager.storage_name])
 
@@ -1210,16 +1538,27 @@ class StorageManagerManager(object):
             else:
                 use_tag = s.storage_name
 
+            # sections that matched the storage before reading it still match it afterwards, (unless the data read
+            # did not come from the storage itself)
+            if data is None:
+                tmp_clean = s._clean_sections(sections)
+                tmp_generation = self.config_manager._generation
+
+            s.processed_sections = []
             tsc, toc = s.read(sections, use_tag)
             tmp_section_count += tsc
             tmp_option_count += toc
 
+            if data is None:
+                s._mark_synced(tmp_clean)
+                s._mark_read(s.processed_sections, tmp_generation)
+
         ip.info('read from storage managers').a()
         ip.info('sections: ', tmp_section_count)
         ip.info('options: ', tmp_option_count)
         ip.info('managers: ', tmp_storage_manager_count).s()
 
-    def write(self, sections=None, storage_names=None, override_tags=False, **kwargs):
+    def write(self, sections=None, storage_names=None, override_tags=False, force=False, **kwargs):
         """
         runs the write to storage process for the selected or configured managers
 
@@ -1229,6 +1568,9 @@ class StorageManagerManager(object):
             following the configured tag settings.
         :param override_tags: if True, this will override the configured storage name settings allowing things like
             exporting the full config etc.
+        :param force: if False, managers with write_if_changed set are skipped if none of the sections have changed
+            since they were last read or written.  (writes with override_tags or extra arguments, such as a file to
+            write to, are always done)
         :return: if ONLY one storage_name is passed, this will return the data from that manager if present.
         """
 
@@ -1255,7 +1597,12 @@ class StorageManagerManager(object):
                 tmp_run_list.append(self[t])
 
         ip.s().debug('Storages to write to: ', tmp_run_list)
+        tmp_full_write = not override_tags and not kwargs
         for s in tmp_run_list:
+            if tmp_full_write and s.write_if_changed and not force and not s._dirty_sections(sections):
+                ip.debug('nothing has changed for : ', s, ', skipping')
+                continue
+
             tmp_storage_manager_count += 1
             if override_tags:
                 use_tag = '*'
@@ -1268,14 +1615,21 @@ class StorageManagerManager(object):
             tmp_section_count += tsc
             tmp_option_count += toc
 
+            if tmp_full_write:
+                s._mark_synced(sections)
+
         ip.info('sections: ', tmp_section_count)
         ip.info('options: ', tmp_option_count)
         ip.info('managers: ', tmp_storage_manager_count).s()
 
+        # the data written is returned (if there is only one storage manager), but it is cleared from the storage
+        # managers so that the next read does not take it as data passed to read.
+        tmp_ret = None
         if len(tmp_run_list) == 1:
-            return tmp_run_list[0].data
-        else:
-            return None
+            tmp_ret = tmp_run_list[0].data
+        for s in tmp_run_list:
+            s.data = None
+        return tmp_ret
 
     def __call__(self):
         return self.default_manager
@@ -0,0 +1,175 @@
+__author__ = 'dstrohl'
+
+"""
+Stages a group of option changes and applies them all at once.
+
+All of the staged values are converted and validated before any of them are set, so if any value fails, none of the
+changes are applied::
+
+    with config.transaction() as t:
+        t['section1.option1'] = 'new value'
+        t['section2.option3'] = 12
+
+    # or
+    config.set_many({'section1.option1': 'new value', 'section2.option3': 12})
+"""
+
+from collections import OrderedDict
+
+from AdvConfigMgr.config_exceptions import NoSectionError, NoOptionError, ForbiddenActionError, ip
+from AdvConfigMgr.utils.unset import _UNSET
+
+__all__ = ['ConfigTransaction']
+
+
+class ConfigTransaction(object):
+    """
+    A group of staged changes to a :py:class:`ConfigManager`.
+
+    This can be used as a context manager, in which case the changes are committed when the block exits (or discarded
+    if the block raises an exception).
+
+    :param ConfigManager manager: the manager to change.
+    """
+
+    def __init__(self, manager):
+        self._manager = manager
+        self._staged = OrderedDict()
+        self._closed = False
+
+    def set(self, key, value, raw=False, validate=True, force=False):
+        """
+        stages a change, nothing is checked until the transaction is committed.
+
+        :param str key: the option in dot notation ('section.option')
+        :param value: the value to set
+        :param raw: if set to True will bypass the interpolater
+        :param validate: if False will bypass the validation steps
+        :param force: if True will bypass the lock checks
+        """
+        if self._closed:
+            raise ForbiddenActionError('transaction has already been committed or rolled back')
+        self._staged[key] = (value, raw, validate, force)
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __contains__(self, key):
+        return key in self._staged
+
+    def __len__(self):
+        return len(self._staged)
+
+    def _section(self, key):
+        """
+        :return: the section object and the transformed option name for a key.
+        """
+        manager = self._manager
+        if manager._no_sections:
+            section = manager._sections[manager._no_section_section_name]
+            return section, section._xf(key)[1]
+
+        section, option = manager._xf(key)
+        if option is _UNSET:
+            raise NoOptionError(key, section)
+        try:
+            return manager._sections[section], option
+        except KeyError:
+            raise NoSectionError(section=section)
+
+    def _plan(self):
+        """
+        converts and validates all of the staged values, the options that will be created are made (but not added to
+        their sections) and checked the same way.
+
+        :return: a list of new options to add, and a list of (option, value) to set.
+        """
+        tmp_new = OrderedDict()
+        tmp_changes = []
+        tmp_staged = {}
+        interpolator = self._manager._interpolator
+
+        for key, (value, raw, validate, force) in self._staged.items():
+            section_obj, option_name = self._section(key)
+
+            if section_obj.locked and not force:
+                ip.debug('section [', section_obj.name, '] is locked, skipping [', key, ']')
+                continue
+
+            if not raw:
+                value = interpolator.before_set(section_obj.name, value)
+
+            if option_name in section_obj:
+                option = section_obj._options[option_name]
+            else:
+                if not section_obj.allow_create_on_set:
+                    raise NoOptionError(option_name, section_obj.name)
+                tmp_key = (section_obj.name, option_name)
+                option = tmp_new.get(tmp_key)
+                if option is None:
+                    option = section_obj._make_option(option_name, default_value=value)
+                    tmp_new[tmp_key] = option
+
+            changed, value = option._stage(value, validate=validate, force=force, staged=tmp_staged)
+            if changed:
+                tmp_changes.append((option, value))
+                tmp_staged[option.path] = value
+
+        return list(tmp_new.values()), tmp_changes
+
+    def commit(self):
+        """
+        checks all of the staged values, and if they all pass, applies them.  The manager's change listeners are
+        called once with all of the options that changed.
+
+        :return: the number of options that were changed or created.
+        """
+        if self._closed:
+            raise ForbiddenActionError('transaction has already been committed or rolled back')
+        manager = self._manager
+
+        # the listeners are called when the batch ends, after the lock is released.
+        with manager._batch_changes():
+            with manager._lock.write_lock:
+                tmp_new, tmp_changes = self._plan()
+
+                for option in tmp_new:
+                    option._section._add_option(option, stamp=False)
+
+                # the created options first, then the changed ones.
+                tmp_changed = OrderedDict((o, True) for o in tmp_new)
+                for option, value in tmp_changes:
+                    option._commit(value)
+                    tmp_changed[option] = True
+
+                # one generation stamp and one notification for the whole commit.
+                if tmp_changed:
+                    manager._changed(list(tmp_changed))
+
+        ip.debug('transaction committed, ', len(tmp_changed) - len(tmp_new), ' options changed, ', len(tmp_new),
+                 ' options created')
+        self._staged.clear()
+        self._closed = True
+        return len(tmp_changed)
+
+    def rollback(self):
+        """
+        discards all of the staged changes.
+        """
+        self._staged.clear()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._closed:
+            return False
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def __repr__(self):
+        return 'ConfigTransaction [{} staged changes]'.format(len(self._staged))
@@ -5,6 +5,7 @@ __all__ = ['Xform']
 from AdvConfigMgr.utils import get_after, get_before
 from unicodedata import normalize
 from AdvConfigMgr.utils.unset import _UNSET
+import threading
 
 class Xform(object):
 
@@ -16,9 +17,26 @@ class Xform(object):
         self._sec_opt_sep = sec_opt_sep
         self._def_glob_chars = glob_chars
         self._def_no_glob_chars = glob_no_chars
-        self._last_option = _UNSET
-        self._last_section = _UNSET
-        self._last_dot_not = _UNSET
+
+        # the "last" values are only kept for the no-arg calls to .option() and .section(), they are kept per thread
+        # so that lookups in one thread cannot change the results in another.
+        self._local = threading.local()
+
+    @property
+    def _last_option(self):
+        return getattr(self._local, 'last_option', _UNSET)
+
+    @_last_option.setter
+    def _last_option(self, value):
+        self._local.last_option = value
+
+    @property
+    def _last_section(self):
+        return getattr(self._local, 'last_section', _UNSET)
+
+    @_last_section.setter
+    def _last_section(self, value):
+        self._local.last_section = value
 
     def option_x_form(self, optionstr, extra_allowed='_', glob=False):
         """
@@ -111,16 +129,41 @@ class Xform(object):
                                                              section=section, option=option)
         return tmp_section, tmp_option
 
+    def _split(self, name):
+        """
+        splits a dot notation string into its section and option parts, does not keep any state.
+
+        :return: before_sep, after_sep, if the name is not in dot notation, before_sep is _UNSET
+        """
+        if self.is_dot_notation(name):
+            return get_before(name, self._sec_opt_sep), get_after(name, self._sec_opt_sep)
+        return _UNSET, name
+
     def both_check(self, name=_UNSET, extra_allowed=None, glob=False,
                    option_or_section='option', section=_UNSET, option=_UNSET):
+        """
+        Transforms a name into the section and option parts.  All of the state used is local to this call, so this is
+        safe to use from multiple threads.
+
+        :return: dot_notation_used, section, option
+        """
 
         tmp_check = False
 
         if option_or_section == 'option':
             if name is None:
                 return False, _UNSET, None
-            tmp_option = self.option(name, extra_allowed=extra_allowed, glob=glob)
-            tmp_section = self.section()
+
+            if isinstance(name, str):
+                tmp_sec_str, tmp_opt_str = self._split(name)
+                tmp_option = self.option_x_form(tmp_opt_str, extra_allowed=extra_allowed, glob=glob)
+            else:
+                tmp_sec_str = _UNSET
+                tmp_option = None
+
+            self._last_section = tmp_sec_str
+            tmp_section = self.section_x_form(tmp_sec_str, extra_allowed=extra_allowed, glob=glob)
+
             if tmp_section is _UNSET:
                 if section is not _UNSET:
                     tmp_section = self.section(section, extra_allowed=extra_allowed, glob=glob)
@@ -131,8 +174,19 @@ class Xform(object):
         else:
             if name is None:
                 return False, None, _UNSET
-            tmp_section = self.section(name, extra_allowed=extra_allowed, glob=glob)
-            tmp_option = self.option()
+
+            if isinstance(name, str):
+                tmp_sec_str, tmp_opt_str = self._split(name)
+                if tmp_sec_str is _UNSET:
+                    tmp_sec_str, tmp_opt_str = name, _UNSET
+                tmp_section = self.section_x_form(tmp_sec_str, extra_allowed=extra_allowed, glob=glob)
+            else:
+                tmp_opt_str = _UNSET
+                tmp_section = None
+
+            self._last_option = tmp_opt_str
+            tmp_option = self.option_x_form(tmp_opt_str, extra_allowed=extra_allowed, glob=glob)
+
             if tmp_option is _UNSET:
                 if option is not _UNSET:
                     tmp_option = self.option(option, extra_allowed=extra_allowed, glob=glob)
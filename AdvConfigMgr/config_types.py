@@ -1,15 +1,24 @@
 __author__ = 'dstrohl'
 __all__ = ['DataTypeList', 'DataTypeStr', 'DataTypeFloat', 'DataTypeInt', 'DataTypeDict', 'DataTypeBoolean',
-           'DataTypeLooseVersion', 'DataTypeStrictVersion',
+           'DataTypeLooseVersion', 'DataTypeStrictVersion', 'DataTypeIntList', 'DataTypeFloatList', 'DataTypeStrList',
+           'DataTypeIntDict', 'DataTypeStrDict',
            'DataTypeGenerator', 'data_type_generator']
 
 import ast
 import copy
+from array import array
 from AdvConfigMgr.utils import make_list, convert_to_boolean, slugify, get_after, get_before
-from AdvConfigMgr.config_validation import ValidationError
+from AdvConfigMgr.utils.literal_parser import parse_literal
+from AdvConfigMgr.config_validation import ValidationError, compile_validations
 from unicodedata import normalize
 from AdvConfigMgr.utils.unset import _UNSET
 from distutils.version import LooseVersion, StrictVersion
+from math import isinf, isnan
+
+# values converted from strings, for the datatypes that cache them, keyed by (datatype class, string)
+_MAX_CACHED_STRINGS = 1024
+_from_string_cache = {}
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
 
 '''
 class ItemKey(object):
@@ -154,6 +163,7 @@ class DataTypeGenerator(object):
 class DataTypeBase(object):
     name = 'str'
     _type_class = str
+    _cache_from_string = False  # if True, the values converted from strings are cached.
 
     def __init__(self, validations=None, allow_empty=True, empty_type=_UNSET):
         """
@@ -165,6 +175,7 @@ class DataTypeBase(object):
             self.validations = make_list(validations)
         else:
             self.validations = None
+        self._compiled_validations = self._compile_validations(self.validations)
         self.empty_type = empty_type
         self.allow_empty = allow_empty
 
@@ -173,6 +184,11 @@ class DataTypeBase(object):
 
     def add_validations(self, validations):
         self.validations = make_list(validations)
+        self._compiled_validations = self._compile_validations(self.validations)
+
+    @staticmethod
+    def _compile_validations(validations):
+        return compile_validations(validations)
 
     def auto_convert(self, value):
         if isinstance(value, self._type_class):
@@ -200,9 +216,8 @@ class DataTypeBase(object):
             # return self._validations(value) and self._validate_datatype(value)
 
     def _validations(self, value):
-        if self.validations is not None:
-            for v in self.validations:
-                v.validate(value)
+        if self._compiled_validations is not None:
+            self._compiled_validations(value)
         return value
 
     def _validate_datatype(self, value):
@@ -226,7 +241,7 @@ class DataTypeBase(object):
         Should returns an object matching the datatype from a string
         Should be over-ridden for non-string types
         """
-        tmp_ret = self._type_class(ast.literal_eval(value))
+        tmp_ret = self._type_class(parse_literal(value))
         return tmp_ret
 
     def to_string(self, value):
@@ -239,7 +254,47 @@ class DataTypeBase(object):
         """
         Returns an object matching the datatype from a string
         """
-        return self._convert_from_string(value)
+        if not self._cache_from_string:
+            return self._convert_from_string(value)
+
+        tmp_key = (self.__class__, value)
+        try:
+            tmp_ret, tmp_flat = _from_string_cache[tmp_key]
+        except KeyError:
+            pass
+        except TypeError:
+            return self._convert_from_string(value)
+        else:
+            return self._copy_cached(tmp_ret, tmp_flat)
+
+        tmp_ret = self._convert_from_string(value)
+        tmp_flat = self._is_flat(tmp_ret)
+        if len(_from_string_cache) >= _MAX_CACHED_STRINGS:
+            _from_string_cache.clear()
+        _from_string_cache[tmp_key] = (self._copy_cached(tmp_ret, tmp_flat), tmp_flat)
+        return tmp_ret
+
+    @staticmethod
+    def _is_flat(value):
+        """
+        True if the container only holds immutable items (so a shallow copy is enough).
+        """
+        if isinstance(value, dict):
+            value = value.values()
+        elif isinstance(value, array):
+            return True
+        immutable = _IMMUTABLE_TYPES
+        for i in value:
+            if not isinstance(i, immutable):
+                return False
+        return True
+
+    @staticmethod
+    def _copy_cached(value, flat):
+        # the cached values are copied so that changing a value returned does not change the cache.
+        if flat:
+            return copy.copy(value)
+        return copy.deepcopy(value)
 
     def __repr__(self):
         return 'Datatype Validator for: %s' % self.name
@@ -261,20 +316,185 @@ class DataTypeInt(DataTypeBase):
     name = 'int'
     _type_class = int
 
+    def _convert_from_string(self, value):
+        # leading whitespace is an error for literal_eval on some versions, so it is left to literal_eval.
+        if value != value.lstrip():
+            return super(DataTypeInt, self)._convert_from_string(value)
+        try:
+            tmp_ret = int(value)
+        except ValueError:
+            return super(DataTypeInt, self)._convert_from_string(value)
+
+        # int() allows leading zeros and non-ascii digits, which the literal parser does not.
+        tmp_digits = value.strip().lstrip('+-')
+        if not tmp_digits.isascii() or (tmp_digits[:1] == '0' and tmp_digits.strip('0')):
+            return super(DataTypeInt, self)._convert_from_string(value)
+        return tmp_ret
+
 
 class DataTypeFloat(DataTypeBase):
     name = 'float'
     _type_class = float
 
+    def _convert_from_string(self, value):
+        if value != value.lstrip():
+            return super(DataTypeFloat, self)._convert_from_string(value)
+        try:
+            tmp_ret = float(value)
+        except ValueError:
+            return super(DataTypeFloat, self)._convert_from_string(value)
+
+        # float() also takes 'nan', 'inf' and non-ascii digits, which the literal parser does not.
+        if isnan(tmp_ret) or isinf(tmp_ret) or not value.isascii():
+            return super(DataTypeFloat, self)._convert_from_string(value)
+        return tmp_ret
+
 
 class DataTypeList(DataTypeBase):
     name = 'list'
     _type_class = list
+    _cache_from_string = True
+
+    def auto_convert(self, value):
+        # strings from storage are parsed, (list(value) would split them into characters).
+        if isinstance(value, str):
+            return self.from_string(value)
+        return super(DataTypeList, self).auto_convert(value)
 
 
 class DataTypeDict(DataTypeBase):
     name = 'dict'
     _type_class = dict
+    _cache_from_string = True
+
+    def auto_convert(self, value):
+        # strings from storage are parsed, (dict(value) would split them into characters).
+        if isinstance(value, str):
+            return self.from_string(value)
+        return super(DataTypeDict, self).auto_convert(value)
+
+
+class DataTypeTypedList(DataTypeBase):
+    """
+    A list where every item is the same type, the validations are run against each item (in one pass over the list
+    for each validation, see :py:meth:`AdvConfigMgr.config_validation.ValidationsBase.validate_many`).
+
+    If _typecode is set, the list is stored as an :py:class:`array.array` of that type instead of a list.
+    """
+    name = 'typed_list'
+    _type_class = list
+    _cache_from_string = True
+    _item_class = str
+    _typecode = None
+
+    @staticmethod
+    def _compile_validations(validations):
+        return compile_validations(validations, many=True)
+
+    def auto_convert(self, value):
+        if isinstance(value, str):
+            return self.from_string(value)
+        if self._typecode is not None:
+            if isinstance(value, array) and value.typecode == self._typecode:
+                return value
+            return array(self._typecode, value)
+        if isinstance(value, list) and self._validate_items(value):
+            return value
+        return [self._item_class(i) for i in value]
+
+    def _validate_items(self, value):
+        item_class = self._item_class
+        for i in value:
+            if not isinstance(i, item_class):
+                return False
+        return True
+
+    def _validate_datatype(self, value):
+        if self._typecode is not None:
+            return isinstance(value, array) and value.typecode == self._typecode
+        return isinstance(value, list) and self._validate_items(value)
+
+    def _convert_to_string(self, value):
+        if self._typecode is not None:
+            value = value.tolist()
+        return str(value)
+
+    def _convert_from_string(self, value):
+        if self._typecode is None:
+            return self.auto_convert(parse_literal(value))
+
+        value = value.strip()
+        if value[:1] in '[(' and value[-1:] in '])':
+            value = value[1:-1]
+        item_class = self._item_class
+        return array(self._typecode, [item_class(i) for i in value.split(',') if i.strip()])
+
+
+class DataTypeIntList(DataTypeTypedList):
+    name = 'int_list'
+    _item_class = int
+    _typecode = 'q'
+
+
+class DataTypeFloatList(DataTypeTypedList):
+    name = 'float_list'
+    _item_class = float
+    _typecode = 'd'
+
+
+class DataTypeStrList(DataTypeTypedList):
+    name = 'str_list'
+    _item_class = str
+
+
+class DataTypeTypedDict(DataTypeBase):
+    """
+    A dictionary where every value is the same type, the validations are run against the values.
+    """
+    name = 'typed_dict'
+    _type_class = dict
+    _cache_from_string = True
+    _item_class = str
+
+    @staticmethod
+    def _compile_validations(validations):
+        return compile_validations(validations, many=True)
+
+    def auto_convert(self, value):
+        if isinstance(value, str):
+            return self.from_string(value)
+        if isinstance(value, dict) and self._validate_items(value):
+            return value
+        item_class = self._item_class
+        return {k: item_class(v) for k, v in dict(value).items()}
+
+    def _validate_items(self, value):
+        item_class = self._item_class
+        for i in value.values():
+            if not isinstance(i, item_class):
+                return False
+        return True
+
+    def _validate_datatype(self, value):
+        return isinstance(value, dict) and self._validate_items(value)
+
+    def _validations(self, value):
+        if self._compiled_validations is not None:
+            self._compiled_validations(list(value.values()))
+        return value
+
+    def _convert_from_string(self, value):
+        return self.auto_convert(parse_literal(value))
+
+
+class DataTypeIntDict(DataTypeTypedDict):
+    name = 'int_dict'
+    _item_class = int
+
+
+class DataTypeStrDict(DataTypeTypedDict):
+    name = 'str_dict'
+    _item_class = str
 
 
 class DataTypeBoolean(DataTypeBase):
@@ -308,4 +528,6 @@ class DataTypeStrictVersion(DataTypeBase):
 
 
 data_type_generator = DataTypeGenerator(DataTypeFloat, DataTypeList, DataTypeStr,
-                                        DataTypeInt, DataTypeDict, DataTypeBoolean)
+                                        DataTypeInt, DataTypeDict, DataTypeBoolean,
+                                        DataTypeIntList, DataTypeFloatList, DataTypeStrList,
+                                        DataTypeIntDict, DataTypeStrDict)
@@ -1,5 +1,15 @@
 __author__ = 'dstrohl'
 
+"""
+Validations for option values.
+
+The validations for a datatype are compiled (see :py:func:`compile_validations`) into a single function when the
+datatype is created, options with the same validations share the same compiled function.
+"""
+
+__all__ = ['ValidationError', 'ValidationWarning', 'ValidationsBase', 'ValidateStrEqual', 'ValidateStrExists',
+           'ValidateNumRange', 'compile_validations']
+
 
 class ValidationError(Exception):
     def __init__(self, value):
@@ -36,6 +46,53 @@ class ValidationsBase(object):
         """
         return data
 
+    def validate_many(self, data):
+        """
+        validates each item in a sequence (the items of a list option, or the values of a dict option).  subclasses
+        can override this to check all of the items at once.
+
+        :param data: a sequence of items.
+        :return: the data
+        """
+        for item in data:
+            self.validate(item)
+        return data
+
+    def compile(self):
+        """
+        returns a function that takes the data and validates it the same way :py:meth:`validate` does.  subclasses can
+        override this to return a function with the settings already bound.
+        """
+        return self.validate
+
+    def compile_many(self):
+        """
+        returns a function that takes a sequence of items and validates them the same way :py:meth:`validate_many`
+        does.
+        """
+        if self.__class__.validate_many is not ValidationsBase.validate_many:
+            return self.validate_many
+
+        check = self.compile()
+
+        def validate_many(data):
+            for item in data:
+                check(item)
+            return data
+        return validate_many
+
+    def compile_key(self):
+        """
+        returns a hashable key that is the same for validations that validate the same way (used to share compiled
+        validations between options), or None if this validation should not be shared.
+        """
+        try:
+            tmp_ret = (self.__class__, tuple(sorted(vars(self).items())))
+            hash(tmp_ret)
+        except TypeError:
+            return None
+        return tmp_ret
+
 
 class ValidateStrEqual(ValidationsBase):
     def __init__(self, match_str):
@@ -47,6 +104,15 @@ class ValidateStrEqual(ValidationsBase):
         else:
             raise ValidationError('ValidationError: '+self.match_str+' does not match '+data)
 
+    def compile(self):
+        match_str = self.match_str
+
+        def validate_str_equal(data):
+            if match_str == data:
+                return match_str
+            raise ValidationError('ValidationError: '+match_str+' does not match '+data)
+        return validate_str_equal
+
 
 class ValidateStrExists(ValidationsBase):
     def validate(self, data):
@@ -55,6 +121,13 @@ class ValidateStrExists(ValidationsBase):
         else:
             raise ValidationError('ValidationError: data cannot be empty')
 
+    def compile(self):
+        def validate_str_exists(data):
+            if data is not None and data != '':
+                return data
+            raise ValidationError('ValidationError: data cannot be empty')
+        return validate_str_exists
+
 
 class ValidateNumRange(ValidationsBase):
     def __init__(self, num_from=None, num_to=None):
@@ -66,7 +139,110 @@ class ValidateNumRange(ValidationsBase):
             raise ValidationError('ValidationError: '+str(data)+' is smaller than  '+str(self.num_from))
 
         if self.num_to and data > self.num_to:
-            raise ValidationError('ValidationError: '+str(data)+' is larger than  '+str(self.num_from))
+            raise ValidationError('ValidationError: '+str(data)+' is larger than  '+str(self.num_to))
 
         return data
 
+    def compile(self):
+        # the limits are only checked if they are set (and not 0), so only the checks needed are included.
+        num_from = self.num_from
+        num_to = self.num_to
+
+        def too_small(data):
+            raise ValidationError('ValidationError: '+str(data)+' is smaller than  '+str(num_from))
+
+        def too_large(data):
+            raise ValidationError('ValidationError: '+str(data)+' is larger than  '+str(num_to))
+
+        if num_from and num_to:
+            def validate_num_range(data):
+                if data < num_from:
+                    too_small(data)
+                if data > num_to:
+                    too_large(data)
+                return data
+        elif num_from:
+            def validate_num_range(data):
+                if data < num_from:
+                    too_small(data)
+                return data
+        elif num_to:
+            def validate_num_range(data):
+                if data > num_to:
+                    too_large(data)
+                return data
+        else:
+            def validate_num_range(data):
+                return data
+
+        return validate_num_range
+
+    def validate_many(self, data):
+        return self.compile_many()(data)
+
+    def compile_many(self):
+        # only the smallest and largest items need to be checked, min() and max() do that without a python level loop.
+        check = self.compile()
+
+        def validate_num_range_many(data):
+            if len(data):
+                check(min(data))
+                check(max(data))
+            return data
+        return validate_num_range_many
+
+
+_MAX_COMPILED = 1024
+_compiled = {}
+
+
+def compile_validations(validations, many=False):
+    """
+    compiles a list of validations into a single function that runs each of them and returns the data.
+
+    Lists of validations that validate the same way (see :py:meth:`ValidationsBase.compile_key`) return the same
+    function.
+
+    :param validations: a list of validation objects, (or None)
+    :param bool many: if True, the function validates each item in a sequence (see
+        :py:meth:`ValidationsBase.validate_many`)
+    :return: the function, or None if there are no validations.
+    """
+    if not validations:
+        return None
+
+    tmp_keys = [many]
+    for v in validations:
+        tmp_key = v.compile_key()
+        if tmp_key is None:
+            tmp_key = (id(v),)
+        tmp_keys.append(tmp_key)
+    tmp_keys = tuple(tmp_keys)
+
+    try:
+        return _compiled[tmp_keys]
+    except KeyError:
+        pass
+
+    if many:
+        tmp_checks = tuple(v.compile_many() for v in validations)
+    else:
+        tmp_checks = tuple(v.compile() for v in validations)
+
+    if len(tmp_checks) == 1:
+        check = tmp_checks[0]
+
+        def run_validations(data):
+            check(data)
+            return data
+    else:
+        def run_validations(data):
+            for check in tmp_checks:
+                check(data)
+            return data
+
+    if len(_compiled) >= _MAX_COMPILED:
+        _compiled.clear()
+    _compiled[tmp_keys] = run_validations
+    return run_validations
+
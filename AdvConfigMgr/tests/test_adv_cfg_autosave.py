@@ -0,0 +1,65 @@
+__author__ = 'dstrohl'
+
+import unittest
+import tempfile
+import time
+from pathlib import Path
+
+from AdvConfigMgr.advconfigmgr import ip
+from AdvConfigMgr.benchmarks.bench_threading import ThreadSafeConfigManager
+from AdvConfigMgr.config_storage import ConfigFileStorage
+
+
+class TestAutosave(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = Path(self.tmp_dir.name, 'test.ini')
+        self.c = ThreadSafeConfigManager(storage_managers=ConfigFileStorage,
+                                         storage_config={'file': {'filename': self.filename}})
+        self.c.add_section('section1')
+        self.c['section1'].add({'name': 'option1', 'default_value': 'default'},
+                               {'name': 'option2', 'default_value': 'default'})
+
+    def tearDown(self):
+        self.c.disable_autosave(flush=False)
+        self.tmp_dir.cleanup()
+
+    def wait_for_write(self, autosave, writes=1, timeout=5.0):
+        tmp_end = time.monotonic() + timeout
+        while autosave.stats()['writes'] < writes and time.monotonic() < tmp_end:
+            time.sleep(0.01)
+
+    def test_coalesced(self):
+        autosave = self.c.enable_autosave(delay=0.1)
+        self.c['section1.option1'] = 'one'
+        self.c['section1.option2'] = 'two'
+        self.c['section1.option1'] = 'three'
+
+        self.wait_for_write(autosave)
+        tmp_text = self.filename.read_text()
+        self.assertIn('option1 = three', tmp_text)
+        self.assertIn('option2 = two', tmp_text)
+
+        tmp_stats = autosave.stats()
+        self.assertEqual(tmp_stats['writes'], 1)
+        self.assertEqual(tmp_stats['changes'], 3)
+        self.assertGreaterEqual(tmp_stats['latency']['max'], 0.1)
+        self.assertFalse(autosave.pending)
+
+    def test_flush_and_stop(self):
+        autosave = self.c.enable_autosave(delay=60)
+        self.assertFalse(autosave.flush())
+
+        self.c['section1.option1'] = 'one'
+        self.assertTrue(autosave.pending)
+        self.assertTrue(autosave.flush())
+        self.assertIn('option1 = one', self.filename.read_text())
+
+        # unsaved changes are written when the autosave is stopped.
+        self.c['section1.option2'] = 'two'
+        self.c.disable_autosave()
+        self.assertIn('option2 = two', self.filename.read_text())
+        self.assertEqual(autosave.stats()['writes'], 2)
+        self.assertIsNone(self.c.autosave)
@@ -0,0 +1,28 @@
+__author__ = 'dstrohl'
+
+import unittest
+
+from AdvConfigMgr.benchmarks.bench_lifecycle import run_lifecycle, compare_results, generate_config, generate_ini, \
+    STAGES
+
+
+class TestLifecycleBenchmark(unittest.TestCase):
+
+    def test_generate(self):
+        tmp_config = generate_config(sections=2, options=4, depth=2)
+        self.assertEqual(len(tmp_config), 2)
+        self.assertEqual(len(tmp_config[0]['options']), 4 + 3)
+        self.assertEqual(tmp_config[1]['options'][-1]['default_value'], 'i2-%(interp1)')
+
+        tmp_ini = generate_ini(tmp_config)
+        self.assertEqual(tmp_ini[0], '[SECTION0]')
+        self.assertEqual(len(tmp_ini), 2 + 8)
+
+    def test_run(self):
+        tmp_ret = run_lifecycle(sections=2, options=4, depth=2, repeat=1)
+        self.assertEqual(set(tmp_ret['results']), set(STAGES))
+        self.assertEqual(tmp_ret['results']['get']['ops'], 8)
+        self.assertEqual(tmp_ret['params']['depth'], 2)
+
+        tmp_compare = compare_results(tmp_ret, tmp_ret)
+        self.assertEqual(tmp_compare['write'], 1.0)
@@ -0,0 +1,130 @@
+__author__ = 'dstrohl'
+
+import unittest
+import queue
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+
+
+class TestConfigEvents(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('db_main')
+        self.c.add_section('db_backup')
+        self.c.add_section('web')
+        self.c['db_main'].add(host='localhost', port=1)
+        self.c['db_backup'].add(host='backup', port=2)
+        self.c['web'].add(host='web', port=3)
+        self.events = []
+
+    def test_no_cost_without_subscribers(self):
+        self.assertEqual(self.c._change_listeners, [])
+        tmp_sub = self.c.subscribe(self.events.append)
+        self.assertEqual(len(self.c._change_listeners), 1)
+        tmp_sub.cancel()
+        self.assertEqual(self.c._change_listeners, [])
+
+    def test_subscribe_option(self):
+        self.c.subscribe(self.events.append, 'db_main.host')
+        self.c['db_main.port'] = 5
+        self.c['db_main.host'] = 'remote'
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].keys, ['DB_MAIN.host'])
+        self.assertEqual(self.events[0]['DB_MAIN.host'], 'remote')
+
+    def test_subscribe_section_glob(self):
+        self.c.subscribe(self.events.append, 'db_*')
+        self.c.set_many({'db_main.host': 'a', 'db_backup.host': 'b', 'web.host': 'c'})
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0].keys, ['DB_MAIN.host', 'DB_BACKUP.host'])
+        self.assertEqual(self.events[0].sections, ['DB_MAIN', 'DB_BACKUP'])
+        self.assertEqual(self.events[0].values(), {'DB_MAIN.host': 'a', 'DB_BACKUP.host': 'b'})
+
+    def test_manager_and_read_coalesced(self):
+        self.c.subscribe(self.events.append)
+        self.c.read(data={'web': {'host': 'new', 'port': 8}, 'db_main': {'port': 9}})
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(sorted(self.events[0].keys), ['DB_MAIN.port', 'WEB.host', 'WEB.port'])
+
+    def test_queue(self):
+        q = queue.Queue()
+        tmp_sub = self.c.subscribe(queue=q, key='web.*')
+        self.c['web.port'] = 10
+        self.c['db_main.port'] = 10
+
+        self.assertEqual(q.get_nowait().keys, ['WEB.port'])
+        self.assertTrue(q.empty())
+
+        self.c.unsubscribe(tmp_sub)
+        self.c['web.port'] = 11
+        self.assertTrue(q.empty())
+
+
+    def test_failing_callback(self):
+        tmp_events = []
+
+        def bad_callback(event):
+            raise ValueError('bad callback')
+
+        bad_sub = self.c.subscribe(bad_callback)
+        self.c.subscribe(tmp_events.append)
+
+        def bad_listener(options):
+            raise ValueError('bad listener')
+
+        self.c._change_listeners.insert(0, bad_listener)
+        tmp_listened = []
+        self.c._change_listeners.append(tmp_listened.append)
+
+        # the set does not fail, and the other subscriptions and listeners still get the change
+        self.c['db_main.port'] = 5
+        self.assertEqual(self.c['db_main.port'], 5)
+        self.assertEqual(len(tmp_events), 1)
+        self.assertEqual(len(tmp_listened), 1)
+        self.assertEqual(bad_sub.errors, 1)
+        self.assertIsInstance(bad_sub.last_error, ValueError)
+        self.assertEqual(str(self.c.last_listener_error), 'bad listener')
+
+
+class TestGenerations(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('db')
+        self.c.add_section('web')
+        self.c['db'].add({'name': 'host', 'default_value': 'localhost'}, {'name': 'port', 'default_value': 1})
+        self.c['web'].add({'name': 'host', 'default_value': 'web'})
+
+    def test_generations(self):
+        tmp_db = self.c['db']
+        tmp_gen = self.c.generation
+        tmp_db_gen = tmp_db.generation
+        tmp_web_gen = self.c['web'].generation
+
+        self.c['db.host'] = 'remote'
+        self.assertGreater(self.c.generation, tmp_gen)
+        self.assertEqual(tmp_db.generation, self.c.generation)
+        self.assertEqual(tmp_db.item('host').generation, self.c.generation)
+        self.assertEqual(self.c['web'].generation, tmp_web_gen)
+        self.assertLess(tmp_db.item('port').generation, tmp_db.generation)
+
+        # setting the same value is not a change
+        tmp_gen = self.c.generation
+        self.c['db.host'] = 'remote'
+        self.assertEqual(self.c.generation, tmp_gen)
+
+        for action in (lambda: tmp_db.item('host').clear(),
+                       lambda: self.c.read(data={'db': {'port': 5}}),
+                       lambda: tmp_db.add({'name': 'user', 'default_value': 'admin'}),
+                       lambda: tmp_db.delete('user', force=True)):
+            tmp_db_gen = tmp_db.generation
+            action()
+            self.assertGreater(tmp_db.generation, tmp_db_gen)
+        self.assertEqual(self.c['web'].generation, tmp_web_gen)
@@ -0,0 +1,185 @@
+__author__ = 'dstrohl'
+
+import unittest
+import os
+import tempfile
+
+from AdvConfigMgr.utils.filehandler import PathHandler, DirectoryScanner, FileHandler
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigFileStorage
+
+
+class TestPathHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        self.files = {}
+        for name, size, mtime in (('b.ini', 30, 100), ('a.ini', 10, 300), (os.path.join('conf.d', 'c.ini'), 20, 200),
+                                  (os.path.join('conf.d', 'deep', 'd.ini'), 5, 400), ('notes.txt', 1, 500)):
+            tmp_path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                f.write('x' * size)
+            os.utime(tmp_path, (mtime, mtime))
+            self.files[name] = tmp_path
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def names(self, handler):
+        return [os.path.relpath(str(f), self.root) for f in handler]
+
+    def handler(self, pattern, **kwargs):
+        return PathHandler(os.path.join(self.root, pattern), return_type='path', scanner=DirectoryScanner(),
+                           **kwargs)
+
+    def test_sort_orders(self):
+        self.assertEqual(self.names(self.handler('*.ini')), ['a.ini', 'b.ini'])
+        self.assertEqual(self.names(self.handler('*.ini', glob_sort_dir='dec')), ['b.ini', 'a.ini'])
+        self.assertEqual(self.names(self.handler('**/*.ini', glob_sort_order='size')),
+                         ['conf.d/deep/d.ini', 'a.ini', 'conf.d/c.ini', 'b.ini'])
+        self.assertEqual(self.names(self.handler('**/*.ini', glob_sort_order='m_date', glob_sort_dir='dec')),
+                         ['conf.d/deep/d.ini', 'a.ini', 'conf.d/c.ini', 'b.ini'])
+
+    def test_recursive(self):
+        self.assertEqual(self.names(self.handler('conf.d/**/*.ini')), ['conf.d/c.ini', 'conf.d/deep/d.ini'])
+        self.assertEqual(self.names(self.handler('*/c.ini')), ['conf.d/c.ini'])
+        self.assertEqual(self.names(self.handler('conf.d/**')), ['conf.d/c.ini', 'conf.d/deep/d.ini'])
+
+    def test_listing_cache(self):
+        scanner = DirectoryScanner()
+        tmp_dir = os.path.join(self.root, 'conf.d')
+        tmp_pattern = os.path.join(tmp_dir, '*.ini')
+        self.assertEqual(len(scanner.scan(tmp_pattern)), 1)
+        self.assertIn(tmp_dir, scanner._cache)
+
+        # the directory was just changed, so a new file in the same clock tick is still found.
+        tmp_new = os.path.join(tmp_dir, 'e.ini')
+        with open(tmp_new, 'w') as f:
+            f.write('e')
+        self.assertEqual(len(scanner.scan(tmp_pattern)), 2)
+
+        # once the directory has not changed for a while, the listing comes from the cache
+        os.utime(tmp_dir, (100, 100))
+        scanner.scan(tmp_pattern)
+        self.assertFalse(scanner._listing(tmp_dir)[2])
+
+        # the cached listing still returns fresh stats
+        os.utime(tmp_new, (50, 50))
+        tmp_stats = dict(scanner.scan(tmp_pattern, with_stat=True))
+        self.assertEqual(tmp_stats[tmp_new].st_mtime, 50)
+
+        # a new file changes the directory, so the directory is read again.
+        with open(os.path.join(tmp_dir, 'f.ini'), 'w') as f:
+            f.write('f')
+        self.assertEqual(len(scanner.scan(tmp_pattern)), 3)
+
+    def test_listing_cache_replaced_dir(self):
+        scanner = DirectoryScanner()
+        tmp_dir = os.path.join(self.root, 'conf.d')
+        tmp_other = os.path.join(self.root, 'other')
+        os.makedirs(tmp_other)
+        for name in ('x.ini', 'y.ini'):
+            with open(os.path.join(tmp_other, name), 'w') as f:
+                f.write(name)
+        os.utime(tmp_dir, (100, 100))
+        os.utime(tmp_other, (100, 100))
+        self.assertEqual(len(scanner.scan(os.path.join(tmp_dir, '*.ini'))), 1)
+
+        # same mtime, but a different directory
+        os.rename(tmp_dir, os.path.join(self.root, 'old'))
+        os.rename(tmp_other, tmp_dir)
+        os.utime(tmp_dir, (100, 100))
+        self.assertEqual(len(scanner.scan(os.path.join(tmp_dir, '*.ini'))), 2)
+
+    def test_listing_cache_lru(self):
+        scanner = DirectoryScanner(max_dirs=2)
+        tmp_dirs = [self.root, os.path.join(self.root, 'conf.d'), os.path.join(self.root, 'conf.d', 'deep')]
+        for tmp_dir in tmp_dirs:
+            scanner.scan(os.path.join(tmp_dir, '*.ini'))
+        self.assertEqual(list(scanner._cache), tmp_dirs[1:])
+
+        scanner.scan(os.path.join(tmp_dirs[1], '*.ini'))
+        scanner.scan(os.path.join(tmp_dirs[0], '*.ini'))
+        self.assertEqual(list(scanner._cache), [tmp_dirs[1], tmp_dirs[0]])
+
+        scanner = DirectoryScanner(max_dirs=0)
+        self.assertEqual(len(scanner.scan(os.path.join(tmp_dirs[1], '*.ini'))), 1)
+        self.assertEqual(len(scanner._cache), 0)
+
+
+class TestFileHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filenames = []
+        for i in range(3):
+            tmp_fn = os.path.join(self.tmp_dir.name, 'file{}.ini'.format(i))
+            with open(tmp_fn, 'w') as f:
+                f.write('contents {}'.format(i))
+            self.filenames.append(tmp_fn)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_reuse(self):
+        pool = FileHandler(max_open=2)
+        with pool.open(self.filenames[0]) as f:
+            self.assertEqual(f.read(), 'contents 0')
+            tmp_handle = f._handle
+            # in use, so a second open gets its own handle
+            with pool.open(self.filenames[0]) as f2:
+                self.assertIsNot(f2, f)
+
+        with pool.open(self.filenames[0]) as f:
+            self.assertIs(f._handle, tmp_handle)
+            self.assertEqual(f.read(), 'contents 0')
+
+        # written in place (same inode), the same handle is rewound and reads the new contents
+        with pool.open(self.filenames[0], 'w') as f:
+            f.write('new')
+        with pool.open(self.filenames[0]) as f:
+            self.assertIs(f._handle, tmp_handle)
+            self.assertEqual(f.read(), 'new')
+        pool.close_all()
+
+    def test_replaced_file(self):
+        pool = FileHandler()
+        with pool.open(self.filenames[0]) as f:
+            tmp_handle = f._handle
+        os.replace(self.filenames[1], self.filenames[0])
+        with pool.open(self.filenames[0]) as f:
+            self.assertEqual(f.read(), 'contents 1')
+        self.assertTrue(tmp_handle.closed)
+        pool.close_all()
+
+    def test_lru(self):
+        pool = FileHandler(max_open=2)
+        tmp_handles = []
+        for fn in self.filenames:
+            with pool.open(fn) as f:
+                tmp_handles.append(f._handle)
+        self.assertEqual(len(pool), 2)
+        self.assertTrue(tmp_handles[0].closed)
+        self.assertFalse(tmp_handles[2].closed)
+        pool.close_all()
+        self.assertTrue(tmp_handles[2].closed)
+
+    def test_storage_leave_open(self):
+        ip.si(True)
+        c = ConfigManager(storage_managers=ConfigFileStorage, default_storage_managers='file',
+                          storage_config={'file': {'filename': self.filenames[2], 'leave_open': True}})
+        c.add_section('section1')
+        c['section1'].add(option1='default')
+        for value in ('one', 'two'):
+            c['section1.option1'] = value
+            c.write(storage_names='file')
+            c['section1.option1'] = 'changed'
+            c.read(storage_names='file')
+            self.assertEqual(c['section1.option1'], value)
+
+        tmp_storage = c.storage['file']
+        self.assertEqual(len(tmp_storage._file_pool), 2)
+        tmp_storage.close_files()
+        self.assertEqual(len(tmp_storage._file_pool), 0)
@@ -0,0 +1,61 @@
+__author__ = 'dstrohl'
+
+import unittest
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_exceptions import NoOptionError
+from AdvConfigMgr.config_interpolation import InterpolationCycleError
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+
+
+class TestResolvedInterpolation(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('section1')
+        self.c.add_section('section2')
+        self.c['section1'].add(a='one', b='%(a)-two', c='%(b)-three', d='%(section2.x)-%(c)')
+        self.c['section2'].add(x='ex')
+
+    def test_chain(self):
+        self.assertEqual(self.c['section1.d'], 'ex-one-two-three')
+        self.assertIn('SECTION1.c', self.c._interpolator._resolved)
+
+        self.c['section1.a'] = 'uno'
+        self.assertEqual(self.c['section1.d'], 'ex-uno-two-three')
+        self.c['section2.x'] = 'why'
+        self.assertEqual(self.c['section1.c'], 'uno-two-three')
+        self.assertEqual(self.c['section1.d'], 'why-uno-two-three')
+
+    def test_resolve_section(self):
+        self.assertEqual(self.c._interpolator.resolve_section('section1'),
+                         {'a': 'one', 'b': 'one-two', 'c': 'one-two-three', 'd': 'ex-one-two-three'})
+
+    def test_cycle(self):
+        with self.assertRaises(InterpolationCycleError) as err:
+            self.c['section1.a'] = '%(c)'
+        self.assertEqual(err.exception.path, ['SECTION1.a', 'SECTION1.c', 'SECTION1.b', 'SECTION1.a'])
+        self.assertEqual(self.c['section1.a'], 'one')
+
+        with self.assertRaises(InterpolationCycleError):
+            self.c.read(data={'section2': {'x': '%(section1.d)'}})
+        self.assertEqual(self.c['section2.x'], 'ex')
+
+    def test_staged_cycle(self):
+        # neither value makes a loop with the current values, but they do together
+        with self.assertRaises(InterpolationCycleError) as err:
+            self.c.set_many({'section2.x': '%(section1.a)', 'section1.a': '%(section2.x)'})
+        self.assertEqual(err.exception.path, ['SECTION1.a', 'SECTION2.x', 'SECTION1.a'])
+        self.assertEqual(self.c['section2.x'], 'ex')
+        self.assertEqual(self.c['section1.a'], 'one')
+
+    def test_deleted(self):
+        self.c['section1'].add(e='%(section2.y)')
+        self.c['section2'].add(y='why')
+        self.assertEqual(self.c['section1.e'], 'why')
+        self.c['section2'].delete('y', force=True)
+        self.assertNotIn('SECTION2.y', self.c._interpolator._resolved)
+        self.assertNotIn('SECTION1.e', self.c._interpolator._resolved)
+        with self.assertRaises(NoOptionError):
+            self.c['section1.e']
@@ -0,0 +1,92 @@
+__author__ = 'dstrohl'
+
+import unittest
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_exceptions import ForbiddenActionError
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+
+
+class FileDictStorage(ConfigSimpleDictStorage):
+    storage_name = 'file_dict'
+    layer_priority = 100
+
+
+class EnvDictStorage(ConfigSimpleDictStorage):
+    storage_name = 'env_dict'
+    layer_priority = 200
+
+
+class LayeredConfigManager(ConfigManager):
+    _layered = True
+
+
+class TestLayers(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = LayeredConfigManager(storage_managers=[FileDictStorage, EnvDictStorage])
+        self.c.add_section('section1')
+        self.c['section1'].add({'name': 'host', 'default_value': 'localhost'},
+                               {'name': 'port', 'default_value': 80, 'cli_options': 'port'},
+                               {'name': 'user', 'default_value': 'admin'})
+        self.events = []
+        self.c.subscribe(self.events.append)
+
+    def test_precedence(self):
+        # the env layer is read first, but the file layer does not replace its values
+        self.c.read(storage_names='env_dict', data={'section1': {'host': 'env_host'}})
+        self.c.read(storage_names='file_dict', data={'section1': {'host': 'file_host', 'port': 8080}})
+
+        self.assertEqual(self.c['section1.host'], 'env_host')
+        self.assertEqual(self.c['section1.port'], 8080)
+        self.assertEqual(self.c.value_source('section1.host'), 'env_dict')
+        self.assertEqual(self.c.value_source('section1.port'), 'file_dict')
+        self.assertEqual(self.c.value_source('section1.user'), 'default')
+        self.assertEqual(self.c['section1'].item('host').layers, {'env_dict': 'env_host', 'file_dict': 'file_host'})
+
+        self.c.read(storage_names='cli', data=['-port', '9000'])
+        self.assertEqual(self.c['section1.port'], 9000)
+        self.assertEqual(self.c.value_source('section1.port'), 'cli')
+
+        self.c['section1.host'] = 'runtime_host'
+        self.assertEqual(self.c.value_source('section1.host'), 'runtime')
+
+        # only the changes to the resulting values are sent
+        self.assertEqual(sorted(len(e.keys) for e in self.events), [1, 1, 1, 1])
+
+    def test_drop_and_reload(self):
+        self.c.read(storage_names='file_dict', data={'section1': {'host': 'file_host', 'port': 8080}})
+        self.c.read(storage_names='env_dict', data={'section1': {'host': 'env_host', 'user': 'env_user'}})
+        del self.events[:]
+
+        self.assertEqual(self.c.drop_layer('env_dict'), 2)
+        self.assertEqual(self.c['section1.host'], 'file_host')
+        self.assertEqual(self.c['section1.user'], 'admin')
+        self.assertEqual(sorted(self.events[0].keys), ['SECTION1.host', 'SECTION1.user'])
+
+        self.c.read(storage_names='env_dict', data={'section1': {'host': 'env_host', 'user': 'env_user'}})
+        del self.events[:]
+
+        # host is the same, user is no longer set in the env layer, port is new.
+        self.assertEqual(self.c.reload_layer('env_dict', data={'section1': {'host': 'env_host', 'port': 1}}), 2)
+        self.assertEqual(self.c['section1.host'], 'env_host')
+        self.assertEqual(self.c['section1.port'], 1)
+        self.assertEqual(self.c['section1.user'], 'admin')
+        self.assertEqual(sorted(self.events[0].keys), ['SECTION1.port', 'SECTION1.user'])
+        self.assertEqual(self.c['section1'].item('port').layers, {'file_dict': 8080, 'env_dict': 1})
+
+        self.c['section1'].item('port').clear()
+        self.assertEqual(self.c['section1.port'], 80)
+        self.assertEqual(self.c.value_source('section1.port'), 'default')
+
+    def test_not_layered(self):
+        c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        c.add_section('section1')
+        c['section1'].add({'name': 'host', 'default_value': 'localhost'})
+        self.assertEqual(c.value_source('section1.host'), 'default')
+        c.read(data={'section1': {'host': 'dict_host'}})
+        self.assertIsNone(c.value_source('section1.host'))
+        self.assertEqual(c['section1'].item('host').layers, {})
+        with self.assertRaises(ForbiddenActionError):
+            c.drop_layer('dict')
@@ -0,0 +1,89 @@
+__author__ = 'dstrohl'
+
+import unittest
+import os
+import tempfile
+import contextlib
+import io
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigFileStorage
+from AdvConfigMgr.config_migrate_tool import find_config_files, migrate_files, main
+
+FACTORY = 'AdvConfigMgr.tests.test_adv_cfg_migrate_tool:make_config'
+
+MIGRATIONS = [{'section_name': 'section1',
+               'stored_version': '0.1',
+               'live_version': '1.0',
+               'actions': [('rename', 'option1', 'option1b'),
+                           ('copy', 'option2', 'option3'),
+                           ('remove', 'old')]}]
+
+OLD_FILE = '[SECTION1]\nSECTION1_version_number = 0.1\noption1 = one\noption2 = two\nold = gone\n'
+
+
+def make_config():
+    ip.si(True)
+    c = ConfigManager(migrations=MIGRATIONS, storage_managers=ConfigFileStorage, default_storage_managers='file')
+    c.add_section('section1', version='1.0', options=[{'name': 'option1b', 'default_value': 'default'},
+                                                      {'name': 'option2', 'default_value': 'default'},
+                                                      {'name': 'option3', 'default_value': 'default'}])
+    return c
+
+
+class TestMigrateTool(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.files = []
+        for sub in ('a', os.path.join('b', 'c')):
+            os.makedirs(os.path.join(self.tmp_dir.name, sub))
+            tmp_fn = os.path.join(self.tmp_dir.name, sub, 'app.ini')
+            with open(tmp_fn, 'w') as f:
+                f.write(OLD_FILE)
+            self.files.append(tmp_fn)
+        with open(os.path.join(self.tmp_dir.name, 'a', 'notes.txt'), 'w') as f:
+            f.write('not a config')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_back(self, filename):
+        c = make_config()
+        c.read(storage_names='file', data=open(filename).read())
+        return c
+
+    def test_find_files(self):
+        self.assertEqual(find_config_files([self.tmp_dir.name]), self.files)
+
+    def test_migrate(self):
+        tmp_results = list(migrate_files(FACTORY, self.files, workers=2))
+
+        self.assertEqual([r.status for r in tmp_results], ['migrated', 'migrated'])
+        self.assertEqual(tmp_results[0].versions, {'SECTION1': ('0.1', '1.0')})
+        self.assertEqual(dict(tmp_results[0].actions), {'rename': 1, 'copy': 1, 'remove': 1})
+
+        c = self.read_back(self.files[1])
+        self.assertEqual(c['section1']['option1b'], 'one')
+        self.assertEqual(c['section1']['option3'], 'two')
+        self.assertNotIn('old', c['section1'])
+        self.assertEqual(os.listdir(os.path.dirname(self.files[1])), ['app.ini'])
+
+        # the files are now at the live version, so nothing is done the second time.
+        tmp_results = list(migrate_files(FACTORY, self.files, workers=1))
+        self.assertEqual([r.status for r in tmp_results], ['current', 'current'])
+
+    def test_errors_and_dry_run(self):
+        with open(self.files[0], 'a') as f:
+            f.write('[UNKNOWN]\nfoo = bar\n')
+
+        tmp_out = io.StringIO()
+        with contextlib.redirect_stdout(tmp_out):
+            tmp_ret = main([FACTORY, self.tmp_dir.name, '--workers', '1', '--dry-run'])
+
+        self.assertEqual(tmp_ret, 1)
+        self.assertIn('2 files: 1 migrated, 0 current, 1 errors (dry run)', tmp_out.getvalue())
+        self.assertIn('actions: copy: 1, remove: 1, rename: 1', tmp_out.getvalue())
+        with open(self.files[1]) as f:
+            self.assertEqual(f.read(), OLD_FILE)
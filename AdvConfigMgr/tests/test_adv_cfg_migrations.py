@@ -1,10 +1,17 @@
 __author__ = 'dstrohl'
 
+import fnmatch
+import itertools
 import unittest
+from collections import OrderedDict
+from unittest import mock
 
 from AdvConfigMgr.advconfigmgr import ConfigManager
+from AdvConfigMgr.config_migrate import MigrationPlan, BaseMigrationActions
 from AdvConfigMgr.config_storage import *
 from AdvConfigMgr.config_exceptions import NoOptionError
+from AdvConfigMgr.utils.version_range import VersionRange, _parse_version
+from distutils.version import LooseVersion, StrictVersion
 
 class TestMigrations(unittest.TestCase):
 
@@ -81,6 +88,45 @@ class TestMigrations(unittest.TestCase):
         with self.assertRaises(NoOptionError):
             tmp_junk = c['section1']['option1']
 
+    def test_options_to_remove(self):
+        test_migration_data = {'section1': {'option1': 'test', 'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '1.0',
+                                'actions': [('rename', 'option1', 'option2')]}]
+
+        test_live_data = [{'name': 'option2', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_migration_data, test_live_data, test_migration_list)
+        tmp_migrations = c['section1']._migrations
+
+        self.assertEqual(tmp_migrations.options_to_remove, ['option1'])
+        self.assertEqual(tmp_migrations.options_to_remove, [])
+
+        # the list is still usable after it has been read.
+        c.read(data=test_migration_data)
+        self.assertEqual(c['section1']['option2'], 'test')
+        self.assertEqual(tmp_migrations.options_to_remove, ['option1'])
+
+    def test_rename_interpolate(self):
+        test_migration_data = {'section1': {'option1': 'test', 'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '1.0',
+                                'actions': [('rename', 'option1', 'option2', 'new-%(__current_value__)'),
+                                            ('copy', 'option3', 'option4', 'copy-%(__current_value__)')]}]
+
+        test_live_data = [{'name': 'option2', 'default_value': 'oldval'},
+                          {'name': 'option4', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_migration_data, test_live_data, test_migration_list)
+        c.read(data={'section1': {'option3': 'three', 'SECTION1_version_number': '0.1'}})
+
+        self.assertEqual(c['section1']['option2'], 'new-test')
+        self.assertEqual(c['section1']['option4'], 'copy-three')
+
     def test_copy(self):
         test_stored_data = {'section1': {'option1': 'test', 'SECTION1_version_number': '0.1'}}
 
@@ -127,3 +173,193 @@ class TestMigrations(unittest.TestCase):
         c = self.run_migrate(test_migration_data, test_live_data, test_migration_list)
 
         self.assertEqual(c['section1']['option1'], 'test')
+
+    def test_glob(self):
+        test_migration_data = {'section1': {'opt_a': 'a', 'opt_b': 'b', 'other': 'o',
+                                            'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '1.0',
+                                'actions': [('interpolate', 'opt_*', 'new_val')]}]
+
+        test_live_data = [{'name': 'opt_a', 'default_value': 'oldval'},
+                          {'name': 'opt_b', 'default_value': 'oldval'},
+                          {'name': 'other', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_migration_data, test_live_data, test_migration_list)
+
+        self.assertEqual(c['section1']['opt_a'], 'new_val')
+        self.assertEqual(c['section1']['opt_b'], 'new_val')
+        self.assertEqual(c['section1']['other'], 'o')
+
+    def test_multi_star_glob(self):
+        test_migration_data = {'section1': {'opt_a': 'a', 'a_x_b_y_c': 'abc', 'a_c': 'ac',
+                                            'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '1.0',
+                                'actions': [('interpolate', 'opt*', 'opt'),
+                                            ('interpolate', 'a*b*c', 'multi')]}]
+
+        test_live_data = [{'name': 'opt_a', 'default_value': 'oldval'},
+                          {'name': 'a_x_b_y_c', 'default_value': 'oldval'},
+                          {'name': 'a_c', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_migration_data, test_live_data, test_migration_list)
+
+        self.assertEqual(c['section1']['opt_a'], 'opt')
+        self.assertEqual(c['section1']['a_x_b_y_c'], 'multi')
+        self.assertEqual(c['section1']['a_c'], 'ac')
+
+    def test_translate_groups(self):
+        # python < 3.11 fnmatch.translate adds named groups (g0, g1, ...) for patterns with more than one '*'
+        tmp_count = itertools.count()
+
+        def old_translate(pattern):
+            return '(?P<g{}>{})'.format(next(tmp_count), fnmatch.translate(pattern))
+
+        with mock.patch('AdvConfigMgr.config_migrate.translate', old_translate):
+            plan = MigrationPlan(OrderedDict([('opt*', {'option_name': 'opt*', 'n': 1}),
+                                              ('a*b*c', {'option_name': 'a*b*c', 'n': 2})]))
+        self.assertEqual(plan.lookup('opt_a')['n'], 1)
+        self.assertEqual(plan.lookup('a_x_b_y_c')['n'], 2)
+        self.assertIsNone(plan.lookup('other'))
+
+    def test_first_declared_wins(self):
+        test_migration_data = {'section1': {'opt_a': 'a', 'opt_b': 'b', 'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '1.0',
+                                'actions': [('interpolate', 'opt_a', 'exact'),
+                                            ('interpolate', 'opt_*', 'glob'),
+                                            ('interpolate', 'opt_b', 'too_late')]}]
+
+        test_live_data = [{'name': 'opt_a', 'default_value': 'oldval'},
+                          {'name': 'opt_b', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_migration_data, test_live_data, test_migration_list)
+
+        self.assertEqual(c['section1']['opt_a'], 'exact')
+        self.assertEqual(c['section1']['opt_b'], 'glob')
+
+    def test_migration_cache(self):
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '1.0',
+                                'actions': [('interpolate', 'option1', 'from_0.1')]}]
+
+        test_live_data = [{'name': 'option1', 'default_value': 'oldval'}]
+
+        c = self.run_migrate({'section1': {'option1': 'test', 'SECTION1_version_number': '0.1'}},
+                             test_live_data, test_migration_list)
+        self.assertEqual(c['section1']['option1'], 'from_0.1')
+
+        tmp_migrations = c['section1']._migrations
+        self.assertIn(('0.1', '1.0'), tmp_migrations._migration_cache)
+
+        # the cached selection is used without checking the version ranges again.
+        tmp_migrations.migrations = []
+        self.assertTrue(tmp_migrations.set_migration('0.1'))
+        self.assertFalse(tmp_migrations.set_migration(None))
+
+    def test_multi_hop(self):
+        test_stored_data = {'section1': {'option1': 'one', 'option2': 'two', 'old': 'gone',
+                                         'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.2',
+                                'live_version': '1.0',
+                                'actions': [('rename', 'option1b', 'option1c'),
+                                            ('copy', 'option2', 'option3')]},
+                               {'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '0.2',
+                                'actions': [('rename', 'option1', 'option1b'),
+                                            ('remove', 'old')]}]
+
+        test_live_data = [{'name': 'option1c', 'default_value': 'oldval'},
+                          {'name': 'option2', 'default_value': 'oldval'},
+                          {'name': 'option3', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_stored_data, test_live_data, test_migration_list)
+
+        self.assertEqual(c['section1']['option1c'], 'one')
+        self.assertEqual(c['section1']['option2'], 'two')
+        self.assertEqual(c['section1']['option3'], 'two')
+        self.assertNotIn('old', c['section1'])
+        self.assertNotIn('option1', c['section1'])
+        self.assertEqual(len(c['section1']._migrations.current_chain), 2)
+
+        # the actions for each option are composed across the chain, following renames.
+        tmp_chain = c['section1']._migrations._current_plan
+        tmp_steps, tmp_keep, tmp_end = tmp_chain.steps('option1')
+        self.assertEqual([a['action_name'] for i, ac, a in tmp_steps], ['_rename', '_rename'])
+        self.assertTrue(tmp_keep)
+        self.assertEqual(tmp_end, 2)
+        self.assertEqual(tmp_chain.steps('option4'), ([], True, 2))
+        self.assertIs(tmp_chain.steps('option1'), tmp_chain.steps('option1'))
+
+    def test_multi_hop_custom_action(self):
+        class SuffixActions(BaseMigrationActions):
+            def _suffix(self, value, option_name):
+                return option_name + '_x', value
+
+        test_stored_data = {'section1': {'option1': 'one', 'SECTION1_version_number': '0.1'}}
+
+        test_migration_list = [{'section_name': 'section1',
+                                'stored_version': '0.2',
+                                'live_version': '1.0',
+                                'actions': [('rename', 'option1_x', 'option1c')]},
+                               {'section_name': 'section1',
+                                'stored_version': '0.1',
+                                'live_version': '0.2',
+                                'action_class': SuffixActions,
+                                'actions': [('suffix', 'option1')]}]
+
+        test_live_data = [{'name': 'option1c', 'default_value': 'oldval'}]
+
+        c = self.run_migrate(test_stored_data, test_live_data, test_migration_list)
+
+        self.assertEqual(c['section1']['option1c'], 'one')
+        # the name returned by a custom action is only known after it runs.
+        self.assertEqual(c['section1']._migrations._current_plan.steps('option1')[2], 1)
+
+
+class TestVersionRange(unittest.TestCase):
+
+    def test_contains(self):
+        vr = VersionRange(sup_ver='3.4', min_ver='3.4.2', max_ver='3.4.8')
+        self.assertIn('3.4.5', vr)
+        self.assertIn(LooseVersion('3.4.2'), vr)
+        self.assertNotIn('3.4.1', vr)
+        self.assertNotIn('3.4.9', vr)
+        self.assertNotIn('3.1', vr)
+        self.assertTrue(vr.lt('3.4.1'))
+        self.assertTrue(vr.gt('3.5'))
+        self.assertFalse(vr.gt('3.4.3'))
+
+        self.assertIn('1.0.0', VersionRange(sup_ver='1.0'))
+        self.assertNotIn('1.0', VersionRange(sup_ver='1.0.1'))
+
+    def test_strict(self):
+        vr = VersionRange(version_class=StrictVersion, min_ver='1.0a1', max_ver='1.0')
+        self.assertIn('1.0b2', vr)
+        self.assertNotIn('1.1', vr)
+        self.assertTrue(vr.lt('0.9'))
+
+    def test_parse_cache(self):
+        vr = VersionRange(sup_ver='2.0')
+        tmp_hits = _parse_version.cache_info().hits
+        self.assertIn('2.0.1', vr)
+        self.assertIn('2.0.1', vr)
+        self.assertGreater(_parse_version.cache_info().hits, tmp_hits)
+
+        # version objects are used as they are, not parsed again
+        tmp_ver = LooseVersion('2.0.2')
+        tmp_info = _parse_version.cache_info()
+        self.assertIn(tmp_ver, vr)
+        self.assertIs(vr._make_ver(tmp_ver), tmp_ver)
+        self.assertEqual(_parse_version.cache_info(), tmp_info)
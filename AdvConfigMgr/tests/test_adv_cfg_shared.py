@@ -0,0 +1,103 @@
+__author__ = 'dstrohl'
+
+import unittest
+import multiprocessing
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+from AdvConfigMgr.config_exceptions import NoOptionError, NoSectionError, ForbiddenActionError
+from AdvConfigMgr.config_shared import SharedConfigView, SharedConfigError
+
+
+def _child_read(name, key, queue):
+    view = SharedConfigView(name)
+    queue.put((view.version, view[key]))
+    view.close()
+
+
+class TestSharedConfig(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('section1')
+        self.c['section1'].add(option1='test1', option2='two-%(option1)')
+        self.publisher = self.c.share()
+        self.view = SharedConfigView(self.publisher.name)
+
+    def tearDown(self):
+        self.view.close()
+        self.c.unshare()
+
+    def test_read_view(self):
+        self.assertEqual(self.view['section1.option1'], 'test1')
+        self.assertEqual(self.view['section1']['option2'], 'two-test1')
+        self.assertIn('section1.option1', self.view)
+        self.assertNotIn('section1.option3', self.view)
+        self.assertEqual(len(self.view), 1)
+        self.assertEqual(self.view.get('section1.option3', fallback='fb'), 'fb')
+
+        with self.assertRaises(NoOptionError):
+            tmp_junk = self.view['section1.option3']
+        with self.assertRaises(NoSectionError):
+            tmp_junk = self.view['section2.option3']
+
+    def test_read_only(self):
+        with self.assertRaises(ForbiddenActionError):
+            self.view['section1.option1'] = 'new'
+        with self.assertRaises(ForbiddenActionError):
+            self.view['section1']['option1'] = 'new'
+
+    def test_new_version_on_read(self):
+        tmp_version = self.view.version
+        self.c.read(data={'section1': {'option1': 'read1'}})
+
+        self.assertEqual(self.view['section1.option2'], 'two-read1')
+        self.assertEqual(self.view.version, tmp_version + 1)
+
+    def test_new_version_on_change(self):
+        tmp_version = self.view.version
+        self.c['section1.option1'] = 'set1'
+        self.assertEqual(self.view['section1.option2'], 'two-set1')
+        self.assertEqual(self.view.version, tmp_version + 1)
+
+        self.c.set_many({'section1.option1': 'many1', 'section1.option3': 'new'})
+        self.assertEqual(self.view['section1.option3'], 'new')
+        self.assertEqual(self.view.version, tmp_version + 2)
+
+    def test_values_decoded_on_lookup(self):
+        self.assertEqual(self.view['section1.option1'], 'test1')
+        self.assertEqual(self.view._values, {('SECTION1', 'option1'): 'test1'})
+
+        self.c['section1.option1'] = 'set1'
+        self.assertEqual(self.view['section1.option2'], 'two-set1')
+        self.assertEqual(self.view._values, {('SECTION1', 'option2'): 'two-set1'})
+
+    def test_only_changed_encoded(self):
+        self.c['section1'].add(option3='plain')
+        self.publisher.publish()
+        tmp_data = self.publisher._encoded[('SECTION1', 'option3')][3]
+
+        self.c['section1.option1'] = 'set1'
+        self.assertIs(self.publisher._encoded[('SECTION1', 'option3')][3], tmp_data)
+        self.assertEqual(self.view['section1.option3'], 'plain')
+        self.assertEqual(self.view['section1.option2'], 'two-set1')
+
+    def test_publish_error(self):
+        tmp_version = self.view.version
+        self.c['section1.option1'] = 'x' * self.publisher._shm.size
+
+        self.assertEqual(self.c['section1.option1'], 'x' * self.publisher._shm.size)
+        self.assertIsInstance(self.publisher.last_error, SharedConfigError)
+        self.assertEqual(self.view['section1.option1'], 'test1')
+        self.assertEqual(self.view.version, tmp_version)
+
+    def test_child_process(self):
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        p = ctx.Process(target=_child_read, args=(self.publisher.name, 'section1.option2', queue))
+        p.start()
+        tmp_ret = queue.get(timeout=30)
+        p.join(30)
+
+        self.assertEqual(tmp_ret, (self.publisher.version, 'two-test1'))
@@ -0,0 +1,77 @@
+__author__ = 'dstrohl'
+
+import unittest
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ConfigOption, ip
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+
+
+class TestConfigStats(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('section1')
+        self.c['section1'].add(option1='test1', option2='two-%(option1)')
+
+    def test_disabled(self):
+        self.assertFalse(self.c.stats_enabled)
+        self.assertEqual(self.c.stats(), {})
+        tmp_opt = self.c['section1']._options['option1']
+        self.assertNotIn('get', tmp_opt.__dict__)
+        self.assertIs(tmp_opt.get.__func__, ConfigOption.get)
+
+    def test_counts(self):
+        self.c.enable_stats()
+        self.assertEqual(self.c['section1.option2'], 'two-test1')
+        self.c['section1.option1'] = 'new'
+        self.c.read(data={'section1': {'option1': 'read1'}})
+
+        tmp_ret = self.c.stats()
+        calls = tmp_ret['calls']
+        # references are resolved from the raw option values, not through option.get
+        self.assertEqual(calls['option.get']['count'], 1)
+        self.assertEqual(calls['option.set']['count'], 2)
+        self.assertGreaterEqual(calls['interpolation.interpolate']['count'], 1)
+        self.assertEqual(calls['storage.dict.read']['count'], 1)
+        self.assertIn('datatype.validated', calls)
+        self.assertGreaterEqual(calls['option.get']['time'], 0)
+        self.assertIn('xform.option', tmp_ret['caches'])
+        self.assertGreater(tmp_ret['caches']['xform.option']['hits'], 0)
+
+    def test_new_options_and_reset(self):
+        self.c.enable_stats()
+        self.c.add_section('section2')
+        self.c['section2'].add(option3='three')
+        self.assertEqual(self.c['section2.option3'], 'three')
+        self.assertEqual(self.c.stats(reset=True)['calls']['option.get']['count'], 1)
+        self.assertEqual(self.c.stats()['calls'], {})
+
+    def test_hook_and_disable(self):
+        tmp_keys = []
+        self.c.enable_stats(hook=lambda key, elapsed: tmp_keys.append(key))
+        tmp_junk = self.c['section1.option1']
+        self.assertIn('option.get', tmp_keys)
+
+        self.c.disable_stats()
+        self.assertEqual(self.c.stats(), {})
+        self.assertNotIn('get', self.c['section1']._options['option1'].__dict__)
+        self.assertNotIn('both_check', self.c._xform.__dict__)
+
+    def test_caches(self):
+        c = ConfigManager(migrations=[{'section_name': 'section1', 'stored_version': '0.1', 'live_version': '1.0',
+                                       'actions': [('pass', 'option1')]}],
+                          storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        c.add_section('section1', version='1.0')
+        c['section1'].add(option1='test1', option2='two-%(option3)', option3='three-%(option1)', list1=['a'])
+        c.enable_stats()
+
+        for i in range(2):
+            self.assertEqual(c['section1.option2'], 'two-three-test1')
+            c.read(data={'section1': {'list1': "['stats_cache_x']", 'SECTION1_version_number': '0.1'}})
+
+        tmp_caches = c.stats()['caches']
+        self.assertEqual(tmp_caches['interpolation.resolved'], {'hits': 1, 'misses': 2, 'ratio': 1 / 3})
+        self.assertEqual(tmp_caches['interpolation.parsed']['hits'], 1)
+        self.assertEqual(tmp_caches['migration.chain']['hits'], 1)
+        self.assertEqual(tmp_caches['datatype.from_string']['hits'], 1)
@@ -270,3 +270,147 @@ class TestStorageManagers(unittest.TestCase):
         self.assertEqual(c['section1']['option2'], 'this')
         self.assertEqual(c['section2']['option4'], 'again')
 
+
+
+class TestEnvStorage(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.environ = {'MYAPP_DB_MAIN__HOST': 'db1',
+                        'MYAPP_DB_MAIN__PORT': '5432',
+                        'MYAPP_DB_MAIN__HOSTS': "['a', 'b']",
+                        'MYAPP_DB_MAIN__UNKNOWN': 'skipped',
+                        'MYAPP_OTHER__HOST': 'skipped',
+                        'MYAPP_NO_SEPARATOR': 'skipped',
+                        'PATH': '/bin'}
+
+        self.c = ConfigManager(storage_managers=ConfigEnvStorage,
+                               storage_config={'env': {'prefix': 'MYAPP', 'environ': self.environ}})
+        self.c.add_section('db_main')
+        self.c['db_main'].add({'name': 'host', 'default_value': 'localhost'},
+                              {'name': 'port', 'default_value': 1},
+                              {'name': 'hosts', 'datatype': 'str_list'})
+
+    def test_read(self):
+        self.c.read(storage_names='env')
+        self.assertEqual(self.c['db_main.host'], 'db1')
+        self.assertEqual(self.c['db_main.port'], 5432)
+        self.assertEqual(self.c['db_main.hosts'], ['a', 'b'])
+        self.assertNotIn('db_main.unknown', self.c)
+        self.assertEqual(self.c.storage['env'].index['OTHER'], {'HOST': 'skipped'})
+
+    def test_cache(self):
+        self.c.read(storage_names='env')
+        self.environ['MYAPP_DB_MAIN__HOST'] = 'db2'
+        self.c.read(storage_names='env')
+        self.assertEqual(self.c['db_main.host'], 'db1')
+
+        self.c.storage['env'].reset_cache()
+        self.c.read(storage_names='env')
+        self.assertEqual(self.c['db_main.host'], 'db2')
+
+        self.c.read(storage_names='env', data={'MYAPP_DB_MAIN__PORT': '10'})
+        self.assertEqual(self.c['db_main.port'], 10)
+
+
+class TestWriteIfChanged(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = Path(self.tmp_dir.name, 'test.ini')
+        self.c = ConfigManager(storage_managers=[ConfigFileStorage, ConfigSimpleDictStorage],
+                               default_storage_managers='file',
+                               storage_config={'file': {'filename': self.filename}})
+        self.c.add_section('section1')
+        self.c.add_section('section2')
+        self.c['section1'].add({'name': 'option1', 'default_value': 'default'})
+        self.c['section2'].add({'name': 'option2', 'default_value': 'default'})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_if_changed(self):
+        self.c['section1.option1'] = 'one'
+        self.c.write()
+        self.assertIn('option1 = one', self.filename.read_text())
+
+        # nothing has changed, so the file is not written.
+        self.filename.write_text('changed outside')
+        self.c.write()
+        self.assertEqual(self.filename.read_text(), 'changed outside')
+
+        self.c.write(force=True)
+        self.assertIn('option1 = one', self.filename.read_text())
+
+        self.filename.write_text('changed outside')
+        self.c['section2.option2'] = 'two'
+        self.c.write()
+        self.assertIn('option2 = two', self.filename.read_text())
+
+        # reading from the file does not make it dirty
+        self.c.read()
+        self.filename.write_text('changed outside')
+        self.c.write()
+        self.assertEqual(self.filename.read_text(), 'changed outside')
+
+    def test_read_then_write(self):
+        self.filename.write_text('# a comment\n[SECTION1]\noption1 = file1\n\n[SECTION2]\noption2 = file2\n')
+        tmp_text = self.filename.read_text()
+
+        # nothing has changed since the read, so the file (and its comment) is left alone.
+        self.c.read()
+        self.assertEqual(self.c['section1.option1'], 'file1')
+        self.c.write()
+        self.assertEqual(self.filename.read_text(), tmp_text)
+
+        self.c['section1.option1'] = 'changed'
+        self.c.write()
+        self.assertIn('option1 = changed', self.filename.read_text())
+
+    def test_unsaved_change_before_read(self):
+        self.filename.write_text('[SECTION1]\noption1 = file1\n\n[SECTION2]\noption2 = file2\n')
+        self.c.read()
+        self.c['section1'].add(option3='default3')
+        self.c['section1.option3'] = 'three'
+
+        # the read does not replace option3, so it is still written.
+        self.c.read()
+        self.c.write()
+        self.assertIn('option3 = three', self.filename.read_text())
+
+    def test_record_storage(self):
+        tmp_records = []
+
+        class RecordStorage(BaseConfigRecordBasedStorageManager):
+            storage_name = 'records'
+
+            def write_record(self, section, option, value):
+                tmp_records.append((section, option, value))
+
+        c = ConfigManager(storage_managers=RecordStorage, default_storage_managers='records')
+        c.add_section('section1')
+        c['section1'].add(option1='one', option2='two')
+        c['section1.option1'] = 'new1'
+        c.write()
+        self.assertEqual(tmp_records, [('SECTION1', 'option1', 'new1')])
+
+        del tmp_records[:]
+        c['section1.option2'] = 'new2'
+        c.write()
+        self.assertEqual(tmp_records, [('SECTION1', 'option2', 'new2')])
+
+    def test_changed_only(self):
+        storage = self.c.storage['dict']
+        self.c['section1.option1'] = 'one'
+        storage._mark_synced()
+        self.assertEqual(storage._dirty_sections(), [])
+        self.assertEqual(storage._get_dict(storage_name='*', changed_only=True), {})
+
+        self.c['section2.option2'] = 'two'
+        self.assertEqual(storage._dirty_sections(), ['SECTION2'])
+        self.assertEqual(storage._get_dict(storage_name='*', changed_only=True), {'SECTION2': {'option2': 'two'}})
+
+        # clearing or deleting an option is a change as well
+        self.c['section1'].item('option1').clear()
+        self.assertEqual(storage._dirty_sections(), ['SECTION1', 'SECTION2'])
@@ -0,0 +1,111 @@
+__author__ = 'dstrohl'
+
+import unittest
+import threading
+import time
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_transform import Xform
+from AdvConfigMgr.utils.rw_lock import ReadWriteLock, NullLock
+from AdvConfigMgr.utils.unset import _UNSET
+from AdvConfigMgr.benchmarks.bench_threading import run_stress, ThreadSafeConfigManager
+
+
+class TestReadWriteLock(unittest.TestCase):
+
+    def test_writer_blocks_readers(self):
+        lock = ReadWriteLock()
+        events = []
+
+        def reader():
+            with lock.read_lock:
+                events.append('read')
+
+        lock.acquire_write()
+        t = threading.Thread(target=reader)
+        t.start()
+        time.sleep(0.05)
+        events.append('write_done')
+        lock.release_write()
+        t.join()
+
+        self.assertEqual(events, ['write_done', 'read'])
+
+    def test_reentrant_write(self):
+        lock = ReadWriteLock()
+        with lock.write_lock:
+            with lock.write_lock:
+                with lock.read_lock:
+                    pass
+        self.assertIsNone(lock._writer)
+
+    def test_readers_share(self):
+        lock = ReadWriteLock()
+        lock.acquire_read()
+
+        def reader():
+            with lock.read_lock:
+                pass
+
+        t = threading.Thread(target=reader)
+        t.start()
+        t.join(1)
+        self.assertFalse(t.is_alive())
+        lock.release_read()
+
+    def test_null_lock(self):
+        lock = NullLock()
+        with lock.write_lock:
+            with lock.read_lock:
+                pass
+        self.assertFalse(lock.is_thread_safe)
+
+
+class TestThreadSafeConfig(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+
+    def test_xform_state_per_thread(self):
+        xf = Xform()
+        xf.option('sec.opt')
+        tmp_ret = []
+
+        t = threading.Thread(target=lambda: tmp_ret.append(xf.section()))
+        t.start()
+        t.join()
+
+        self.assertEqual(tmp_ret, [_UNSET])
+        self.assertEqual(xf.section(), 'SEC')
+
+    def test_lock_class(self):
+        self.assertTrue(ThreadSafeConfigManager()._lock.is_thread_safe)
+        self.assertFalse(ConfigManager()._lock.is_thread_safe)
+
+    def test_stress(self):
+        tmp_ret = run_stress(thread_safe=True, threads=4, seconds=0.3, sections=3, options=5)
+        self.assertGreater(tmp_ret['reads'], 0)
+        self.assertGreater(tmp_ret['writes'], 0)
+        self.assertEqual(tmp_ret['wrong_values'], 0)
+        self.assertEqual(tmp_ret['exceptions'], 0)
+
+    def test_batch_per_thread(self):
+        c = ThreadSafeConfigManager()
+        c.add_section('section1')
+        c['section1'].add(option1='one', option2='two')
+        tmp_calls = []
+        c._change_listeners.append(lambda options: tmp_calls.append((threading.current_thread().name,
+                                                                     [o.name for o in options])))
+
+        def setter():
+            c['section1.option2'] = 'changed'
+
+        with c._batch_changes():
+            c['section1.option1'] = 'batched'
+            t = threading.Thread(target=setter, name='setter')
+            t.start()
+            t.join()
+            # the other thread's change is not held by this batch
+            self.assertEqual(tmp_calls, [('setter', ['option2'])])
+
+        self.assertEqual(tmp_calls[1], (threading.current_thread().name, ['option1']))
@@ -0,0 +1,72 @@
+__author__ = 'dstrohl'
+
+import unittest
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+from AdvConfigMgr.config_exceptions import NoSectionError, ForbiddenActionError
+
+
+class TestTransactions(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('section1')
+        self.c['section1'].add(option1='test1', option2=2)
+        self.changes = []
+        self.c._change_listeners.append(lambda options: self.changes.append([o.path for o in options]))
+
+    def test_set_many(self):
+        tmp_ret = self.c.set_many({'section1.option1': 'new', 'section1.option2': 5, 'section1.option3': 'three'})
+
+        self.assertEqual(tmp_ret, 3)
+        self.assertEqual(self.c['section1.option1'], 'new')
+        self.assertEqual(self.c['section1.option2'], 5)
+        self.assertEqual(self.c['section1.option3'], 'three')
+        self.assertEqual(self.changes, [['SECTION1.option3', 'SECTION1.option1', 'SECTION1.option2']])
+
+    def test_all_or_nothing(self):
+        with self.assertRaises(ValueError):
+            self.c.set_many({'section1.option1': 'new', 'section1.option2': 'not an int'})
+        with self.assertRaises(NoSectionError):
+            self.c.set_many({'section1.option1': 'new', 'section2.option1': 'nope'})
+
+        self.assertEqual(self.c['section1.option1'], 'test1')
+        self.assertEqual(self.c['section1.option2'], 2)
+        self.assertEqual(self.changes, [])
+
+    def test_new_options_all_or_nothing(self):
+        # the new options are created and checked before anything is applied
+        with self.assertRaises(TypeError):
+            self.c.set_many({'section1.option8': 'x', 'section1.option1': 'new', 'section1.option9': object()})
+        self.assertNotIn('option8', self.c['section1'])
+        self.assertEqual(self.c['section1.option1'], 'test1')
+        self.assertEqual(self.changes, [])
+
+        tmp_gen = self.c.generation
+        self.assertEqual(self.c.set_many({'section1.option8': 'x', 'section1.option1': 'new'}), 2)
+        self.assertEqual(self.c.generation, tmp_gen + 1)
+        self.assertEqual(self.c['section1'].item('option8').generation, tmp_gen + 1)
+
+    def test_context(self):
+        with self.c.transaction() as t:
+            t['section1.option1'] = 'new'
+            t['section1.option2'] = 3
+            self.assertEqual(self.c['section1.option1'], 'test1')
+        self.assertEqual(self.c['section1.option1'], 'new')
+        self.assertEqual(len(self.changes), 1)
+
+        with self.assertRaises(ForbiddenActionError):
+            t['section1.option1'] = 'again'
+
+        with self.assertRaises(KeyError):
+            with self.c.transaction() as t:
+                t['section1.option1'] = 'rolled back'
+                raise KeyError('test')
+        self.assertEqual(self.c['section1.option1'], 'new')
+
+    def test_single_set_and_read(self):
+        self.c['section1.option1'] = 'single'
+        self.c.read(data={'section1': {'option1': 'read1', 'option2': 9}})
+        self.assertEqual(self.changes, [['SECTION1.option1'], ['SECTION1.option1', 'SECTION1.option2']])
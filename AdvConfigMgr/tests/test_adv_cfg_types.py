@@ -1,7 +1,12 @@
 __author__ = 'dstrohl'
 
 import unittest
+import ast
 # from AdvConfigMgr.config_types import Xform, _UNSET
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigStringStorage
+from AdvConfigMgr.config_types import DataTypeInt, DataTypeFloat, DataTypeList, DataTypeDict
+from AdvConfigMgr.utils.literal_parser import parse_literal
 
 
 '''
@@ -50,3 +55,52 @@ class TestItemKey(unittest.TestCase):
         self.assertEqual(ik.s, 'SEC5')
         self.assertEqual(ik.o, 'opt6')
 '''
+
+
+class TestStringConversion(unittest.TestCase):
+
+    def assertSameAsLiteralEval(self, value, convert=parse_literal, literal_convert=None):
+        try:
+            expected = ast.literal_eval(value)
+            if literal_convert is not None:
+                expected = literal_convert(expected)
+        except (ValueError, SyntaxError) as err:
+            with self.assertRaises(err.__class__):
+                convert(value)
+        else:
+            tmp_ret = convert(value)
+            self.assertEqual(tmp_ret, expected)
+            self.assertEqual(type(tmp_ret), type(expected))
+
+    def test_parse_literal(self):
+        for value in ('[1, 2, 3]', '[]', '[1,]', '[,]', '[1 2]', '[01]', '[00]', '[--5]', '[+5, -3]',
+                      '[1.5, -2, 1e5, .5, 5.]', '[True, False, None]', "['a', \"b,c\", 'd:e']", "['a\\'b']",
+                      "{'a': 1, 'b': [1]}", "{'a': 1, 'b': 2,}", '{}', "{1: 'a', None: True}", '[[1], 2]', '(1, 2)',
+                      '[0x10]', '[1_000]', '[1.2.3]', "['007']", ' [1, 2]', '[1, 2] '):
+            self.assertSameAsLiteralEval(value)
+
+    def test_datatypes(self):
+        for value in ('5', '-5', '05', '00', '1_000', '5.0', '0x10', 'abc', ' 7 '):
+            self.assertSameAsLiteralEval(value, DataTypeInt().from_string, int)
+        for value in ('5', '1.5', '1e999', 'nan', 'inf', '.5', 'abc', ' 1.5', '1.5 '):
+            self.assertSameAsLiteralEval(value, DataTypeFloat().from_string, float)
+
+    def test_cache(self):
+        dt = DataTypeList()
+        tmp_first = dt.from_string('[1, 2, [3]]')
+        tmp_first[2].append(4)
+        self.assertEqual(dt.from_string('[1, 2, [3]]'), [1, 2, [3]])
+        self.assertEqual(DataTypeDict().from_string("{'a': 1}"), {'a': 1})
+
+    def test_read(self):
+        ip.si(True)
+        c = ConfigManager(storage_managers=ConfigStringStorage, default_storage_managers='string')
+        c.add_section('section1')
+        c['section1'].add(int1=1, float1=1.5, list1=['a'])
+        c['section1'].add({'name': 'dict1', 'default_value': {'a': 1}})
+        c.read(data=['[SECTION1]', 'int1 = 12', 'float1 = 2.5', "list1 = ['x', 'y']", "dict1 = {'b': 2}"])
+
+        self.assertEqual(c['section1.int1'], 12)
+        self.assertEqual(c['section1.float1'], 2.5)
+        self.assertEqual(c['section1.list1'], ['x', 'y'])
+        self.assertEqual(c['section1.dict1'], {'b': 2})
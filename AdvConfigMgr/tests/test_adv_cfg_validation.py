@@ -0,0 +1,106 @@
+__author__ = 'dstrohl'
+
+import unittest
+from array import array
+
+from AdvConfigMgr.advconfigmgr import ConfigManager, ip
+from AdvConfigMgr.config_storage import ConfigSimpleDictStorage
+from AdvConfigMgr.config_types import DataTypeInt
+from AdvConfigMgr.config_validation import ValidateNumRange, ValidateStrExists, ValidateStrEqual, ValidationError, \
+    ValidationsBase, compile_validations
+
+
+class ValidateEven(ValidationsBase):
+    def validate(self, data):
+        if data % 2:
+            raise ValidationError('odd')
+        return data
+
+
+class TestCompiledValidations(unittest.TestCase):
+
+    def test_compiled(self):
+        check = compile_validations([ValidateNumRange(1, 100), ValidateEven()])
+        self.assertEqual(check(50), 50)
+        for value in (0, 101, 51):
+            with self.assertRaises(ValidationError):
+                check(value)
+
+        check = compile_validations([ValidateStrExists(), ValidateStrEqual('abc')])
+        self.assertEqual(check('abc'), 'abc')
+        with self.assertRaises(ValidationError):
+            check('')
+
+        check = compile_validations([ValidateNumRange(num_to=10)])
+        self.assertEqual(check(-5), -5)
+        with self.assertRaises(ValidationError):
+            check(11)
+
+        self.assertIsNone(compile_validations(None))
+
+    def test_shared(self):
+        dt1 = DataTypeInt(validations=ValidateNumRange(1, 100))
+        dt2 = DataTypeInt(validations=[ValidateNumRange(1, 100)])
+        dt3 = DataTypeInt(validations=ValidateNumRange(1, 10))
+        self.assertIs(dt1._compiled_validations, dt2._compiled_validations)
+        self.assertIsNot(dt1._compiled_validations, dt3._compiled_validations)
+
+    def test_option(self):
+        ip.si(True)
+        c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        c.add_section('section1')
+        c['section1'].add({'name': 'option1', 'default_value': 5, 'validations': ValidateNumRange(1, 10)},
+                          {'name': 'option2', 'default_value': 6, 'validations': ValidateNumRange(1, 10)})
+
+        c['section1.option1'] = 7
+        with self.assertRaises(ValidationError):
+            c['section1.option2'] = 11
+        with self.assertRaises(ValidationError):
+            c.read(data={'section1': {'option1': 20}})
+        self.assertEqual(c['section1.option1'], 7)
+
+
+class TestTypedContainers(unittest.TestCase):
+
+    def setUp(self):
+        ip.si(True)
+        self.c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict')
+        self.c.add_section('section1')
+        self.c['section1'].add({'name': 'ports', 'datatype': 'int_list', 'default_value': [80],
+                                'validations': ValidateNumRange(1, 65535)},
+                               {'name': 'port_map', 'datatype': 'int_dict',
+                                'validations': ValidateNumRange(1, 65535)},
+                               {'name': 'hosts', 'datatype': 'str_list', 'validations': ValidateStrExists()})
+
+    def test_int_list(self):
+        self.c['section1.ports'] = list(range(1, 20000))
+        tmp_ports = self.c['section1.ports']
+        self.assertIsInstance(tmp_ports, array)
+        self.assertEqual(tmp_ports.typecode, 'q')
+        self.assertEqual(len(tmp_ports), 19999)
+
+        with self.assertRaises(ValidationError):
+            self.c['section1.ports'] = list(range(0, 100))
+        with self.assertRaises(TypeError):
+            self.c['section1.ports'] = [1, 'a']
+        self.assertEqual(len(self.c['section1.ports']), 19999)
+
+        self.c.read(data={'section1': {'ports': '[22, 443]'}})
+        self.assertEqual(self.c['section1.ports'].tolist(), [22, 443])
+        self.assertEqual(self.c['section1'].item('ports').to_write(as_string=True), '[22, 443]')
+
+    def test_dict_and_str_list(self):
+        self.c['section1.port_map'] = {'http': 80, 'https': '443'}
+        self.assertEqual(self.c['section1.port_map'], {'http': 80, 'https': 443})
+        with self.assertRaises(ValidationError):
+            self.c['section1.port_map'] = {'bad': 70000}
+
+        self.c['section1.hosts'] = ['a', 'b']
+        with self.assertRaises(ValidationError):
+            self.c['section1.hosts'] = ['a', '']
+        self.assertEqual(self.c['section1.hosts'], ['a', 'b'])
+
+    def test_validate_many(self):
+        self.assertEqual(ValidateNumRange(1, 10).validate_many(array('q', [1, 5, 10])), array('q', [1, 5, 10]))
+        with self.assertRaises(ValidationError):
+            ValidateEven().validate_many([2, 4, 5])
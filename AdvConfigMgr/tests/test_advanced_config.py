@@ -394,6 +394,46 @@ class TestConfigManager(unittest.TestCase):
 
         self.assertEqual(tmp_resp, 'hello')
 
+    def test_cli_incremental(self):
+
+        s = self.c['section1']
+        s.add(dict(name='test', cli_options=self.cli_args_std))
+
+        cli = self.c.storage['cli']
+        self.assertIsNone(cli._cli_parser)
+
+        self.c.read(storage_names='cli', data=['-std=hello'])
+        tmp_parser = cli.cli_parser
+
+        # adding an option after the parser is built adds the argument to the same parser.
+        s.add(dict(name='test2', cli_options=self.cli_args_help))
+        self.c.read(storage_names='cli', data=['-std=hello', '-hlp=again'])
+
+        self.assertIs(cli.cli_parser, tmp_parser)
+        self.assertEqual(s['test2'], 'again')
+        self.assertIs(cli._cli_dests['test2'], s.item('test2'))
+
+    def test_cli_only_passed_args(self):
+
+        c = ConfigManager(storage_managers=ConfigSimpleDictStorage, default_storage_managers='dict',
+                          storage_config={'cli': {'only_passed_args': True}})
+        c.add_section('section1')
+        s = c['section1']
+        s.add(dict(name='test1', cli_options=self.cli_args_std, default_value='default1'),
+              dict(name='test2', cli_options=self.cli_args_help, default_value='default2'))
+
+        c.read(data={'section1': {'test1': 'dict1', 'test2': 'dict2'}})
+        c.read(storage_names='cli', data=['-std=cli1'])
+
+        self.assertEqual(s['test1'], 'cli1')
+        self.assertEqual(s['test2'], 'dict2')
+        self.assertEqual(c.storage['cli'].last_option_count, 1)
+
+        # only the passed option is locked
+        c.read(data={'section1': {'test1': 'dict1b', 'test2': 'dict2b'}})
+        self.assertEqual(s['test1'], 'cli1')
+        self.assertEqual(s['test2'], 'dict2b')
+
     def test_cli_nargs(self):
 
         s = self.c['section1']
@@ -492,6 +532,30 @@ class TestConfigManager(unittest.TestCase):
         self.assertIn('section1.option1', c)
         self.assertNotIn('section1.option4', c)
 
+    def test_get_many(self):
+        c = ConfigManager()
+        c.add_section('section1')
+        c.add_section('section2')
+        c['section1'].add(option1='test1', option2='%(option1)-two', option3='three-%(section2.option1)-%(option2)')
+        c['section2'].add(option1='sec2')
+
+        tmp_ret = c.get_many(['section1.option1', 'section1.option2', 'section1.option3', 'section2.option1'])
+        self.assertEqual(tmp_ret, {'section1.option1': 'test1',
+                                   'section1.option2': 'test1-two',
+                                   'section1.option3': 'three-sec2-test1-two',
+                                   'section2.option1': 'sec2'})
+
+        self.assertEqual(c.get_many(['section1.option2'], raw=True), {'section1.option2': '%(option1)-two'})
+        self.assertEqual(c.get_many(['section1.nope', 'section3.nope'], fallback=None),
+                         {'section1.nope': None, 'section3.nope': None})
+        with self.assertRaises(NoOptionError):
+            c.get_many(['section1.nope'])
+        with self.assertRaises(NoSectionError):
+            c.get_many(['section3.nope'])
+
+        self.assertEqual(c['section1'].get_many(['option2', 'section2.option1']),
+                         {'option2': 'test1-two', 'section2.option1': 'sec2'})
+
     def test_debug(self):
         c = ConfigManager()
         c.add('section1')
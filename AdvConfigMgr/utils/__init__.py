@@ -3,4 +3,5 @@ __author__ = 'dstrohl'
 from AdvConfigMgr.utils.indented_print import IndentedPrinter
 from AdvConfigMgr.utils.base_utils import *
 from AdvConfigMgr.utils.filehandler import *
-from AdvConfigMgr.utils.version_range import VersionRange
\ No newline at end of file
+from AdvConfigMgr.utils.version_range import VersionRange
+from AdvConfigMgr.utils.rw_lock import ReadWriteLock, NullLock
@@ -1,8 +1,179 @@
 __author__ = 'dstrohl'
 
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from fnmatch import translate
 from pathlib import Path
 
-__all__ = ['PathHandler', ]
+__all__ = ['PathHandler', 'DirectoryScanner', 'default_scanner', 'FileHandler', 'PooledFile']
+
+_MAGIC_CHARS = ('*', '?', '[')
+_MATCH_ALL = re.compile(translate('*')).match
+
+# the stat attribute used for each sort order (alpha sorts do not need to stat the files).
+_SORT_STAT_ATTRS = {'m_date': 'st_mtime', 'c_date': 'st_ctime', 'size': 'st_size'}
+
+
+def _has_magic(part):
+    for c in _MAGIC_CHARS:
+        if c in part:
+            return True
+    return False
+
+
+class DirectoryScanner(object):
+    """
+    Finds the files matching glob patterns using :py:func:`os.scandir`.
+
+    The listing of each directory scanned is cached, and is only re-read when the directory changes, (files added,
+    removed or renamed).  File stats (for sorting by date or size) are taken from the scan when the directory is read,
+    and with a fresh stat when the listing comes from the cache, (changing the contents of a file does not change the
+    directory).
+
+    A directory is treated as changed if its modification time, inode, size or link count is different from when it was
+    read.  The modification time is only as precise as the file system, (2 seconds on FAT, 1 second on some older or
+    network file systems), so a listing read less than racy_seconds after the directory was last changed is not
+    trusted, and the directory is read again the next time.  A change made more than racy_seconds after the listing was
+    read is always seen, but if the clock of the file system is behind the local clock by more than that, (for example a
+    network share), call :py:meth:`clear` after changing the files or use a scanner without the cache, (max_dirs=0).
+
+    Patterns can use '*', '?', '[...]', and '**' to match any number of directories (symbolic links to directories are
+    not followed for '**').
+
+    :param int max_dirs: the most directory listings to cache, the least recently used ones are dropped first.
+    :param float racy_seconds: how long after a change to a directory a listing of it is not trusted.
+    """
+
+    def __init__(self, max_dirs=256, racy_seconds=2.0):
+        self.max_dirs = max_dirs
+        self._racy_ns = int(racy_seconds * 1000000000)
+
+        # {directory path: (signature, [(name, path, is_dir, is_file, is_link, DirEntry), ...], {name: entry}, racy)},
+        # in least recently used order.
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    @staticmethod
+    def _signature(tmp_stat):
+        return tmp_stat.st_mtime_ns, tmp_stat.st_ino, tmp_stat.st_dev, tmp_stat.st_size, tmp_stat.st_nlink
+
+    def _listing(self, path):
+        """
+        :return: entries, names, fresh.  fresh is True if the directory was read (not from the cache).
+        """
+        tmp_dir = path or '.'
+        try:
+            tmp_stat = os.stat(tmp_dir)
+        except OSError:
+            with self._lock:
+                self._cache.pop(path, None)
+            return [], {}, True
+
+        tmp_signature = self._signature(tmp_stat)
+        with self._lock:
+            tmp_cached = self._cache.get(path)
+            if tmp_cached is not None and tmp_cached[0] == tmp_signature and not tmp_cached[3]:
+                self._cache.move_to_end(path)
+                return tmp_cached[1], tmp_cached[2], False
+
+        tmp_read_ns = time.time_ns()
+        tmp_entries = []
+        try:
+            with os.scandir(tmp_dir) as it:
+                for entry in it:
+                    try:
+                        tmp_is_dir = entry.is_dir()
+                        tmp_is_file = entry.is_file()
+                        tmp_is_link = entry.is_symlink()
+                    except OSError:
+                        continue
+                    tmp_entries.append((entry.name, os.path.join(path, entry.name), tmp_is_dir, tmp_is_file,
+                                        tmp_is_link, entry))
+        except OSError:
+            return [], {}, True
+
+        tmp_names = {e[0]: e for e in tmp_entries}
+        if self.max_dirs > 0:
+            # a change in the same tick of the file system clock as the read would not change the mtime.
+            tmp_racy = tmp_stat.st_mtime_ns >= tmp_read_ns - self._racy_ns
+            with self._lock:
+                self._cache[path] = (tmp_signature, tmp_entries, tmp_names, tmp_racy)
+                self._cache.move_to_end(path)
+                while len(self._cache) > self.max_dirs:
+                    self._cache.popitem(last=False)
+        return tmp_entries, tmp_names, True
+
+    @staticmethod
+    def _split_pattern(pattern):
+        """
+        :return: the directory to start in (the leading part of the pattern without wildcards), and the list of the
+            remaining parts.
+        """
+        tmp_parts = pattern.replace(os.sep, '/').split('/')
+        tmp_base = []
+        while len(tmp_parts) > 1 and not _has_magic(tmp_parts[0]):
+            tmp_base.append(tmp_parts.pop(0))
+
+        if tmp_base == ['']:
+            return '/', tmp_parts
+        return '/'.join(tmp_base), tmp_parts
+
+    def scan(self, pattern, with_stat=False):
+        """
+        :param str pattern: the glob pattern.
+        :param bool with_stat: if True, the stat result for each file is also returned.
+        :return: a list of (path, stat), (stat is None if with_stat is False), in no particular order.
+        """
+        tmp_base, tmp_parts = self._split_pattern(pattern)
+        tmp_matchers = [None if p == '**' else re.compile(translate(p)).match if _has_magic(p) else p
+                        for p in tmp_parts]
+        tmp_results = {}
+        self._scan(tmp_base, tmp_matchers, 0, tmp_results, with_stat)
+        return list(tmp_results.items())
+
+    def _scan(self, path, matchers, index, results, with_stat):
+        tmp_matcher = matchers[index]
+        tmp_last = index == len(matchers) - 1
+        tmp_entries, tmp_names, tmp_fresh = self._listing(path)
+
+        if tmp_matcher is None:
+            # '**', matches this directory, and any directory below it.
+            if tmp_last:
+                self._scan(path, [_MATCH_ALL], 0, results, with_stat)
+            else:
+                self._scan(path, matchers, index + 1, results, with_stat)
+            for name, entry_path, is_dir, is_file, is_link, entry in tmp_entries:
+                if is_dir and not is_link:
+                    self._scan(entry_path, matchers, index, results, with_stat)
+            return
+
+        if isinstance(tmp_matcher, str):
+            tmp_entry = tmp_names.get(tmp_matcher)
+            tmp_entries = [] if tmp_entry is None else [tmp_entry]
+        else:
+            tmp_entries = [e for e in tmp_entries if tmp_matcher(e[0])]
+
+        for name, entry_path, is_dir, is_file, is_link, entry in tmp_entries:
+            if not tmp_last:
+                if is_dir:
+                    self._scan(entry_path, matchers, index + 1, results, with_stat)
+            elif is_file and entry_path not in results:
+                if not with_stat:
+                    results[entry_path] = None
+                elif tmp_fresh:
+                    results[entry_path] = entry.stat()
+                else:
+                    results[entry_path] = os.stat(entry_path)
+
+
+default_scanner = DirectoryScanner()  #: the scanner used by PathHandler, shared so the directory cache is reused.
 
 
 class PathHandler(object):
@@ -21,7 +192,9 @@ class PathHandler(object):
                  verify='call',
                  on_does_not_exist='raise',
                  default_open_mode='rw',
-                 default_open_encoding=None):
+                 default_open_encoding=None,
+                 scanner=None,
+                 file_pool=None):
         """
         :param str sort_order: 'alpha', 'm_date', 'c_date', or 'size'
         :param str sort_dir: 'asc', 'dec'
@@ -32,6 +205,9 @@ class PathHandler(object):
             do not verify
         :param str on_does_not_exist: 'raise', 'ignore' if a file does not exist, will raise a FileDoesNotExist,
             or ignore it.
+        :param DirectoryScanner scanner: the scanner used to find the files matching globs, (defaults to
+            default_scanner)
+        :param FileHandler file_pool: if passed, files are opened through this pool so their handles can be reused.
 
         if file does not exist and ignore is set, a list of failed files can be called from
         PathHandler.last_failed_paths.
@@ -42,10 +218,12 @@ class PathHandler(object):
         self._sort_order = glob_sort_order.lower()
         self._return_type = return_type.lower()
         self._force_return = force_return
-        self._verify = verify.lower()
+        self._verify_mode = verify.lower()
         self._raise_on_does_not_exist = on_does_not_exist.lower() == 'raise'
         self._default_open_mode = default_open_mode
         self._default_open_encoding = default_open_encoding
+        self._scanner = scanner or default_scanner
+        self._file_pool = file_pool
 
         if glob_sort_dir == 'asc':
             self._sort_dir = False
@@ -66,12 +244,12 @@ class PathHandler(object):
         self._default_open_mode = mode
 
     def _verify(self, action, path):
-        if self._verify == 'none':
+        if self._verify_mode == 'none':
             return True
 
         tmp_ret = True
 
-        if self._verify == action or self._verify == 'both':
+        if self._verify_mode == action or self._verify_mode == 'both':
 
             if not isinstance(path, Path):
                 tmp_ret = path.readable() or path.writable()
@@ -86,46 +264,34 @@ class PathHandler(object):
                     self._last_failed_paths.append(path)
                     self._last_failed_filenames.append(str(path))
 
+        return tmp_ret
+
     def append(self, file):
         if file is not None:
             if not isinstance(file, (list, tuple)):
                 file = [file]
             for f in file:
-                self._file_list.extend(self._parse_for_glob(f))
-
-    def _make_item_dict(self, path):
-        tmp_dict = dict(name=path)
-        if self._sort_order == 'm_date':
-            tmp_dict['sort'] = path.stat().st_mtime()
-        elif self._sort_order == 'c_date':
-            tmp_dict['sort'] = path.stat().st_ctime()
-        elif self._sort_order == 'size':
-            tmp_dict['sort'] = path.stat().st_size()
-        else:
-            tmp_dict['sort'] = str(path.name)
-
-        return tmp_dict
+                if isinstance(f, (list, tuple)):
+                    self.append(f)
+                else:
+                    self._file_list.extend(self._parse_for_glob(f))
 
     def _parse_for_glob(self, glob):
 
         if not isinstance(glob, str):
-            return glob
+            return [glob]
 
-        if "*" in glob or "?" in glob or "[" in glob:
-            tmp_file_list = []
-            tmp_list = []
-            if self._sort_order == 'alpha':
-                tmp_list = sorted(Path('.').glob(glob), reverse=self._sort_dir)
-            else:
-                for file in list(Path('.').glob(glob)):
-                    tmp_list.append(self._make_item_dict(file))
-                tmp_list = sorted(tmp_list, reverse=self._sort_dir)
+        if _has_magic(glob):
+            tmp_stat_attr = _SORT_STAT_ATTRS.get(self._sort_order)
+            tmp_found = self._scanner.scan(glob, with_stat=tmp_stat_attr is not None)
 
-            for file in tmp_list:
-                if self._verify(file):
-                    tmp_file_list.append(file)
+            if tmp_stat_attr is None:
+                tmp_list = sorted((Path(p) for p, st in tmp_found), reverse=self._sort_dir)
+            else:
+                tmp_found = sorted(((getattr(st, tmp_stat_attr), p) for p, st in tmp_found), reverse=self._sort_dir)
+                tmp_list = [Path(p) for key, p in tmp_found]
 
-            return tmp_file_list
+            return [f for f in tmp_list if self._verify('add', f)]
         else:
             return [glob]
 
@@ -146,10 +312,9 @@ class PathHandler(object):
         else:
             mode = force_mode
 
-        if isinstance(file, Path):
-            return file.open(mode=mode, encoding=encoding)
-
-        if isinstance(file, str):
+        if isinstance(file, (Path, str)):
+            if self._file_pool is not None:
+                return self._file_pool.open(file, mode=mode, encoding=encoding)
             return Path(file).open(mode=mode, encoding=encoding)
 
         if force_mode is not None:
@@ -211,41 +376,144 @@ class PathHandler(object):
                                       force_writable=force_writable, force_mode=force_mode, encoding=encoding)
 
 
-'''
-class FileHandler(object):
+
+class PooledFile(object):
     """
-    manages a list of open files, this will:
-    * accept a filename and return a file handle if it is already open, otherwise opens it and returns it,
-    * changes the mode of files if needed
-    * allows for close all
-    * allows setting of default options, encoding, etc.
+    A file handle borrowed from a :py:class:`FileHandler`.  This can be used like the file object, but closing it
+    (or leaving a with block) only flushes it and returns it to the pool.
     """
-    def __init__(self,
-                 keep_files_open=False,
-                 default_encoding=None,
-                 default_mode='r',
-                 default_errors=None):
 
-        self._default_encoding = default_encoding
-        self._default_mode = default_mode
-        self._default_errors = default_errors
-        self._keep_files_open = keep_files_open
-        self._files = {}
+    def __init__(self, pool, key, handle):
+        self._pool = pool
+        self._key = key
+        self._handle = handle
 
-    def register_file(self, filename=None, handle=None, encoding=None, mode='r', errors=None):
+    def close(self):
+        if self._handle is not None:
+            self._pool._release(self._key, self._handle)
+            self._handle = None
 
-        if filename is None and handle is None:
-            raise AttributeError('either filename or handle must be passed')
+    @property
+    def closed(self):
+        return self._handle is None
+
+    def __getattr__(self, item):
+        if self._handle is None:
+            raise ValueError('I/O operation on a file returned to the pool')
+        return getattr(self._handle, item)
 
-        if filename is None:
-            filename = handle.name
-            encoding = handle.encoding
-            mode = handle.mode
-            errors = handle.errors
+    def __iter__(self):
+        return iter(self._handle)
 
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return 'PooledFile [{}]'.format(self._key[0])
+
+
+class FileHandler(object):
+    """
+    A pool of open files, so files that are read or written repeatedly do not have to be opened each time.
+
+    * :py:meth:`open` returns the open handle for a filename and mode if there is one (rewound to the start, and
+      truncated for writing), otherwise it opens the file.
+    * the handles are checked against the file's inode before they are reused, so a file that has been replaced (for
+      example by an editor or an atomic write) is opened again.
+    * no more than max_open files are kept open, the least recently used ones are closed first.
+    * a handle that is in use (not yet closed / returned) is not shared, a second open of the same file gets its own
+      handle.
+
+    :param int max_open: the most files to keep open.
+    :param str default_encoding: the encoding used if one is not passed to open.
+    """
+
+    def __init__(self, max_open=32, default_encoding=None):
+        self.max_open = max_open
+        self.default_encoding = default_encoding
+
+        # {(absolute path, mode, encoding): [handle, st_dev, st_ino, in_use]}, in least recently used order.
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, filename, mode='r', encoding=None):
+        """
+        :return: a :py:class:`PooledFile`
+        """
+        if encoding is None:
+            encoding = self.default_encoding
+        key = (os.path.abspath(str(filename)), mode, encoding)
+
+        with self._lock:
+            tmp_rec = self._files.get(key)
+            if tmp_rec is not None:
+                if tmp_rec[3]:
+                    return open(key[0], mode=mode, encoding=encoding)
+                if self._still_valid(key[0], tmp_rec):
+                    tmp_handle = tmp_rec[0]
+                    tmp_handle.seek(0)
+                    if tmp_handle.writable() and 'w' in mode:
+                        tmp_handle.truncate()
+                    tmp_rec[3] = True
+                    self._files.move_to_end(key)
+                    return PooledFile(self, key, tmp_handle)
+                self._close(key)
+
+            tmp_handle = open(key[0], mode=mode, encoding=encoding)
+            tmp_stat = os.fstat(tmp_handle.fileno())
+            self._files[key] = [tmp_handle, tmp_stat.st_dev, tmp_stat.st_ino, True]
+            self._trim()
+            return PooledFile(self, key, tmp_handle)
+
+    @staticmethod
+    def _still_valid(path, rec):
+        if rec[0].closed:
+            return False
+        try:
+            tmp_stat = os.stat(path)
+        except OSError:
+            return False
+        return tmp_stat.st_dev == rec[1] and tmp_stat.st_ino == rec[2]
+
+    def _release(self, key, handle):
+        with self._lock:
+            tmp_rec = self._files.get(key)
+            if tmp_rec is None or tmp_rec[0] is not handle:
+                # closed while it was in use (trimmed, or close_all)
+                handle.close()
+                return
+            if handle.writable():
+                handle.flush()
+            tmp_rec[3] = False
+
+    def _trim(self):
+        if len(self._files) <= self.max_open:
+            return
+        for key in list(self._files):
+            if len(self._files) <= self.max_open:
+                break
+            if not self._files[key][3]:
+                self._close(key)
+
+    def _close(self, key):
+        tmp_rec = self._files.pop(key)
+        if not tmp_rec[3]:
+            tmp_rec[0].close()
+
+    def close_all(self):
+        """
+        closes all of the files not in use, (files in use are closed when they are returned).
+        """
+        with self._lock:
+            for key in list(self._files):
+                self._close(key)
 
-        tmp_rec = dict(filename=filename, full_path=None, handle=handle, encoding=encoding, mode=mode, errors=errors)
-        self._files[tmp_rec]
-'''
+    def __len__(self):
+        return len(self._files)
 
+    def __repr__(self):
+        return 'FileHandler [{} open files]'.format(len(self._files))
@@ -0,0 +1,91 @@
+__author__ = 'dstrohl'
+
+"""
+A fast parser for the python literals stored in configuration strings.
+
+Flat lists and dictionaries of numbers, quoted strings, True, False and None (the usual contents of a list or dict
+option) are parsed with regular expressions and the int / float constructors instead of compiling the string with
+:py:func:`ast.literal_eval`.  Anything else (nested containers, tuples, escapes in strings, etc) is passed to
+literal_eval, so the results (and errors) are always the same as literal_eval.
+"""
+
+import ast
+import re
+
+__all__ = ['parse_literal']
+
+_STR = r"'[^'\\\n]*'|\"[^\"\\\n]*\""
+_NUM = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w.])"
+_NAME = r"(?:True|False|None)(?!\w)"
+_SCALAR = r"(?:{}|{}|{})".format(_STR, _NUM, _NAME)
+
+_LIST_RE = re.compile(r"\s*\[\s*((?:{s}\s*,\s*)*(?:{s}\s*)?)\]\s*".format(s=_SCALAR))
+_DICT_RE = re.compile(r"\s*\{{\s*((?:{s}\s*:\s*{s}\s*,\s*)*(?:{s}\s*:\s*{s}\s*)?)\}}\s*".format(s=_SCALAR))
+_SCALAR_RE = re.compile(_SCALAR)
+_INT_LIST_RE = re.compile(r"\s*\[([\d,\s+-]*)\]\s*")
+
+# an int with a leading zero (not valid in python 3), these are left to literal_eval to raise the error.
+_LEADING_ZERO_RE = re.compile(r"(?<![\d.eE])0\d")
+_NAMES = {'True': True, 'False': False, 'None': None}
+
+
+def _scalar(token):
+    tmp_first = token[0]
+    if tmp_first == "'" or tmp_first == '"':
+        return token[1:-1]
+    if token in _NAMES:
+        return _NAMES[token]
+    if '.' in token or 'e' in token or 'E' in token:
+        return float(token)
+    return int(token)
+
+
+def _int_list(inner):
+    """
+    a list of ints split on the commas, or None if it is not one.
+    """
+    tmp_tokens = inner.split(',')
+    if not tmp_tokens[-1].strip():
+        tmp_tokens.pop()
+    try:
+        return [int(t) for t in tmp_tokens]
+    except ValueError:
+        return None
+
+
+def _items(inner):
+    return [_scalar(t) for t in _SCALAR_RE.findall(inner)]
+
+
+def parse_literal(value):
+    """
+    returns the object for a string containing a python literal, the same as :py:func:`ast.literal_eval`.
+    """
+    # leading whitespace is an IndentationError for literal_eval before python 3.10.
+    if value != value.lstrip():
+        return ast.literal_eval(value)
+
+    # only ints, (the most common large lists)
+    tmp_match = _INT_LIST_RE.fullmatch(value)
+    if tmp_match is not None:
+        tmp_inner = tmp_match.group(1)
+        if _LEADING_ZERO_RE.search(tmp_inner) is None:
+            tmp_ret = _int_list(tmp_inner)
+            if tmp_ret is not None:
+                return tmp_ret
+
+    tmp_match = _LIST_RE.fullmatch(value)
+    if tmp_match is not None:
+        tmp_inner = tmp_match.group(1)
+        if _LEADING_ZERO_RE.search(tmp_inner) is None:
+            return _items(tmp_inner)
+
+    else:
+        tmp_match = _DICT_RE.fullmatch(value)
+        if tmp_match is not None:
+            tmp_inner = tmp_match.group(1)
+            if _LEADING_ZERO_RE.search(tmp_inner) is None:
+                tmp_items = _items(tmp_inner)
+                return dict(zip(tmp_items[0::2], tmp_items[1::2]))
+
+    return ast.literal_eval(value)
@@ -0,0 +1,124 @@
+__author__ = 'dstrohl'
+
+import threading
+
+__all__ = ['ReadWriteLock', 'NullLock']
+
+
+class _LockContext(object):
+    """
+    A re-usable context manager that calls the acquire and release methods passed.
+    """
+    __slots__ = ('_acquire', '_release')
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._release()
+        return False
+
+
+class ReadWriteLock(object):
+    """
+    A readers-writer lock.  Any number of threads can hold the read lock at the same time, but the write lock is
+    exclusive.
+
+    The write lock is re-entrant, and a thread that holds the write lock can also take the read lock, so code that
+    changes the configuration can call other methods that lock without dead-locking itself.
+
+    The lock can be used as::
+
+        with lock.read_lock:
+            ...
+
+        with lock.write_lock:
+            ...
+
+    .. note:: this lock prefers readers, a thread trying to write will wait until all current readers are done.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+
+        self.read_lock = _LockContext(self.acquire_read, self.release_read)
+        self.write_lock = _LockContext(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            while self._writer is not None:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            if self._writer == threading.get_ident():
+                self._writer_depth -= 1
+                return
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._writer_depth += 1
+                return
+            while self._writer is not None or self._readers > 0:
+                self._cond.wait()
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError('cannot release a write lock that is not held by this thread')
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @property
+    def is_thread_safe(self):
+        return True
+
+    def __repr__(self):
+        return 'ReadWriteLock [readers: {}, writer: {}]'.format(self._readers, self._writer)
+
+
+class NullLock(object):
+    """
+    A lock with the same interface as :py:class:`ReadWriteLock` that does nothing, used when thread safety is not
+    needed.
+    """
+
+    def __init__(self):
+        self.read_lock = _LockContext(self.acquire_read, self.release_read)
+        self.write_lock = self.read_lock
+
+    def acquire_read(self):
+        pass
+
+    release_read = acquire_read
+    acquire_write = acquire_read
+    release_write = acquire_read
+
+    @property
+    def is_thread_safe(self):
+        return False
+
+    def __repr__(self):
+        return 'NullLock'
@@ -1,6 +1,44 @@
 __author__ = 'dstrohl'
 
-from distutils.version import LooseVersion
+from distutils.version import LooseVersion, StrictVersion
+from functools import lru_cache
+
+
+def _cmp_key(version):
+    """
+    returns a key that compares the same way the version does, (a tuple for the standard version classes, so that
+    comparing does not have to go through the version class's compare methods).
+    """
+    if isinstance(version, StrictVersion):
+        if version.prerelease is None:
+            return version.version, (1,)
+        return version.version, (0,) + version.prerelease
+    if isinstance(version, LooseVersion):
+        return tuple(version.version)
+    return version
+
+
+def _stripped(version):
+    """
+    returns the version numbers without any trailing zeros
+    """
+    tmp_ver = tuple(version.version)
+    new_len = len(tmp_ver)
+    for pos, num in enumerate(reversed(tmp_ver)):
+        if num != 0:
+            return tmp_ver[:new_len-pos]
+    return ()
+
+
+@lru_cache(maxsize=1024)
+def _parse_version(version_class, ver):
+    """
+    parses a version string once for each version class.
+
+    :return: the version object, the comparison key, the stripped version numbers.
+    """
+    tmp_ver = version_class(ver)
+    return tmp_ver, _cmp_key(tmp_ver), _stripped(tmp_ver)
 
 
 class VersionRange(object):
@@ -11,20 +49,20 @@ class VersionRange(object):
         else:
             self._version_class = version_class
 
-        self.ver_is = self._make_ver(sup_ver)
-        self.ver_min = self._make_ver(min_ver)
-        self.ver_max = self._make_ver(max_ver)
+        self.ver_is, self._is_key, self._is_stripped = self._parsed(sup_ver)
+        self.ver_min, self._min_key, tmp_junk = self._parsed(min_ver)
+        self.ver_max, self._max_key, tmp_junk = self._parsed(max_ver)
 
         if self.ver_is is not None:
-            if self.ver_min is not None and not self._contains(self.ver_min, self.ver_is):
+            if self.ver_min is not None and not self._contains(self._stripped(self.ver_min), self._is_stripped):
                 raise AttributeError('Min Version is not inside super Version')
-            if self.ver_max is not None and not self._contains(self.ver_max, self.ver_is):
+            if self.ver_max is not None and not self._contains(self._stripped(self.ver_max), self._is_stripped):
                 raise AttributeError('Max Version is not inside super Version')
 
-    def _contains(self, other, container):
-
+    @staticmethod
+    def _contains(other, container):
         """
-        other in container
+        other in container, (both are stripped version tuples)
         3.4.5 in 3.4
         true
 
@@ -33,106 +71,96 @@ class VersionRange(object):
 
         3.4 in 3.4.1
         False
-
-
         """
-        if isinstance(other, str):
-            other = self._make_ver(other)
-
-        other = self._stripped(other)
-        container = self._stripped(container)
-
-        if len(other) < len(container):
-            return False
-
-        for s, o in zip(container, other):
-            try:
-                if s < o:
-                    return False
-            except TypeError:
-                return False
-        return True
+        return other[:len(container)] == container and len(other) >= len(container)
 
     @staticmethod
     def _stripped(version):
         """
         returns a version without any trailing zeros
         """
-        new_len = len(version.version)
-        for pos, num in enumerate(reversed(version.version)):
-            if num != 0:
-                return version.version[:new_len-pos]
-        return []
+        return _stripped(version)
 
-    def _make_ver(self, ver):
+    def _parsed(self, ver):
+        """
+        :return: the version object, the comparison key, and the stripped version numbers (or None, None, None)
+        """
         if ver is None:
-            return ver
-        if isinstance(ver, str):
-            return self._version_class(ver)
-        if isinstance(ver, type(self._version_class)):
-            return ver
-        return self._version_class(str(ver))
+            return None, None, None
+        if isinstance(ver, self._version_class):
+            # already parsed, only the keys are needed.
+            return ver, _cmp_key(ver), _stripped(ver)
+        if not isinstance(ver, str):
+            ver = str(ver)
+        return _parse_version(self._version_class, ver)
+
+    def _make_ver(self, ver):
+        return self._parsed(ver)[0]
+
+    def _key(self, ver):
+        return self._parsed(ver)[1]
 
     def __cmp__(self, other):
-        other = self._make_ver(other)
-        if other in self:
+        tmp_ver, tmp_key, tmp_stripped = self._parsed(other)
+        if self._in(tmp_key, tmp_stripped):
             return 0
-        if other < self.ver_min:
+        if tmp_key < self._min_key:
             return -1
-        if other > self.ver_max:
+        if tmp_key > self._max_key:
             return 1
 
-
-
     def lt(self, other):
-        other = self._make_ver(other)
-        if self.ver_min is not None:
-            return other < self.ver_min
+        other = self._key(other)
+        if self._min_key is not None:
+            return other < self._min_key
 
-        if self.ver_is is not None:
-            return other < self.ver_is
+        if self._is_key is not None:
+            return other < self._is_key
 
         return False
 
     def gt(self, other):
-        other = self._make_ver(other)
-        if self.ver_max is not None and other > self.ver_max:
+        tmp_ver, tmp_key, tmp_stripped = self._parsed(other)
+        if self._max_key is not None and tmp_key > self._max_key:
             return True
-        if other in self:
+        if self._in(tmp_key, tmp_stripped):
             return False
         return True
 
     def le(self, other):
-        other = self._make_ver(other)
-        if self.ver_min and other == self.ver_min:
+        other = self._key(other)
+        if self._min_key and other == self._min_key:
             return True
-        if other < self.ver_min:
+        if other < self._min_key:
             return True
-        if self.ver_is and other == self.ver_is:
+        if self._is_key and other == self._is_key:
             return True
         else:
             return False
 
     def ge(self, other):
-        other = self._make_ver(other)
-        if self.ver_max:
-            return other >= self.ver_max
+        other = self._key(other)
+        if self._max_key:
+            return other >= self._max_key
         else:
             raise Warning('Comparing versions with "Greater than" without a max set may not result in expected results.')
             return False
 
-    def __contains__(self, item):
-        item = self._make_ver(item)
-        if self.ver_is is not None:
-            if not self._contains(item, self.ver_is):
+    def _in(self, key, stripped):
+        if self._is_stripped is not None:
+            if not self._contains(stripped, self._is_stripped):
                 return False
-        if self.ver_min is not None:
-            if item < self.ver_min:
+        if self._min_key is not None:
+            if key < self._min_key:
                 return False
-        if self.ver_max is not None:
-            if item > self.ver_max:
+        if self._max_key is not None:
+            if key > self._max_key:
                 return False
         return True
 
+    def __contains__(self, item):
+        tmp_ver, tmp_key, tmp_stripped = self._parsed(item)
+        return self._in(tmp_key, tmp_stripped)
+
     def __repr__(self):
-        return 'Version Range [{}] / [{} - {}]'.format(self.ver_is, self.ver_min, self.ver_max)
\ No newline at end of file
+        return 'Version Range [{}] / [{} - {}]'.format(self.ver_is, self.ver_min, self.ver_max)
@@ -3,7 +3,7 @@ from setuptools import setup
 setup(
     name='advanced_config_manager',
     version='1.0',
-    packages=['AdvConfigMgr', 'AdvConfigMgr.docs', 'AdvConfigMgr.tests', 'AdvConfigMgr.utils'],
+    packages=['AdvConfigMgr', 'AdvConfigMgr.benchmarks', 'AdvConfigMgr.docs', 'AdvConfigMgr.tests', 'AdvConfigMgr.utils'],
     url='http://advanced-config-manager.rtfd.org/',
     license='GNU GPL v2',
     author='Dan Strohl',
@@ -15,6 +15,7 @@ setup(
                  'Operating System :: OS Independent', 'Programming Language :: Python',
                  'Topic :: Software Development :: Libraries :: Python Modules', 'Topic :: Utilities'],
     keywords='configuration INI database migration config setup plugin tool cli startup',
+    entry_points={'console_scripts': ['adv-config-migrate = AdvConfigMgr.config_migrate_tool:main']},
 
 
 )